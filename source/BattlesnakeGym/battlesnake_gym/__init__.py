@@ -11,4 +11,11 @@
 # express or implied. See the License for the specific language governing 
 # permissions and limitations under the License.
 
-from .snake_gym import BattlesnakeGym
\ No newline at end of file
+from .snake_gym import BattlesnakeGym
+from .batched_gym import BatchedBattlesnakeGym
+from .state import GameState
+from .transition import transition
+from .lazy_observation import LazyObservation
+from .outcome import Outcome
+from .vector_env import BattlesnakeVectorEnv, BattlesnakeEnvPool
+from .records import GameRecordWriter, GameRecords, GameRecorder
\ No newline at end of file
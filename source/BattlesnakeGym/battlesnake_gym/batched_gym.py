@@ -0,0 +1,562 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License").
+# You may not use this file except in compliance with the License.
+# A copy of the License is located at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# or in the "license" file accompanying this file. This file is distributed
+# on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either
+# express or implied. See the License for the specific language governing
+# permissions and limitations under the License.
+
+import numpy as np
+
+from .snake import Snake
+from .food import Food
+from .rewards import SimpleRewards
+from .snake_gym import BattlesnakeGym
+from . import json_export
+from .outcome import Outcome, OUTCOME_STRINGS, SnakeArrayView
+from .rewards import get_reward_table, get_turn_events, get_turn_rewards
+
+class BatchedBattlesnakeGym:
+    '''
+    Simulates number_of_games BattlesnakeGym games at once with the state of every game
+    stored in stacked numpy arrays. A turn is resolved for all the games with vectorised
+    operations and follows the same rules as BattlesnakeGym.step (including the stacked
+    spawning, forbidden moves, head-to-head ties and starvation).
+
+    The board of each game is stored with a 1 cell wall border so that every
+    coordinate (including a head that moved into a wall) is a flat index into
+    a (map_size[0]+2, map_size[1]+2) grid.
+
+    When map_sizes is given, every game is stored in a MAX_BORDER grid instead, with its
+    board centered and the cells around the board marked as walls in a per-game wall mask.
+    Games of different board sizes are then resolved by the same vectorised step and
+    the size of a game can be changed when it is reset (e.g. for curriculum training).
+
+    Parameters:
+    ----------
+    number_of_games: int
+        Number of games simulated in parallel
+
+    observation_type: str, default="flat-51s"
+        Same options as BattlesnakeGym. Bordered observations are returned as float32.
+
+    map_size: (int, int), optional, default=(15, 15)
+
+    number_of_snakes: int, optional, default=4
+
+    snake_spawn_locations: [(int, int)] optional, default=[]
+        Parameter to force snakes to spawn in certain positions (for every game). Used for testing
+
+    rewards: Rewards, default=SimpleRewards()
+
+    seed: int, optional, default=None
+
+    map_sizes: [(int, int)], optional, default=None
+        Board size of each game (up to MAX_BORDER - 2). map_size is ignored if map_sizes is given.
+        Only max-bordered observations can be used because they have the same shape for every board size.
+    '''
+    MAX_BORDER = BattlesnakeGym.MAX_BORDER
+
+    # Outcome codes of each snake for a turn (see Outcome). OUTCOMES[code] is the string reported by
+    # BattlesnakeGym.step in info["snake_info"]
+    DID_NOT_COLLIDE = Outcome.DID_NOT_COLLIDE
+    DEAD = Outcome.DEAD
+    STARVED = Outcome.STARVED
+    FORBIDDEN_MOVE = Outcome.FORBIDDEN_MOVE
+    HIT_WALL = Outcome.HIT_WALL
+    EATEN_SAME_TILE = Outcome.EATEN_SAME_TILE
+    EATEN_ADJACENT_TILE = Outcome.EATEN_ADJACENT_TILE
+    HIT_ITSELF = Outcome.HIT_ITSELF
+    HIT_OTHER = Outcome.HIT_OTHER
+    OTHER_SNAKE_HIT_BODY = Outcome.OTHER_SNAKE_HIT_BODY
+    ATE_ANOTHER_SNAKE = Outcome.ATE_ANOTHER_SNAKE
+    OUTCOMES = OUTCOME_STRINGS
+
+    NO_DIRECTION = -1
+    OPPOSITE_DIRECTIONS = np.array([Snake.DOWN, Snake.UP, Snake.RIGHT, Snake.LEFT])
+
+    def __init__(self, number_of_games, observation_type="flat-51s", map_size=(15, 15),
+                 number_of_snakes=4, snake_spawn_locations=[],
+                 rewards=SimpleRewards(), seed=None, map_sizes=None):
+        self.number_of_games = number_of_games
+        self.observation_type = observation_type
+        self.is_mixed = map_sizes is not None
+        self.number_of_snakes = number_of_snakes
+        self.snake_spawn_locations = snake_spawn_locations
+        self.rewards = rewards
+
+        if len(snake_spawn_locations) > 0:
+            error_message = "the number of coordinates in snake_spawn_locations must match the number of snakes"
+            assert len(snake_spawn_locations) == number_of_snakes, error_message
+
+        if self.is_mixed:
+            if "max-bordered" not in observation_type:
+                raise ValueError("Games with different map sizes require a max-bordered observation_type")
+            self.padded_size = self.MAX_BORDER
+            self.map_size = None
+            largest_map_size = (self.MAX_BORDER[0] - 2, self.MAX_BORDER[1] - 2)
+        else:
+            self.padded_size = (map_size[0] + 2, map_size[1] + 2)
+            self.map_size = map_size
+            largest_map_size = map_size
+        number_of_cells = self.padded_size[0] * self.padded_size[1]
+
+        # Flat offsets of Snake.UP, Snake.DOWN, Snake.LEFT and Snake.RIGHT
+        self._deltas = np.array([-self.padded_size[1], self.padded_size[1], -1, 1])
+
+        # A snake can not be longer than the number of cells (+1 for a head moving into its body)
+        self.capacity = largest_map_size[0] * largest_map_size[1] + 1
+
+        # Per-game board size, flat index of the board coordinate (0, 0) and wall mask
+        self.map_sizes = np.zeros((number_of_games, 2), dtype=np.int64)
+        self._origins = np.zeros(number_of_games, dtype=np.int64)
+        self._walls = np.ones((number_of_games, number_of_cells), dtype=bool)
+        self._set_map_sizes(np.arange(number_of_games),
+                            map_sizes if self.is_mixed else [map_size] * number_of_games)
+
+        shape = (number_of_games, number_of_snakes)
+        self.bodies = np.zeros(shape + (self.capacity,), dtype=np.int16)
+        self.tail_positions = np.zeros(shape, dtype=np.int32)
+        self.lengths = np.zeros(shape, dtype=np.int32)
+        self.health = np.zeros(shape, dtype=np.int32)
+        self.alive = np.zeros(shape, dtype=bool)
+        self.facing_directions = np.full(shape, self.NO_DIRECTION, dtype=np.int8)
+        self.body_stacking = np.zeros(shape, dtype=np.int8)
+        self.ate_food = np.zeros(shape, dtype=bool)
+        self.snake_max_len = np.zeros(shape, dtype=np.int32)
+        self.occupancy = np.zeros(shape + (number_of_cells,), dtype=np.uint8)
+        self.food = np.zeros((number_of_games,) + self.padded_size, dtype=np.uint8)
+        self.turn_count = np.zeros(number_of_games, dtype=np.int32)
+
+        self._game_index = np.arange(number_of_games)[:, None]
+        self._snake_index = np.arange(number_of_snakes)[None, :]
+        self._is_same_snake = np.eye(number_of_snakes, dtype=bool)
+        self._is_lower_snake = np.tri(number_of_snakes, k=-1, dtype=bool)
+
+        self.seed(seed)
+
+    def _set_map_sizes(self, game_ids, map_sizes):
+        '''
+        Helper function to set the board size, origin and wall mask of the games in game_ids
+        '''
+        map_sizes = np.asarray(map_sizes, dtype=np.int64).reshape(len(game_ids), 2)
+        if np.any(map_sizes < 1) or np.any(map_sizes > np.array(self.padded_size) - 2):
+            raise ValueError("map_sizes must fit in a {} grid with a wall border".format(self.padded_size))
+        offsets = (np.array(self.padded_size) - map_sizes) // 2
+        self.map_sizes[game_ids] = map_sizes
+        self._origins[game_ids] = offsets[:, 0] * self.padded_size[1] + offsets[:, 1]
+
+        rows = np.arange(self.padded_size[0])[None, :, None]
+        columns = np.arange(self.padded_size[1])[None, None, :]
+        is_inside = (rows >= offsets[:, 0, None, None]) & \
+            (rows < (offsets[:, 0] + map_sizes[:, 0])[:, None, None]) & \
+            (columns >= offsets[:, 1, None, None]) & \
+            (columns < (offsets[:, 1] + map_sizes[:, 1])[:, None, None])
+        self._walls[game_ids] = ~is_inside.reshape(len(game_ids), -1)
+
+    def seed(self, seed=None):
+        '''
+        Set the randomisation seed of the food and snake spawning.
+        '''
+        self.np_random = np.random.default_rng(seed)
+        return [seed]
+
+    def reset(self, game_ids=None, map_sizes=None):
+        '''
+        Reset the games indicated by game_ids (all the games by default) and spawn
+        the snakes and the first food.
+
+        Parameters:
+        ----------
+        game_ids: [int], optional
+
+        map_sizes: [(int, int)] or (int, int), optional
+            New board size of each reset game. Only available when the gym was created with map_sizes
+
+        Returns:
+        --------
+        observation, reward, done, info of all the games (see step)
+        '''
+        if game_ids is None:
+            game_ids = np.arange(self.number_of_games)
+        game_ids = np.asarray(game_ids, dtype=np.int64)
+        number_of_games = len(game_ids)
+
+        if map_sizes is not None:
+            if not self.is_mixed:
+                raise ValueError("map_sizes can only be changed when the gym was created with map_sizes")
+            map_sizes = np.broadcast_to(np.asarray(map_sizes, dtype=np.int64).reshape(-1, 2),
+                                        (number_of_games, 2))
+            self._set_map_sizes(game_ids, map_sizes)
+
+        self.bodies[game_ids] = 0
+        self.tail_positions[game_ids] = 0
+        self.lengths[game_ids] = 1
+        self.health[game_ids] = Snake.FULL_HEALTH
+        self.alive[game_ids] = True
+        self.facing_directions[game_ids] = self.NO_DIRECTION
+        self.body_stacking[game_ids] = 2
+        self.ate_food[game_ids] = False
+        self.snake_max_len[game_ids] = 0
+        self.occupancy[game_ids] = 0
+        self.food[game_ids] = 0
+        self.turn_count[game_ids] = 0
+
+        if len(self.snake_spawn_locations) == 0:
+            # Random ordered sample of distinct board cells for each game (walls are sorted last)
+            random_keys = self.np_random.random(self._walls[game_ids].shape)
+            random_keys[self._walls[game_ids]] = 2
+            starting_cells = np.argsort(random_keys, axis=1)[:, :self.number_of_snakes]
+        else:
+            starting_cells = np.array([i * self.padded_size[1] + j
+                                       for i, j in self.snake_spawn_locations])
+            starting_cells = self._origins[game_ids, None] + starting_cells[None, :]
+
+        self.bodies[game_ids, :, 0] = starting_cells
+        self.occupancy[game_ids[:, None], self._snake_index, starting_cells] = 1
+
+        self._spawn_food(game_ids)
+
+        dones = np.zeros((self.number_of_games, self.number_of_snakes), dtype=bool)
+        dones[:] = ~self.alive
+        outcomes = np.full((self.number_of_games, self.number_of_snakes),
+                           self.DID_NOT_COLLIDE, dtype=np.int8)
+        reward = np.zeros((self.number_of_games, self.number_of_snakes), dtype=np.float32)
+        return self._get_observation(), reward, dones, self._get_info(outcomes)
+
+    def get_heads(self):
+        '''
+        Returns the padded flat index of the head of every snake, np.array(number_of_games, number_of_snakes)
+        The value is meaningless for dead snakes.
+        '''
+        head_positions = (self.tail_positions + self.lengths - 1) % self.capacity
+        return self.bodies[self._game_index, self._snake_index, head_positions].astype(np.int64)
+
+    def _kill_snakes(self, mask):
+        '''
+        Helper function to kill the snakes indicated by the boolean mask
+        '''
+        self.alive[mask] = False
+        self.lengths[mask] = 0
+        self.occupancy[mask] = 0
+
+    def _move_snakes(self, actions, moving):
+        '''
+        Helper function to move the snakes indicated by moving. Mimics Snake.move
+
+        Returns:
+        -------
+        is_forbidden: np.array(number_of_games, number_of_snakes)
+        '''
+        facing = self.facing_directions
+        is_forbidden = moving & (facing != self.NO_DIRECTION) & \
+            (actions == self.OPPOSITE_DIRECTIONS[np.maximum(facing, 0)])
+        directions = np.where(is_forbidden, facing, actions)
+
+        new_heads = self.get_heads() + self._deltas[directions]
+
+        # Snakes in the first turns of being alive and snakes that ate food keep their tail
+        stacking = moving & (self.body_stacking > 0)
+        self.body_stacking[stacking] -= 1
+        digesting = moving & ~stacking & self.ate_food
+        self.ate_food[digesting] = False
+
+        game_ids, snake_ids = np.nonzero(moving & ~stacking & ~digesting)
+        tail_positions = self.tail_positions[game_ids, snake_ids]
+        tails = self.bodies[game_ids, snake_ids, tail_positions]
+        self.occupancy[game_ids, snake_ids, tails] -= 1
+        self.tail_positions[game_ids, snake_ids] = (tail_positions + 1) % self.capacity
+        self.lengths[game_ids, snake_ids] -= 1
+
+        game_ids, snake_ids = np.nonzero(moving)
+        heads = new_heads[game_ids, snake_ids]
+        head_positions = (self.tail_positions[game_ids, snake_ids] +
+                          self.lengths[game_ids, snake_ids]) % self.capacity
+        self.bodies[game_ids, snake_ids, head_positions] = heads
+        self.lengths[game_ids, snake_ids] += 1
+        self.occupancy[game_ids, snake_ids, heads] += 1
+        self.facing_directions[game_ids, snake_ids] = directions[game_ids, snake_ids]
+        return is_forbidden
+
+    def _resolve_collisions(self):
+        '''
+        Vectorised version of BattlesnakeGym._did_snake_collide for every snake alive.
+        The snakes are only killed in step so that the outcome of every snake is
+        based on the positions after moving.
+
+        Returns:
+        --------
+        outcomes: np.array(number_of_games, number_of_snakes)
+            Outcome codes (self.DEAD for snakes that are not alive)
+
+        should_kill_snake: np.array(number_of_games, number_of_snakes)
+        '''
+        alive = self.alive
+        heads = self.get_heads()
+        sizes = self.lengths
+
+        hit_wall = alive & self._walls[self._game_index, heads]
+
+        # [n, i, j] indicates the relation between snake i and snake j of game n
+        other_alive = alive[:, None, :] & ~self._is_same_snake
+        same_head = heads[:, :, None] == heads[:, None, :]
+        other_is_bigger = sizes[:, None, :] >= sizes[:, :, None]
+
+        previous_heads = heads - self._deltas[np.maximum(self.facing_directions, 0)]
+        swapped_heads = (heads[:, :, None] == previous_heads[:, None, :]) & \
+            (previous_heads[:, :, None] == heads[:, None, :])
+
+        same_tile = other_alive & same_head
+        adjacent_tile = other_alive & swapped_heads
+        was_eaten_same_tile = (same_tile & other_is_bigger).any(axis=2)
+        was_eaten_adjacent_tile = (adjacent_tile & other_is_bigger).any(axis=2)
+        ate_snakes = (same_tile | adjacent_tile) & ~other_is_bigger
+
+        # occupancy_at_heads[n, i, j]: number of body parts of snake i where the head of snake j is
+        occupancy_at_heads = self.occupancy[self._game_index[:, :, None],
+                                            self._snake_index[:, :, None],
+                                            heads[:, None, :]]
+        hit_itself = np.diagonal(occupancy_at_heads, axis1=1, axis2=2) > 1
+
+        # Mimics Snakes.get_snake_51_map excluding the snake and the snakes it ate:
+        # the heads count as 5, the body as 1 and snakes with their head in a wall are not drawn
+        is_drawn = alive & ~hit_wall
+        map_values = np.where(same_head, 5, np.where(occupancy_at_heads > 0, 1, 0))
+        is_excluded = self._is_same_snake | np.swapaxes(ate_snakes, 1, 2)
+        map_values = map_values * (is_drawn[:, :, None] & ~is_excluded)
+        hit_other = map_values.sum(axis=1) == 1
+
+        outcomes = np.full(alive.shape, self.DEAD, dtype=np.int8)
+        outcomes[alive] = self.DID_NOT_COLLIDE
+        should_kill_snake = np.zeros(alive.shape, dtype=bool)
+        for outcome, mask in ((self.HIT_OTHER, hit_other),
+                              (self.HIT_ITSELF, hit_itself),
+                              (self.EATEN_ADJACENT_TILE, was_eaten_adjacent_tile),
+                              (self.EATEN_SAME_TILE, was_eaten_same_tile),
+                              (self.HIT_WALL, hit_wall)):
+            mask = alive & mask
+            outcomes[mask] = outcome
+            should_kill_snake |= mask
+
+        # Another snake's head is in the body. Snakes with lower indexes that will be killed
+        # are ignored because _did_snake_collide is called in the order of the snakes.
+        survived = alive & ~should_kill_snake
+        head_in_body = (occupancy_at_heads.astype(np.int16) - same_head) > 0
+        ignored = self._is_lower_snake & should_kill_snake[:, None, :]
+        other_snake_hit_body = survived & (head_in_body & other_alive & ~ignored).any(axis=2)
+        ate_another_snake = survived & ~other_snake_hit_body & ate_snakes.any(axis=2)
+        outcomes[other_snake_hit_body] = self.OTHER_SNAKE_HIT_BODY
+        outcomes[ate_another_snake] = self.ATE_ANOTHER_SNAKE
+        return outcomes, should_kill_snake
+
+    def _spawn_food(self, game_ids):
+        '''
+        Helper function to spawn a food in each game of game_ids on a random cell
+        that is not occupied by a snake. Mimics Food.spawn_food
+        '''
+        if len(game_ids) == 0:
+            return
+        is_free = ~self._walls[game_ids] & ~self.occupancy[game_ids].any(axis=1)
+        random_keys = self.np_random.random(is_free.shape)
+        random_keys[~is_free] = -1
+        cells = np.argmax(random_keys, axis=1)
+        has_free_cell = is_free.any(axis=1)
+        self.food.reshape(self.number_of_games, -1)[game_ids[has_free_cell],
+                                                    cells[has_free_cell]] = 1
+
+    def step(self, actions, episodes=None):
+        '''
+        Resolves a turn of every game. Mimics BattlesnakeGym.step
+
+        Parameters:
+        ---------
+        actions: np.array(number_of_games, number_of_snakes)
+            Integers ranging from 0 to 3 corresponding to Snake.UP, Snake.DOWN, Snake.LEFT, Snake.RIGHT
+
+        Returns:
+        -------
+        observation: np.array(number_of_games, height, width, number_of_snakes+1)
+
+        reward: np.array(number_of_games, number_of_snakes)
+
+        done: np.array(number_of_games, number_of_snakes)
+            Whether each snake is dead (same as the done dict of BattlesnakeGym.step)
+
+        info: {}
+            current_turn, health and outcomes (Outcome codes, see self.OUTCOMES) arrays,
+            snake_health and snake_info (a list of the views of BattlesnakeGym.step for each game),
+            snake_max_len and game_done (whether 1 or less snakes remain in the game)
+        '''
+        actions = np.asarray(actions, dtype=np.int64).reshape(self.number_of_games,
+                                                              self.number_of_snakes)
+
+        # Reduce health and move
+        was_alive = self.alive.copy()
+        self.health[was_alive] -= 1
+        starved = was_alive & (self.health == 0)
+        self._kill_snakes(starved)
+
+        is_forbidden = self._move_snakes(actions, self.alive)
+        self._kill_snakes(is_forbidden)
+
+        # Check for collisions and food
+        outcomes, should_kill_snake = self._resolve_collisions()
+        outcomes[starved] = self.STARVED
+        outcomes[is_forbidden] = self.FORBIDDEN_MOVE
+
+        heads = self.get_heads()
+        food = self.food.reshape(self.number_of_games, -1)
+        game_ids, snake_ids = np.nonzero(self.alive & ~should_kill_snake)
+        ate_food = food[game_ids, heads[game_ids, snake_ids]] == 1
+        game_ids, snake_ids = game_ids[ate_food], snake_ids[ate_food]
+        food[game_ids, heads[game_ids, snake_ids]] = 0
+        self.ate_food[game_ids, snake_ids] = True
+        self.health[game_ids, snake_ids] = Snake.FULL_HEALTH
+        ate_food = np.zeros(actions.shape, dtype=bool)
+        ate_food[game_ids, snake_ids] = True
+
+        self._kill_snakes(should_kill_snake)
+
+        spawn_food = self.np_random.random(self.number_of_games) < Food.FOOD_SPAWN_CHANCE
+        self._spawn_food(np.flatnonzero(spawn_food))
+
+        number_of_snakes_alive = self.alive.sum(axis=1)
+        if self.number_of_snakes > 1:
+            game_done = number_of_snakes_alive <= 1
+        else:
+            game_done = np.zeros(self.number_of_games, dtype=bool)
+        events = get_turn_events(outcomes, ate_food, self.alive, game_done)
+        reward_table = get_reward_table(self.rewards, self.number_of_snakes, episodes)
+        reward = get_turn_rewards(reward_table, events).astype(np.float32)
+
+        self.turn_count += 1
+        self.snake_max_len += self.alive
+
+        info = self._get_info(outcomes)
+        info["game_done"] = game_done
+        return self._get_observation(), reward, ~self.alive, info
+
+    def _get_info(self, outcomes):
+        '''
+        Helper function to generate the info returned by reset and step
+        '''
+        health = self.health.copy()
+        return {'current_turn': self.turn_count.copy(),
+                'health': health,
+                'snake_health': [SnakeArrayView(game_health) for game_health in health],
+                'snake_info': [SnakeArrayView(game_outcomes, OUTCOME_STRINGS) for game_outcomes in outcomes],
+                'outcomes': outcomes,
+                'snake_max_len': self.snake_max_len.copy()}
+
+    def get_outcome_strings(self, outcomes):
+        '''
+        Convert outcome codes of a game into the snake_info dict of BattlesnakeGym.step
+
+        Parameters:
+        ----------
+        outcomes: np.array(number_of_snakes)
+        '''
+        return {i: self.OUTCOMES[code] for i, code in enumerate(outcomes)}
+
+    def get_json_bytes(self, game_ids=None):
+        '''
+        Serialise several games at once into the JSON of BattlesnakeGym.get_json
+
+        Parameters:
+        ----------
+        game_ids: [int], optional
+            Games to serialise (all the games by default)
+
+        Returns:
+        --------
+        json: bytes
+            UTF-8 JSON list with the get_json representation of each game
+        '''
+        if game_ids is None:
+            game_ids = np.arange(self.number_of_games)
+        game_ids = np.asarray(game_ids, dtype=np.int64)
+
+        # (y, x) padded coordinates of the board coordinate (0, 0) of each game
+        origins = np.stack(np.divmod(self._origins[game_ids], self.padded_size[1]), axis=1)
+        segments = np.arange(self.capacity)
+        positions = (self.tail_positions[game_ids, :, None] + segments) % self.capacity
+        cells = self.bodies[game_ids[:, None, None], self._snake_index[:, :, None], positions]
+        coordinates = np.stack(np.divmod(cells.astype(np.int64), self.padded_size[1]), axis=-1)
+        coordinates -= origins[:, None, None, :]
+
+        games = []
+        for n, game_id in enumerate(game_ids.tolist()):
+            map_size = self.map_sizes[game_id]
+            y, x = origins[n]
+            food_map = self.food[game_id, y:y + map_size[0], x:x + map_size[1]]
+            bodies = [coordinates[n, k, :self.lengths[game_id, k]]
+                      for k in range(self.number_of_snakes)]
+            games.append(json_export.format_game(int(self.turn_count[game_id]), map_size.tolist(),
+                                                 food_map, bodies, self.health[game_id].tolist()))
+        return ("[" + ",".join(games) + "]").encode()
+
+    def _get_snake_planes(self):
+        '''
+        Helper function to draw the snakes of every game, mimicking Snakes.get_snake_depth_51_map
+        and Snakes.get_snake_depth_numbered_map
+
+        Returns:
+        --------
+        planes: np.array(number_of_games, number_of_snakes, padded_size[0] * padded_size[1])
+        '''
+        if "51s" in self.observation_type:
+            planes = np.minimum(self.occupancy, 1)
+            game_ids, snake_ids = np.nonzero(self.alive)
+            planes[game_ids, snake_ids, self.get_heads()[game_ids, snake_ids]] = 5
+        else:
+            planes = np.zeros_like(self.occupancy)
+            game_ids, snake_ids = np.nonzero(self.alive)
+            segments = np.arange(self.capacity)
+            positions = (self.tail_positions[game_ids, snake_ids, None] + segments) % self.capacity
+            is_segment = segments < self.lengths[game_ids, snake_ids, None]
+            cells = self.bodies[game_ids[:, None], snake_ids[:, None], positions]
+            values = np.broadcast_to(segments + 1, cells.shape)
+            np.maximum.at(planes, (np.broadcast_to(game_ids[:, None], cells.shape)[is_segment],
+                                   np.broadcast_to(snake_ids[:, None], cells.shape)[is_segment],
+                                   cells[is_segment]),
+                          values[is_segment].astype(np.uint8))
+        return planes
+
+    def _get_observation(self):
+        '''
+        Helper function to generate the observations of every game.
+
+        Returns:
+        --------
+        observation: np.array(number_of_games, height, width, number_of_snakes+1)
+            [:, :, :, 0] is the food and [:, :, :, 1:] are the snakes as in BattlesnakeGym
+        '''
+        planes = self._get_snake_planes().reshape(
+            (self.number_of_games, self.number_of_snakes) + self.padded_size)
+        state = np.concatenate([self.food[:, None], planes], axis=1).transpose(0, 2, 3, 1)
+
+        if self.is_mixed:
+            # The padded grid is the max-bordered observation with -1 outside of each board
+            bordered_state = state.astype(np.float32)
+            bordered_state[self._walls.reshape((self.number_of_games,) + self.padded_size)] = -1
+            return bordered_state
+
+        if "flat" in self.observation_type:
+            return np.ascontiguousarray(state[:, 1:-1, 1:-1])
+
+        if "max-bordered" in self.observation_type:
+            border_size = self.MAX_BORDER[0] - self.map_size[0]
+        else:
+            border_size = 2
+        b = int(border_size/2)
+        bordered_state = np.full((self.number_of_games,
+                                  self.map_size[0] + border_size,
+                                  self.map_size[1] + border_size,
+                                  self.number_of_snakes + 1), -1, dtype=np.float32)
+        bordered_state[:, b:-b, b:-b] = state[:, 1:-1, 1:-1]
+        return bordered_state
@@ -0,0 +1,123 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License").
+# You may not use this file except in compliance with the License.
+# A copy of the License is located at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# or in the "license" file accompanying this file. This file is distributed
+# on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either
+# express or implied. See the License for the specific language governing
+# permissions and limitations under the License.
+
+import numpy as np
+
+class BoardRenderer:
+    '''
+    Draws the rgb_array images of BattlesnakeGym.render with array indexing.
+    Every box of the board is one of a few tiles (empty, food, body or head of each snake).
+    The tile of each box is chosen from the states and all the tiles are written at once
+    into a strided view of the boxes of a blank board that is built once per map size.
+
+    Parameters:
+    ----------
+    map_size: (int, int)
+    '''
+    BOUNDARY = 20
+    BOX_SIZE = 40
+    SPACE_BETWEEN_BOXES = 10
+    EMPTY_COLOUR = int(255 * 0.7)
+    FOOD_COLOUR = (255, 0, 0)
+    HEAD_COLOUR = (255, 255, 255)
+    FOOD_MARGIN = int(BOX_SIZE/5)
+    HEAD_MARGIN = 10
+
+    def __init__(self, map_size):
+        self.map_size = tuple(map_size)
+        step = self.BOX_SIZE + self.SPACE_BETWEEN_BOXES
+        self.board_size = (self.map_size[0]*step + 2*self.BOUNDARY,
+                           self.map_size[1]*step + 2*self.BOUNDARY)
+
+        self._template = np.full(self.board_size + (3,), 255, dtype=np.uint8)
+        self._get_boxes(self._template)[:] = self.EMPTY_COLOUR
+        self._template.flags.writeable = False
+
+    def _get_boxes(self, boards):
+        '''
+        Helper function to get a view of the boxes of boards
+
+        Parameters:
+        ----------
+        boards: np.array(..., board_size[0], board_size[1], 3)
+
+        Returns:
+        --------
+        boxes: np.array(..., map_size[0], BOX_SIZE, map_size[1], BOX_SIZE, 3)
+        '''
+        step = self.BOX_SIZE + self.SPACE_BETWEEN_BOXES
+        height, width = self.map_size[0]*step, self.map_size[1]*step
+        inside = boards[..., self.BOUNDARY:self.BOUNDARY + height,
+                        self.BOUNDARY:self.BOUNDARY + width, :]
+        inside = inside.reshape(boards.shape[:-3] + (self.map_size[0], step,
+                                                     self.map_size[1], step, 3))
+        return inside[..., :self.BOX_SIZE, :, :self.BOX_SIZE, :]
+
+    def _get_tiles(self, snake_colours):
+        '''
+        Helper function to draw the boxes that can appear on the board
+
+        Returns:
+        --------
+        tiles: np.array(2 + 2 * number_of_snakes, BOX_SIZE, BOX_SIZE, 3)
+            The empty box, the food and then the body and the head of each snake
+        '''
+        number_of_snakes = len(snake_colours)
+        tiles = np.empty((2 + 2*number_of_snakes, self.BOX_SIZE, self.BOX_SIZE, 3), dtype=np.uint8)
+        tiles[0] = self.EMPTY_COLOUR
+        tiles[1] = self.EMPTY_COLOUR
+        food_margin = self.FOOD_MARGIN
+        tiles[1, food_margin:-food_margin, food_margin:-food_margin] = self.FOOD_COLOUR
+        if number_of_snakes > 0:
+            snake_colours = np.asarray(snake_colours).reshape(number_of_snakes, 1, 1, 3)
+            tiles[2:] = np.concatenate([snake_colours, snake_colours])
+            head_margin = self.HEAD_MARGIN
+            tiles[2+number_of_snakes:, head_margin:-head_margin, head_margin:-head_margin] = \
+                self.HEAD_COLOUR
+        return tiles
+
+    def render(self, states, snake_colours):
+        '''
+        Draw the boards of one or several states
+
+        Parameters:
+        ----------
+        states: np.array(map_size[0], map_size[1], depth) or np.array(number_of_states, map_size[0], map_size[1], depth)
+            States generated by BattlesnakeGym._get_state. Channel 0 is the food and the next
+            len(snake_colours) channels are the snakes
+
+        snake_colours: [[int, int, int]]
+
+        Returns:
+        --------
+        boards: np.array(board_size[0], board_size[1], 3) or np.array(number_of_states, board_size[0], board_size[1], 3)
+        '''
+        states = np.asarray(states)
+        number_of_snakes = len(snake_colours)
+        snake_values = states[..., 1:1 + number_of_snakes]
+
+        # Same precedence as drawing the food, then the body and then the head of a box
+        tile_ids = np.where(states[..., 0] >= 1, 1, 0)
+        if number_of_snakes > 0:
+            owners = np.argmax(snake_values, axis=-1)
+            has_head = (snake_values == 5).any(axis=-1)
+            has_body = (snake_values == 1).any(axis=-1) | has_head
+            tile_ids[has_body] = 2 + owners[has_body]
+            tile_ids[has_head] += number_of_snakes
+
+        boards = np.empty(states.shape[:-3] + self.board_size + (3,), dtype=np.uint8)
+        boards[...] = self._template
+        tiles = self._get_tiles(snake_colours)[tile_ids]
+        # tiles is (..., map_size[0], map_size[1], BOX_SIZE, BOX_SIZE, 3)
+        self._get_boxes(boards)[...] = np.swapaxes(tiles, -4, -3)
+        return boards
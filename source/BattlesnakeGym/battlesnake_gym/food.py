@@ -15,7 +15,6 @@ import math
 import random
 
 import numpy as np
-from .utils import get_random_coordinates, generate_coordinate_list_from_binary_map
 
 class Food:
     '''
@@ -33,6 +32,8 @@ class Food:
         self.locations_map = np.zeros(shape=(map_size[0], map_size[1]))
 
         self.food_spawn_locations = food_spawn_locations
+        self._zobrist = None # ZobristKeys.food
+        self._hash = 0 # XOR of the Zobrist keys of the food
 
     @classmethod
     def make_from_list(cls, map_size, food_list):
@@ -50,32 +51,81 @@ class Food:
             cls.locations_map[i, j] = 1
         return cls
 
-    def spawn_food(self, snake_map):
+    def attach_zobrist(self, keys):
+        '''
+        Set the Zobrist keys of the food and compute the hash of the food.
+        The hash is then updated in O(1) every time a food is spawned or eaten.
+        If locations_map is modified directly, attach_zobrist must be called again.
+
+        Parameters:
+        ----------
+        keys: [int]
+            ZobristKeys.food
+        '''
+        self._zobrist = keys
+        self._hash = 0
+        for cell in np.flatnonzero(self.locations_map).tolist():
+            self._hash ^= keys[cell]
+
+    def get_hash(self):
+        '''
+        Get the XOR of the Zobrist keys of the food (0 if no keys are attached)
+        '''
+        return self._hash
+
+    def _toggle_hash(self, coord):
+        if self._zobrist is not None:
+            self._hash ^= self._zobrist[int(coord[0]) * self.map_size[1] + int(coord[1])]
+
+    def spawn_food(self, free_cells, random_state=None):
         '''
         Helper function to generate another food.
         
         Parameters:
         ----------
-        snake_map, np.array(map_size[0], map_size[1], 1)
-            The map of the location of each snake, generated by Snakes.get_snake_binary_map
+        free_cells, FreeCellIndex
+            The coordinates that are not occupied by snakes, maintained by Snakes.free_cells
+
+        random_state, np.random.Generator or np.random.RandomState, optional
+            Random generator to use instead of np.random
         '''
         if len(self.food_spawn_locations) > 0:
             locations = [self.food_spawn_locations[0]]
             self.food_spawn_locations = self.food_spawn_locations[1:]
         else:
-            snake_locations = generate_coordinate_list_from_binary_map(snake_map)
-            locations = get_random_coordinates(self.map_size, 1, excluding=snake_locations)
+            locations = free_cells.sample(1, random_state=random_state)
         for location in locations:
+            if self.locations_map[location[0], location[1]] == 0:
+                self._toggle_hash(location)
             self.locations_map[location[0], location[1]] = 1
         
-    def end_of_turn(self, snake_locations):
+    def end_of_turn(self, free_cells, random_state=None, should_spawn=None):
         '''
         Function to be called at the end of each step. 
         Adapted from 
         https://github.com/BattlesnakeOfficial/rules/blob/44b6b946661d42401f5a33b74303cd9071d0db18/standard.go#L392
+
+        Parameters:
+        ----------
+        free_cells, FreeCellIndex
+            The coordinates that are not occupied by snakes, maintained by Snakes.free_cells
+
+        random_state, np.random.Generator or np.random.RandomState, optional
+            Random generator used for the spawn chance and the location of the food.
+            By default, random.random and np.random are used
+
+        should_spawn, bool, optional
+            Whether the spawn chance succeeded, e.g., drawn in advance for many turns.
+            If None, the spawn chance is drawn from random_state
         '''
-        if random.random() < self.FOOD_SPAWN_CHANCE:
-            self.spawn_food(snake_locations)
+        if should_spawn is None:
+            if random_state is None:
+                spawn_chance = random.random()
+            else:
+                spawn_chance = random_state.random()
+            should_spawn = spawn_chance < self.FOOD_SPAWN_CHANCE
+        if should_spawn:
+            self.spawn_food(free_cells, random_state=random_state)
                     
     def get_food_map(self):
         '''
@@ -105,4 +155,6 @@ class Food:
         '''
         Function to remove a food present at coord
         '''
+        if self.locations_map[coord[0], coord[1]] != 0:
+            self._toggle_hash(coord)
         self.locations_map[coord[0], coord[1]] = 0
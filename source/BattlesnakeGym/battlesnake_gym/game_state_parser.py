@@ -34,7 +34,13 @@ class Game_state_parser:
         self.map_size = (self.board_dict["height"], self.board_dict["width"]) 
         self.number_of_snakes = len(self.board_dict["snakes"])
                 
-    def parse(self):     
+    def parse(self, random_state=None):
+        '''
+        Parameters:
+        ----------
+        random_state: np.random.Generator or np.random.RandomState, optional
+            Random generator of the colours of the snakes
+        '''
         # Get food locations
         food_locations = []
         for food_location in self.board_dict["food"]:
@@ -42,7 +48,8 @@ class Game_state_parser:
             food_locations.append((y, x))
                     
         food = Food.make_from_list(self.map_size, food_locations)
-        snakes = Snakes.make_from_dict(self.map_size, self.board_dict["snakes"])
+        snakes = Snakes.make_from_dict(self.map_size, self.board_dict["snakes"],
+                                       random_state=random_state)
 
         turn_count = self.game_dict["turn"]
 
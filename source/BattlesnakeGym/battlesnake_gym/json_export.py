@@ -0,0 +1,71 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License").
+# You may not use this file except in compliance with the License.
+# A copy of the License is located at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# or in the "license" file accompanying this file. This file is distributed
+# on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either
+# express or implied. See the License for the specific language governing
+# permissions and limitations under the License.
+
+'''
+Serialise games into the JSON of BattlesnakeGym.get_json (same input as the battlesnake engine)
+without building the nested dicts. The JSON text is formatted directly from the arrays, and is
+the same as json.dumps(env.get_json(), separators=(",", ":")).
+'''
+
+import numpy as np
+
+COORDINATE_FORMAT = '{"x":%d,"y":%d}'
+SNAKE_FORMAT = '{"health":%d,"body":[%s],"id":%d,"name":"Snake %d"}'
+GAME_FORMAT = '{"turn":%d,"board":{"height":%d,"width":%d,"food":[%s],"snakes":[%s]}}'
+
+def _format_coordinates(coordinates):
+    '''
+    Helper function to format np.array(n, 2) of (y, x) coordinates as a list of {"x", "y"}
+    '''
+    return ",".join([COORDINATE_FORMAT % (x, y) for y, x in coordinates.tolist()])
+
+def format_game(turn_count, map_size, food_map, bodies, health):
+    '''
+    Format a game as the JSON text of BattlesnakeGym.get_json
+
+    Parameters:
+    ----------
+    turn_count: int
+    map_size: (int, int)
+    food_map: np.array(map_size[0], map_size[1])
+    bodies: [np.array(length, 2)]
+        The coordinates of each snake from the end to the head (empty for dead snakes)
+    health: [int]
+
+    Returns:
+    --------
+    json: str
+    '''
+    food = _format_coordinates(np.argwhere(food_map == 1))
+    snakes = ",".join([SNAKE_FORMAT % (snake_health, _format_coordinates(body[::-1]), i, i)
+                       for i, (body, snake_health) in enumerate(zip(bodies, health))])
+    return GAME_FORMAT % (turn_count, map_size[0], map_size[1], food, snakes)
+
+def game_states_to_json_bytes(states):
+    '''
+    Serialise a whole episode (or any list of games) at once
+
+    Parameters:
+    ----------
+    states: [GameState]
+        e.g., the snapshots of every turn of an episode
+
+    Returns:
+    --------
+    json: bytes
+        UTF-8 JSON list with the get_json representation of each state
+    '''
+    games = [format_game(state.turn_count, state.map_size, state.get_food_map(),
+                         state.get_bodies(), state.health)
+             for state in states]
+    return ("[" + ",".join(games) + "]").encode()
@@ -0,0 +1,96 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# 
+# Licensed under the Apache License, Version 2.0 (the "License").
+# You may not use this file except in compliance with the License.
+# A copy of the License is located at
+# 
+#     http://www.apache.org/licenses/LICENSE-2.0
+# 
+# or in the "license" file accompanying this file. This file is distributed 
+# on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either 
+# express or implied. See the License for the specific language governing 
+# permissions and limitations under the License.
+
+
+import numpy as np
+
+class LazyObservation:
+    '''
+    Observation of a BattlesnakeGym turn that is only built when it is read.
+    It implements the numpy array protocol, so np.asarray(observation) (or any numpy function)
+    builds the full observation once and caches it. get_plane builds a single plane
+    (food or one snake) without building the others.
+
+    The observation describes the game at the turn it was returned, so it must be read before
+    the next step or reset of the gym. Reading an observation that was not built before
+    then raises a RuntimeError.
+
+    Parameters:
+    ----------
+    env: BattlesnakeGym
+    out: np.array, optional
+        Buffer to build the full observation in, see BattlesnakeGym.step
+    '''
+    def __init__(self, env, out=None):
+        self._env = env
+        self._turn_id = env._observation_turn_id
+        self._out = out
+        self._array = None
+        self._planes = {}
+        self.shape = env.observation_space.shape
+        if out is not None:
+            self.dtype = out.dtype
+        elif "flat" in env.observation_type:
+            self.dtype = np.dtype(np.uint8)
+        else:
+            self.dtype = np.dtype(np.float64)
+
+    @property
+    def ndim(self):
+        return len(self.shape)
+
+    def __len__(self):
+        return self.shape[0]
+
+    def is_built(self):
+        '''
+        Whether the full observation has been built
+        '''
+        return self._array is not None
+
+    def _check_turn(self):
+        if self._env._observation_turn_id != self._turn_id:
+            raise RuntimeError("The lazy observation was not read before the next step or reset of the gym")
+
+    def __array__(self, dtype=None, copy=None):
+        if self._array is None:
+            self._check_turn()
+            self._array = self._env._get_observation(self._out)
+            self._planes = {}
+        if dtype is not None and np.dtype(dtype) != self._array.dtype:
+            return self._array.astype(dtype)
+        if copy:
+            return self._array.copy()
+        return self._array
+
+    def __getitem__(self, key):
+        return np.asarray(self)[key]
+
+    def get_plane(self, index):
+        '''
+        Get observation[:, :, index] without building the other planes.
+
+        Parameters:
+        ----------
+        index: int
+            0 for the food and i + 1 for snake i
+        '''
+        if self._array is not None:
+            return self._array[:, :, index]
+        if index not in self._planes:
+            self._check_turn()
+            self._planes[index] = self._env._get_observation_plane(index, self.dtype)
+        return self._planes[index]
+
+    def __repr__(self):
+        return "LazyObservation(shape={}, dtype={}, built={})".format(self.shape, self.dtype, self.is_built())
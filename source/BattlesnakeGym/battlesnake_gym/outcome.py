@@ -0,0 +1,101 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License").
+# You may not use this file except in compliance with the License.
+# A copy of the License is located at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# or in the "license" file accompanying this file. This file is distributed
+# on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either
+# express or implied. See the License for the specific language governing
+# permissions and limitations under the License.
+
+from collections.abc import Mapping
+import enum
+
+import numpy as np
+
+class Outcome(enum.IntEnum):
+    '''
+    Outcome of a snake for a turn. step returns them in info["outcomes"] as an
+    np.array(number_of_snakes) of np.int8 that can be counted with np.bincount.
+    '''
+    DID_NOT_COLLIDE = 0
+    DEAD = 1
+    STARVED = 2
+    FORBIDDEN_MOVE = 3
+    HIT_WALL = 4
+    EATEN_SAME_TILE = 5
+    EATEN_ADJACENT_TILE = 6
+    HIT_ITSELF = 7
+    HIT_OTHER = 8
+    OTHER_SNAKE_HIT_BODY = 9
+    ATE_ANOTHER_SNAKE = 10
+
+    @property
+    def description(self):
+        '''
+        The string reported in info["snake_info"]
+        '''
+        return OUTCOME_STRINGS[self]
+
+# OUTCOME_STRINGS[code] is the description of each outcome
+OUTCOME_STRINGS = ("Did not collide",
+                   "Dead",
+                   "Starved",
+                   "Forbidden move",
+                   "Snake hit wall",
+                   "Snake was eaten - same tile",
+                   "Snake was eaten - adjacent tile",
+                   "Snake hit body - hit itself",
+                   "Snake hit body - hit other",
+                   "Other snake hit body",
+                   "Ate another snake")
+
+# OUTCOME_REWARDS[code] is the name of the reward given for an outcome (None for no reward)
+OUTCOME_REWARDS = (None, None, "starved", "forbidden_move", "hit_wall",
+                   "was_eaten", "was_eaten", "hit_self", "hit_other_snake",
+                   "other_snake_hit_body", "ate_another_snake")
+
+def get_outcome_code(description):
+    '''
+    Get the Outcome of a string reported in info["snake_info"]
+    '''
+    return Outcome(OUTCOME_STRINGS.index(description))
+
+class SnakeArrayView(Mapping):
+    '''
+    Read-only {snake index: value} view of a per-snake array, used to keep the dicts of
+    the info of step (e.g., info["snake_info"] and info["snake_health"]) without building them.
+    Compares equal to the dict it replaces.
+
+    Parameters:
+    ----------
+    values: np.array(number_of_snakes)
+
+    labels: tuple, optional
+        If given, the view returns labels[values[i]] (e.g., OUTCOME_STRINGS) instead of values[i]
+    '''
+    __slots__ = ("_values", "_labels")
+
+    def __init__(self, values, labels=None):
+        self._values = values
+        self._labels = labels
+
+    def __getitem__(self, index):
+        if not isinstance(index, (int, np.integer)) or not 0 <= index < len(self._values):
+            raise KeyError(index)
+        value = self._values[index]
+        if self._labels is not None:
+            return self._labels[value]
+        return value.item()
+
+    def __iter__(self):
+        return iter(range(len(self._values)))
+
+    def __len__(self):
+        return len(self._values)
+
+    def __repr__(self):
+        return repr(dict(self))
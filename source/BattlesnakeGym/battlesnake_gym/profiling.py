@@ -0,0 +1,80 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# 
+# Licensed under the Apache License, Version 2.0 (the "License").
+# You may not use this file except in compliance with the License.
+# A copy of the License is located at
+# 
+#     http://www.apache.org/licenses/LICENSE-2.0
+# 
+# or in the "license" file accompanying this file. This file is distributed 
+# on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either 
+# express or implied. See the License for the specific language governing 
+# permissions and limitations under the License.
+
+
+import functools
+import time
+
+class PhaseProfiler:
+    '''
+    Cumulative timers and call counters for named phases.
+    Methods are timed by replacing them with wrappers (see wrap_method), so objects that
+    are not profiled run their original methods without any overhead.
+    '''
+    def __init__(self):
+        self.total_times = {}
+        self.call_counts = {}
+
+    def wrap(self, phase, function):
+        '''
+        Get a function that calls function and adds its duration to phase
+
+        Parameters:
+        ----------
+        phase: str
+        function: callable
+        '''
+        self.total_times.setdefault(phase, 0.0)
+        self.call_counts.setdefault(phase, 0)
+        total_times, call_counts = self.total_times, self.call_counts
+
+        @functools.wraps(function)
+        def timed_function(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                total_times[phase] += time.perf_counter() - start
+                call_counts[phase] += 1
+        return timed_function
+
+    def wrap_method(self, obj, method_name, phase):
+        '''
+        Time obj.method_name as phase by shadowing the method with an instance attribute
+        '''
+        setattr(obj, method_name, self.wrap(phase, getattr(obj, method_name)))
+
+    def reset(self):
+        '''
+        Set all the timers and counters to 0
+        '''
+        for phase in self.total_times:
+            self.total_times[phase] = 0.0
+            self.call_counts[phase] = 0
+
+    def report(self):
+        '''
+        Get the timers and counters of each phase
+
+        Returns:
+        --------
+        report: {str: {"calls": int, "total_time": float, "mean_time": float}}
+            Times are in seconds
+        '''
+        report = {}
+        for phase, total_time in self.total_times.items():
+            calls = self.call_counts[phase]
+            report[phase] = {"calls": calls,
+                             "total_time": total_time,
+                             "mean_time": total_time / calls if calls > 0 else 0.0}
+        return report
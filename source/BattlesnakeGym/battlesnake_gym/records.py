@@ -0,0 +1,643 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License").
+# You may not use this file except in compliance with the License.
+# A copy of the License is located at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# or in the "license" file accompanying this file. This file is distributed
+# on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either
+# express or implied. See the License for the specific language governing
+# permissions and limitations under the License.
+
+'''
+Compact binary records of games. A game is stored as its seed (and its initial state when it
+can not be rebuilt from the seed), its map size and the joint action of every turn packed at
+2 bits per snake. The games are reconstructed by re-simulating them with BattlesnakeGym, which
+draws all its randomness from streams derived from the seed (see BattlesnakeGym.seed).
+Games can also store keyframes: the state and the random state of the gym every
+keyframe_interval turns, so that seeking to a turn replays less than keyframe_interval turns.
+The food spawns also depend on the order of the free cells of the gym (see FreeCellIndex.sample),
+which is stored with the initial state and the keyframes.
+
+Many games are appended into one file that can be memory-mapped:
+
+    MAGIC | game 0 | game 1 | ... | index | footer
+
+- game: GAME_HEADER, the encoded initial state (see encode_game_state) and its free cell order,
+  the keyframes and the packed actions. The keyframes are the offset of each keyframe (np.uint32,
+  from the first keyframe) followed by the keyframes (encode_game_state, the free cell order and
+  encode_random_state)
+- free cell order: FreeCellIndex.get_order as little-endian np.uint16
+- index: the offset of each game as little-endian np.uint64
+- footer: FOOTER (offset of the index, number of games and MAGIC)
+'''
+
+from collections import namedtuple
+from collections.abc import Sequence
+import mmap
+import os
+import struct
+
+import numpy as np
+
+from .snake_gym import BattlesnakeGym
+from .state import GameState
+
+MAGIC = b"BSNKREC3"
+# map height, map width, number of snakes, flags, number of turns, seed, size of the initial state,
+# keyframe interval (0 without keyframes) and size of the keyframes
+GAME_HEADER = struct.Struct("<BBBBIQIHI")
+FOOTER = struct.Struct("<QQ8s")
+HAS_INITIAL_STATE = 1
+
+# map height, map width, turn count, number of snakes, number of forced food locations
+STATE_HEADER = struct.Struct("<BBIBH")
+# PCG64 state: low and high bits of the state and of the increment, has_uint32, uinteger
+PCG64_STATE = struct.Struct("<QQQQBI")
+NUMBER_OF_GENERATORS = 4 # see BattlesnakeGym.get_random_state
+UINT64_MASK = (1 << 64) - 1
+
+ACTION_SHIFTS = np.array([0, 2, 4, 6], dtype=np.uint8)
+
+def pack_actions(actions):
+    '''
+    Pack joint actions at 2 bits per action, 4 actions per byte
+
+    Parameters:
+    ----------
+    actions: np.array(number_of_turns, number_of_snakes)
+        Integers ranging from 0 to 3 (Snake.UP, Snake.DOWN, Snake.LEFT, Snake.RIGHT)
+
+    Returns:
+    --------
+    packed_actions: bytes
+    '''
+    actions = np.asarray(actions).reshape(-1)
+    if np.any((actions < 0) | (actions > 3)):
+        raise ValueError("Only actions from 0 to 3 can be recorded")
+    padded = np.zeros(-(-len(actions) // 4) * 4, dtype=np.uint8)
+    padded[:len(actions)] = actions
+    return (padded.reshape(-1, 4) << ACTION_SHIFTS).sum(axis=1, dtype=np.uint8).tobytes()
+
+def unpack_actions(packed_actions, number_of_turns, number_of_snakes):
+    '''
+    Unpack the actions of pack_actions
+
+    Returns:
+    --------
+    actions: np.array(number_of_turns, number_of_snakes) of np.uint8
+    '''
+    packed_actions = np.frombuffer(packed_actions, dtype=np.uint8)
+    actions = (packed_actions[:, None] >> ACTION_SHIFTS) & 3
+    return actions.reshape(-1)[:number_of_turns * number_of_snakes].reshape(
+        number_of_turns, number_of_snakes)
+
+def encode_game_state(state):
+    '''
+    Encode a GameState into bytes
+
+    Parameters:
+    ----------
+    state: GameState
+
+    Returns:
+    --------
+    data: bytes
+    '''
+    number_of_snakes = len(state.lengths)
+    flags = np.array(state.is_alive, dtype=np.uint8) | (np.array(state.ate_food, dtype=np.uint8) << 1)
+    food_spawn_locations = np.array(state.food_spawn_locations, dtype="<i2").reshape(-1, 2)
+    return b"".join([
+        STATE_HEADER.pack(state.map_size[0], state.map_size[1], state.turn_count,
+                          number_of_snakes, len(food_spawn_locations)),
+        np.array(state.lengths, dtype="<u2").tobytes(),
+        np.array(state.health, dtype=np.uint8).tobytes(),
+        flags.tobytes(),
+        np.array(state.facing_directions, dtype=np.int8).tobytes(),
+        np.array(state.body_stacking, dtype=np.uint8).tobytes(),
+        np.array(state.snake_max_len, dtype="<u4").tobytes(),
+        food_spawn_locations.tobytes(),
+        np.frombuffer(state.bodies, dtype=np.int16).astype("<i2").tobytes(),
+        state.food])
+
+def decode_game_state(data, offset=0):
+    '''
+    Decode a GameState encoded with encode_game_state
+
+    Parameters:
+    ----------
+    data: bytes-like
+    offset: int
+        Position of the encoded state in data
+
+    Returns:
+    --------
+    state: GameState
+    '''
+    height, width, turn_count, number_of_snakes, number_of_food_spawn_locations = \
+        STATE_HEADER.unpack_from(data, offset)
+    offset += STATE_HEADER.size
+
+    def read(dtype, count):
+        nonlocal offset
+        array = np.frombuffer(data, dtype=dtype, count=count, offset=offset)
+        offset += array.nbytes
+        return array
+
+    lengths = read("<u2", number_of_snakes)
+    health = read(np.uint8, number_of_snakes)
+    flags = read(np.uint8, number_of_snakes)
+    facing_directions = read(np.int8, number_of_snakes)
+    body_stacking = read(np.uint8, number_of_snakes)
+    snake_max_len = read("<u4", number_of_snakes)
+    food_spawn_locations = read("<i2", 2 * number_of_food_spawn_locations).reshape(-1, 2)
+    bodies = read("<i2", 2 * int(lengths.sum()))
+    food = read(np.uint8, -(-height * width // 8))
+    return GameState(
+        map_size=(height, width),
+        turn_count=turn_count,
+        bodies=bodies.astype(np.int16).tobytes(),
+        lengths=tuple(lengths.tolist()),
+        health=tuple(health.tolist()),
+        is_alive=tuple((flags & 1).astype(bool).tolist()),
+        facing_directions=tuple(facing_directions.tolist()),
+        body_stacking=tuple(body_stacking.tolist()),
+        ate_food=tuple((flags & 2).astype(bool).tolist()),
+        food=food.tobytes(),
+        snake_max_len=tuple(snake_max_len.tolist()),
+        food_spawn_locations=tuple([tuple(location) for location in food_spawn_locations.tolist()]))
+
+def encode_random_state(random_state):
+    '''
+    Encode the random state of a gym (see BattlesnakeGym.get_random_state) into bytes.
+    Only the food spawn chances that were not used yet are stored.
+
+    Returns:
+    --------
+    data: bytes
+    '''
+    generator_states, food_spawn_flips, food_spawn_index = random_state
+    parts = []
+    for state in generator_states:
+        if state["bit_generator"] != "PCG64":
+            raise ValueError("Only PCG64 random generators can be recorded, got {}".format(
+                state["bit_generator"]))
+        value, increment = state["state"]["state"], state["state"]["inc"]
+        parts.append(PCG64_STATE.pack(value & UINT64_MASK, value >> 64,
+                                      increment & UINT64_MASK, increment >> 64,
+                                      state["has_uint32"], state["uinteger"]))
+    remaining_flips = np.array(food_spawn_flips[food_spawn_index:], dtype=bool)
+    parts.append(struct.pack("<H", len(remaining_flips)))
+    parts.append(np.packbits(remaining_flips).tobytes())
+    return b"".join(parts)
+
+def decode_random_state(data, offset=0):
+    '''
+    Decode a random state encoded with encode_random_state
+
+    Returns:
+    --------
+    random_state: tuple
+        See BattlesnakeGym.set_random_state
+    '''
+    generator_states = []
+    for _ in range(NUMBER_OF_GENERATORS):
+        value_low, value_high, increment_low, increment_high, has_uint32, uinteger = \
+            PCG64_STATE.unpack_from(data, offset)
+        offset += PCG64_STATE.size
+        generator_states.append({"bit_generator": "PCG64",
+                                 "state": {"state": value_low | (value_high << 64),
+                                           "inc": increment_low | (increment_high << 64)},
+                                 "has_uint32": has_uint32, "uinteger": uinteger})
+    number_of_flips, = struct.unpack_from("<H", data, offset)
+    offset += 2
+    packed_flips = np.frombuffer(data, dtype=np.uint8, count=-(-number_of_flips // 8), offset=offset)
+    food_spawn_flips = np.unpackbits(packed_flips, count=number_of_flips).astype(bool)
+    return tuple(generator_states), tuple(food_spawn_flips.tolist()), 0
+
+def _get_game_state_size(data, offset):
+    '''
+    Helper function to get the number of bytes of an encoded GameState
+    '''
+    height, width, _, number_of_snakes, number_of_food_spawn_locations = STATE_HEADER.unpack_from(data, offset)
+    lengths = np.frombuffer(data, dtype="<u2", count=number_of_snakes, offset=offset + STATE_HEADER.size)
+    return (STATE_HEADER.size + number_of_snakes * 10 + number_of_food_spawn_locations * 4
+            + int(lengths.sum()) * 4 + -(-height * width // 8))
+
+def _check_seed(seed):
+    '''
+    Helper function to check that a seed can be stored in GAME_HEADER
+    '''
+    if not isinstance(seed, (int, np.integer)) or isinstance(seed, bool) or not 0 <= seed <= UINT64_MASK:
+        raise ValueError("The seed of a recorded game must be an integer from 0 to 2**64 - 1, got {!r}".format(seed))
+
+def _encode_free_cell_order(free_cells):
+    '''
+    Helper function to encode a free cell order (see FreeCellIndex.get_order)
+    '''
+    return np.asarray(free_cells).astype("<u2").tobytes()
+
+def _decode_free_cell_order(data, offset, map_size):
+    '''
+    Helper function to decode the free cell order stored after a GameState
+    '''
+    return np.frombuffer(data, dtype="<u2", count=map_size[0] * map_size[1], offset=offset).astype(np.uint16)
+
+class GameRecord(namedtuple("GameRecord", ["map_size", "number_of_snakes", "seed",
+                                           "initial_state", "actions", "keyframe_interval",
+                                           "initial_free_cells"])):
+    '''
+    A recorded game
+
+    Fields:
+    -------
+    map_size: (int, int)
+    number_of_snakes: int
+    seed: int
+        Seed of the gym during the game, see BattlesnakeGym.seed
+    initial_state: GameState or None
+        The state after reset, if it can not be rebuilt by resetting a gym seeded with seed.
+        The gym is then seeded after restoring the initial state
+    actions: np.array(number_of_turns, number_of_snakes)
+    keyframe_interval: int
+        The game has a keyframe every keyframe_interval turns (0 if it has no keyframes),
+        see GameRecords.get_keyframe
+    initial_free_cells: np.array or None
+        The order of the free cells of the gym with the initial state (see FreeCellIndex.get_order)
+    '''
+    __slots__ = ()
+
+    @property
+    def number_of_turns(self):
+        return len(self.actions)
+
+class GameRecordWriter:
+    '''
+    Append games to a record file. The index of the games is written when the writer is closed.
+
+    Parameters:
+    ----------
+    path: str
+
+    append: bool, default False
+        Add the games after the games of an existing file instead of replacing it
+    '''
+    def __init__(self, path, append=False):
+        self.path = path
+        self.offsets = []
+        if append and os.path.exists(path):
+            with GameRecords(path) as records:
+                self.offsets = records.offsets.tolist()
+                index_offset = records.index_offset
+            self._file = open(path, "r+b")
+            self._file.truncate(index_offset)
+            self._file.seek(index_offset)
+        else:
+            self._file = open(path, "wb")
+            self._file.write(MAGIC)
+
+    def write_game(self, map_size, number_of_snakes, seed, actions, initial_state=None,
+                   keyframe_interval=0, keyframes=(), initial_free_cells=None):
+        '''
+        Append a game
+
+        Parameters:
+        ----------
+        map_size, number_of_snakes, seed, actions, initial_state, keyframe_interval, initial_free_cells:
+            see GameRecord. initial_free_cells is required with initial_state
+
+        keyframes: [(GameState, tuple, np.array)]
+            The state, the random state (see BattlesnakeGym.get_random_state) and the free cell
+            order (see FreeCellIndex.get_order) of the gym after keyframe_interval,
+            2 * keyframe_interval, ... turns
+
+        Returns:
+        --------
+        index: int
+            The index of the game in the file
+        '''
+        _check_seed(seed)
+        actions = np.asarray(actions).reshape(-1, number_of_snakes)
+        number_of_keyframes = len(actions) // keyframe_interval if keyframe_interval > 0 else 0
+        if len(keyframes) != number_of_keyframes:
+            raise ValueError("A game of {} turns needs {} keyframes, got {}".format(
+                len(actions), number_of_keyframes, len(keyframes)))
+        encoded_state = b"" if initial_state is None else \
+            encode_game_state(initial_state) + _encode_free_cell_order(initial_free_cells)
+        flags = 0 if initial_state is None else HAS_INITIAL_STATE
+        encoded_keyframes = [encode_game_state(state) + _encode_free_cell_order(free_cells) +
+                             encode_random_state(random_state)
+                             for state, random_state, free_cells in keyframes]
+        keyframe_offsets = np.cumsum([0] + [len(keyframe) for keyframe in encoded_keyframes[:-1]])
+        keyframe_offsets = keyframe_offsets[:number_of_keyframes].astype("<u4").tobytes()
+        keyframes_size = len(keyframe_offsets) + sum([len(keyframe) for keyframe in encoded_keyframes])
+
+        self.offsets.append(self._file.tell())
+        self._file.write(GAME_HEADER.pack(map_size[0], map_size[1], number_of_snakes, flags,
+                                          len(actions), seed, len(encoded_state),
+                                          keyframe_interval, keyframes_size))
+        self._file.write(encoded_state)
+        self._file.write(keyframe_offsets)
+        self._file.write(b"".join(encoded_keyframes))
+        self._file.write(pack_actions(actions))
+        return len(self.offsets) - 1
+
+    def close(self):
+        '''
+        Write the index and the footer and close the file
+        '''
+        if self._file is None:
+            return
+        index_offset = self._file.tell()
+        self._file.write(np.array(self.offsets, dtype="<u8").tobytes())
+        self._file.write(FOOTER.pack(index_offset, len(self.offsets), MAGIC))
+        self._file.close()
+        self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+class GameRecords(Sequence):
+    '''
+    Memory-mapped record file. Games are decoded on demand, so any game can be read
+    (e.g., sampled at random) without reading the rest of the file.
+
+    Parameters:
+    ----------
+    path: str
+    '''
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self._mmap) < len(MAGIC) + FOOTER.size or self._mmap[:len(MAGIC)] != MAGIC:
+            raise ValueError("{} is not a game record file".format(path))
+        self.index_offset, number_of_games, magic = FOOTER.unpack_from(self._mmap, len(self._mmap) - FOOTER.size)
+        if magic != MAGIC:
+            raise ValueError("{} has no index, the writer may not have been closed".format(path))
+        self.offsets = np.frombuffer(self._mmap, dtype="<u8", count=number_of_games,
+                                     offset=self.index_offset).astype(np.int64)
+        self._gyms = {}
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def _read_header(self, index):
+        '''
+        Helper function to read the header of a game
+
+        Returns:
+        --------
+        header: tuple
+            The fields of GAME_HEADER followed by the offsets of the initial state,
+            the keyframes and the actions
+        '''
+        offset = int(self.offsets[index])
+        header = GAME_HEADER.unpack_from(self._mmap, offset)
+        state_size, keyframes_size = header[6], header[8]
+        state_offset = offset + GAME_HEADER.size
+        keyframes_offset = state_offset + state_size
+        return header + (state_offset, keyframes_offset, keyframes_offset + keyframes_size)
+
+    def __getitem__(self, index):
+        '''
+        Decode a game (without its keyframes)
+
+        Returns:
+        --------
+        record: GameRecord
+        '''
+        height, width, number_of_snakes, flags, number_of_turns, seed, _, keyframe_interval, _, \
+            state_offset, _, actions_offset = self._read_header(index)
+        initial_state = initial_free_cells = None
+        if flags & HAS_INITIAL_STATE:
+            initial_state = decode_game_state(self._mmap, state_offset)
+            initial_free_cells = _decode_free_cell_order(
+                self._mmap, state_offset + _get_game_state_size(self._mmap, state_offset), (height, width))
+        packed_size = -(-number_of_turns * number_of_snakes // 4)
+        actions = unpack_actions(self._mmap[actions_offset:actions_offset + packed_size],
+                                 number_of_turns, number_of_snakes)
+        return GameRecord((height, width), number_of_snakes, seed, initial_state, actions,
+                          keyframe_interval, initial_free_cells)
+
+    def get_keyframe(self, index, keyframe):
+        '''
+        Decode a keyframe of a game
+
+        Parameters:
+        ----------
+        index: int
+        keyframe: int
+            Keyframe k is the game after (k + 1) * keyframe_interval turns
+
+        Returns:
+        --------
+        state: GameState
+        random_state: tuple
+            See BattlesnakeGym.set_random_state
+        free_cells: np.array
+            See FreeCellIndex.set_order
+        '''
+        header = self._read_header(index)
+        number_of_turns, keyframe_interval, keyframes_offset = header[4], header[7], header[10]
+        number_of_keyframes = number_of_turns // keyframe_interval if keyframe_interval > 0 else 0
+        if not 0 <= keyframe < number_of_keyframes:
+            raise IndexError("Keyframe {} is not in a game with {} keyframes".format(
+                keyframe, number_of_keyframes))
+        keyframe_offset, = struct.unpack_from("<I", self._mmap, keyframes_offset + 4 * keyframe)
+        offset = keyframes_offset + 4 * number_of_keyframes + keyframe_offset
+        state = decode_game_state(self._mmap, offset)
+        offset += _get_game_state_size(self._mmap, offset)
+        free_cells = _decode_free_cell_order(self._mmap, offset, state.map_size)
+        random_state = decode_random_state(self._mmap, offset + free_cells.nbytes)
+        return state, random_state, free_cells
+
+    def _start_game(self, index, record, turn=0):
+        '''
+        Helper function to get a gym set to the last keyframe of a recorded game before turn
+        (or to the start of the game)
+
+        Returns:
+        --------
+        env: BattlesnakeGym
+        start_turn: int
+            The turn of the game in env
+        '''
+        if not 0 <= turn <= record.number_of_turns:
+            raise IndexError("Turn {} is not in a game of {} turns".format(turn, record.number_of_turns))
+        key = (record.map_size, record.number_of_snakes)
+        if key not in self._gyms:
+            self._gyms[key] = BattlesnakeGym(map_size=record.map_size,
+                                             number_of_snakes=record.number_of_snakes)
+        env = self._gyms[key]
+        if record.keyframe_interval > 0 and turn >= record.keyframe_interval:
+            keyframe = turn // record.keyframe_interval - 1
+            state, random_state, free_cells = self.get_keyframe(index, keyframe)
+            env.restore(state)
+            env.snakes.free_cells.set_order(free_cells)
+            env.set_random_state(random_state)
+            return env, (keyframe + 1) * record.keyframe_interval
+        if record.initial_state is None:
+            env.seed(record.seed)
+            env.reset()
+        else:
+            env.restore(record.initial_state)
+            env.snakes.free_cells.set_order(record.initial_free_cells)
+            env.seed(record.seed)
+        return env, 0
+
+    def iter_states(self, index, start=0):
+        '''
+        Re-simulate a game and yield its state at every turn, from turn start
+        to the state after the last action. The simulation starts from the
+        last keyframe before start.
+
+        Yields:
+        -------
+        state: GameState
+        '''
+        record = self[index]
+        env, turn = self._start_game(index, record, start)
+        for actions in record.actions[turn:start]:
+            _simulate_turn(env, actions)
+        yield env.snapshot()
+        for turn, actions in enumerate(record.actions[start:], start + 1):
+            _simulate_turn(env, actions)
+            yield env.snapshot()
+
+    def get_state(self, index, turn=None):
+        '''
+        Re-simulate a game up to a turn, from the last keyframe before the turn.
+        At most keyframe_interval - 1 turns are simulated if the game has keyframes.
+
+        Parameters:
+        ----------
+        index: int
+        turn: int, optional
+            Number of turns played from the initial state (all the turns of the game by default)
+
+        Returns:
+        --------
+        state: GameState
+        '''
+        record = self[index]
+        if turn is None:
+            turn = record.number_of_turns
+        env, start_turn = self._start_game(index, record, turn)
+        for actions in record.actions[start_turn:turn]:
+            _simulate_turn(env, actions)
+        return env.snapshot()
+
+    def close(self):
+        self._mmap.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+def _simulate_turn(env, actions):
+    '''
+    Helper function to apply the rules of BattlesnakeGym.step without building the
+    observation, the rewards and the info
+    '''
+    outcomes = env._move_snakes(actions)
+    env._resolve_collisions(outcomes)
+    env._end_turn()
+
+class GameRecorder:
+    '''
+    Record the games played in a BattlesnakeGym. Use reset and step instead of the
+    methods of the gym: each reset seeds the gym with the seed of the new game.
+    The games are otherwise played as in the gym alone.
+
+    Parameters:
+    ----------
+    env: BattlesnakeGym
+
+    writer: GameRecordWriter
+
+    seed: int, optional
+        Seed of the generator of the seeds of the games
+
+    keyframe_interval: int, default 64
+        Store a keyframe every keyframe_interval turns (0 for no keyframes). Shorter intervals
+        make the files larger and seeking faster: a seek simulates at most keyframe_interval - 1 turns
+    '''
+    def __init__(self, env, writer, seed=None, keyframe_interval=64):
+        self.env = env
+        self.writer = writer
+        self.keyframe_interval = keyframe_interval
+        self._seed_rng = np.random.default_rng(seed)
+        self._game = None
+
+    def _is_reset_seeded(self):
+        '''
+        Whether the initial state of a game only depends on the seed of the gym
+        '''
+        return self.env.initial_game_state is None and len(self.env.snake_spawn_locations) == 0 \
+            and len(self.env.food_spawn_locations) == 0
+
+    def reset(self, seed=None, **kwargs):
+        '''
+        Record the current game and reset the gym. Same as BattlesnakeGym.reset
+
+        Parameters:
+        ----------
+        seed: int, optional
+            Seed of the new game from 0 to 2**64 - 1, drawn at random by default
+        '''
+        if seed is not None:
+            _check_seed(seed)
+        self.end_game()
+        if seed is None:
+            seed = int(self._seed_rng.integers(2**63))
+        if self._is_reset_seeded():
+            self.env.seed(seed)
+            result = self.env.reset(**kwargs)
+            initial_state = None
+        else:
+            result = self.env.reset(**kwargs)
+            initial_state = (self.env.snapshot(), self.env.snakes.free_cells.get_order())
+            self.env.seed(seed)
+        self._game = (tuple(self.env.map_size), seed, initial_state, [], [])
+        return result
+
+    def step(self, actions, **kwargs):
+        '''
+        Step the gym and record the actions. Same as BattlesnakeGym.step
+        '''
+        if self._game is None:
+            raise RuntimeError("GameRecorder.reset must be called before step")
+        game_actions, keyframes = self._game[3], self._game[4]
+        game_actions.append(np.array(actions, dtype=np.uint8).reshape(-1))
+        result = self.env.step(actions, **kwargs)
+        if self.keyframe_interval > 0 and len(game_actions) % self.keyframe_interval == 0:
+            keyframes.append((self.env.snapshot(), self.env.get_random_state(),
+                              self.env.snakes.free_cells.get_order()))
+        return result
+
+    def end_game(self):
+        '''
+        Write the current game (called by reset)
+
+        Returns:
+        --------
+        index: int or None
+            The index of the game in the file, None if no game was started
+        '''
+        if self._game is None:
+            return None
+        map_size, seed, initial_state, actions, keyframes = self._game
+        self._game = None
+        actions = np.array(actions, dtype=np.uint8).reshape(-1, self.env.number_of_snakes)
+        initial_state, initial_free_cells = (None, None) if initial_state is None else initial_state
+        return self.writer.write_game(map_size, self.env.number_of_snakes, seed, actions,
+                                      initial_state, self.keyframe_interval, keyframes,
+                                      initial_free_cells)
@@ -13,6 +13,17 @@
 
 import numpy as np
 
+from .outcome import Outcome, OUTCOME_REWARDS
+
+# Events that are rewarded in a turn: the Outcome codes followed by these events.
+# EVENT_REWARD_NAMES[event] is the name given to Rewards.get_reward (None for no reward)
+ATE_FOOD_EVENT = len(Outcome)
+ANOTHER_TURN_EVENT = ATE_FOOD_EVENT + 1
+WON_EVENT = ATE_FOOD_EVENT + 2
+DIED_EVENT = ATE_FOOD_EVENT + 3
+NO_EVENT = ATE_FOOD_EVENT + 4
+EVENT_REWARD_NAMES = OUTCOME_REWARDS + ("ate_food", "another_turn", "won", "died", None)
+
 class Rewards:
     '''
     Base class to set up rewards for the battlesnake gym
@@ -20,6 +31,100 @@ class Rewards:
     def get_reward(self, name, snake_id, episode):
         raise NotImplemented()
 
+    def compile(self):
+        '''
+        Get the rewards as a vector indexed by event (see EVENT_REWARD_NAMES) so that the rewards
+        of all the snakes are computed with a single gather and sum over the events of the turn
+        (see get_turn_rewards).
+        Rewards that depend on the snake or the episode return None and get_reward is used instead.
+
+        Returns:
+        --------
+        reward_vector: np.array(len(EVENT_REWARD_NAMES)) or None
+        '''
+        return None
+
+def make_reward_vector(get_reward):
+    '''
+    Helper function to build the reward vector of Rewards.compile
+
+    The vector keeps integer rewards as integers (np.int64) if all the rewards are integers.
+
+    Parameters:
+    ----------
+    get_reward: callable
+        Function returning the reward of a name
+    '''
+    return np.array([0 if name is None else get_reward(name) for name in EVENT_REWARD_NAMES])
+
+def compile_rewards(rewards):
+    '''
+    Get the reward vector of rewards (see Rewards.compile). Also supports reward classes
+    that only implement get_reward, for which None is returned.
+    '''
+    compile_function = getattr(rewards, "compile", None)
+    if compile_function is None:
+        return None
+    return compile_function()
+
+def get_reward_table(rewards, number_of_snakes, episodes=None):
+    '''
+    Get the reward of every event for every snake, using Rewards.compile if possible
+    and Rewards.get_reward otherwise
+
+    Returns:
+    --------
+    reward_table: np.array(number_of_snakes, len(EVENT_REWARD_NAMES))
+    '''
+    reward_vector = compile_rewards(rewards)
+    if reward_vector is not None:
+        return np.broadcast_to(reward_vector, (number_of_snakes, len(reward_vector)))
+    return np.array([make_reward_vector(lambda name: rewards.get_reward(name, i, episodes))
+                     for i in range(number_of_snakes)])
+
+def get_turn_events(outcomes, ate_food, snakes_alive, game_done):
+    '''
+    Build the events of a turn for each snake (of one or several games)
+
+    Parameters:
+    ----------
+    outcomes: np.array(..., number_of_snakes) of Outcome codes
+    ate_food, snakes_alive: np.array(..., number_of_snakes) of bool
+    game_done: np.array(...) of bool
+        Whether the winner and the losers are rewarded
+
+    Returns:
+    --------
+    events: np.array(..., number_of_snakes, 4)
+        The outcome, ATE_FOOD_EVENT, ANOTHER_TURN_EVENT and WON_EVENT or DIED_EVENT of each snake
+        (NO_EVENT for the events that did not happen)
+    '''
+    events = np.full(np.shape(outcomes) + (4,), NO_EVENT, dtype=np.intp)
+    events[..., 0] = outcomes
+    events[..., 1][ate_food] = ATE_FOOD_EVENT
+    events[..., 2][snakes_alive] = ANOTHER_TURN_EVENT
+    events[..., 3] = np.where(np.asarray(game_done)[..., None],
+                              np.where(snakes_alive, WON_EVENT, DIED_EVENT), NO_EVENT)
+    return events
+
+def get_turn_rewards(reward_table, events):
+    '''
+    Gather and sum the rewards of the events of each snake
+
+    Parameters:
+    ----------
+    reward_table: np.array(len(EVENT_REWARD_NAMES)) or np.array(number_of_snakes, len(EVENT_REWARD_NAMES))
+    events: np.array(..., number_of_snakes, 4), see get_turn_events
+
+    Returns:
+    --------
+    rewards: np.array(..., number_of_snakes)
+    '''
+    if reward_table.ndim == 1:
+        return reward_table[events].sum(axis=-1)
+    snake_index = np.arange(reward_table.shape[0])[:, None]
+    return reward_table[snake_index, events].sum(axis=-1)
+
 class SimpleRewards(Rewards):
     '''
     Simple class to handle a fixed reward scheme
@@ -40,3 +145,14 @@ class SimpleRewards(Rewards):
 
     def get_reward(self, name, snake_id, episode):
         return self.reward_dict[name]
+
+    def compile(self):
+        # Subclasses that override get_reward may depend on the snake or the episode
+        if type(self).get_reward is not SimpleRewards.get_reward:
+            return None
+        # Rebuilt only when reward_dict was changed (e.g., by the hyperparameters of train-mabs.py)
+        items = tuple(self.reward_dict.items())
+        if getattr(self, "_compiled_items", None) != items:
+            self._reward_vector = make_reward_vector(self.reward_dict.__getitem__)
+            self._compiled_items = items
+        return self._reward_vector
@@ -13,7 +13,9 @@
 
 import numpy as np
 
-from .utils import get_random_coordinates
+from .utils import FreeCellIndex, get_random_integers
+from .state import NO_DIRECTION
+from .zobrist import ZobristKeys
 
 class Snake:
     '''
@@ -28,6 +30,12 @@ class Snake:
     map_size: (int, int)
         The size of the map
 
+    random_state: np.random.Generator or np.random.RandomState, optional
+        Random generator of the colour of the snake, np.random by default
+
+    The body is kept in a preallocated ring buffer of coordinates. Every coordinate is written
+    twice (at position p and p + capacity) so that the body is always a contiguous slice of the
+    buffer and get_head, get_body, get_tail and locations return views without copying.
     '''
 
     UP = 0
@@ -36,21 +44,166 @@ class Snake:
     RIGHT = 3
 
     FULL_HEALTH = 100
+
+    DIRECTION_OFFSETS = {UP: (-1, 0), DOWN: (1, 0), LEFT: (0, -1), RIGHT: (0, 1)}
+    # Direction from a segment to the next segment towards the head, used for the Zobrist keys
+    SEGMENT_DIRECTIONS = {(-1, 0): UP, (1, 0): DOWN, (0, -1): LEFT, (0, 1): RIGHT,
+                          (0, 0): ZobristKeys.STACKED}
+
+    __slots__ = ("health", "facing_direction", "_is_alive", "ate_food", "map_size", "colour",
+                 "_number_of_initial_body_stacking", "_occupancy", "_index", "_free_cells",
+                 "_body", "_capacity", "_tail_position", "_length", "_zobrist", "_hash")
     
-    def __init__(self, starting_position, map_size):
+    def __init__(self, starting_position, map_size, random_state=None):
         self.health = self.FULL_HEALTH
-        self.locations = [] # Head of the snake is element n and the end is element 0
-        self.locations.append(starting_position)
         self.facing_direction = None
         self._is_alive = True
         self.ate_food = False
         self.map_size = map_size
-        self.colour = list(np.random.choice(range(256), size=3))
+        if random_state is None:
+            self.colour = list(np.random.choice(range(256), size=3))
+        else:
+            self.colour = list(get_random_integers(random_state, 256, size=3))
         self._number_of_initial_body_stacking = 2 # At the start of the game, snakes of size 3 are stacked.
         # self._number_of_initial_body_stacking == 2 to account for the initial body
+        self._occupancy = None # Snakes.occupancy, updated as the snake moves
+        self._index = None # Index of the snake in Snakes.occupancy
+        self._free_cells = None # Snakes.free_cells, updated as the snake moves
+        self._zobrist = None # ZobristKeys.segments of the snake
+        self._hash = 0 # XOR of the Zobrist keys of the segments
+
+        # A snake can not be longer than the number of coordinates (+1 for a head moving into its body)
+        self._allocate_body(map_size[0] * map_size[1] + 1)
+        if starting_position is not None:
+            self._push_head(*starting_position)
+
+    def _allocate_body(self, capacity):
+        '''
+        Helper function to create an empty ring buffer for the body
+        '''
+        self._capacity = capacity
+        self._body = np.zeros((2 * capacity, 2), dtype=np.int16)
+        self._tail_position = 0
+        self._length = 0
+        self._hash = 0
+
+    def _push_head(self, i, j):
+        '''
+        Helper function to add a new head to the body
+        '''
+        position = (self._tail_position + self._length) % self._capacity
+        self._body[position] = i, j
+        self._body[position + self._capacity] = i, j
+        if self._zobrist is not None:
+            if self._length > 0:
+                # The previous head now points to the new head
+                previous_i, previous_j = self._body[position + self._capacity - 1].tolist()
+                self._hash ^= self._get_segment_key(previous_i, previous_j, ZobristKeys.HEAD)
+                self._hash ^= self._get_segment_key(previous_i, previous_j,
+                                                    self._get_segment_direction(previous_i, previous_j, i, j))
+            self._hash ^= self._get_segment_key(i, j, ZobristKeys.HEAD)
+        self._length += 1
+        self._update_occupancy((i, j), 1)
+
+    def _pop_tail(self):
+        '''
+        Helper function to remove the end of the body
+        '''
+        if self._zobrist is not None:
+            i, j = self._body[self._tail_position].tolist()
+            if self._length > 1:
+                next_i, next_j = self._body[self._tail_position + 1].tolist()
+                self._hash ^= self._get_segment_key(i, j, self._get_segment_direction(i, j, next_i, next_j))
+            else:
+                self._hash ^= self._get_segment_key(i, j, ZobristKeys.HEAD)
+        self._update_occupancy(self._body[self._tail_position], -1)
+        self._tail_position = (self._tail_position + 1) % self._capacity
+        self._length -= 1
+
+    def _get_segment_direction(self, i, j, next_i, next_j):
+        '''
+        Helper function to get the direction from a segment to the next segment
+        '''
+        return self.SEGMENT_DIRECTIONS.get((next_i - i, next_j - j), ZobristKeys.STACKED)
+
+    def _get_segment_key(self, i, j, direction):
+        '''
+        Helper function to get the Zobrist key of a segment (0 outside of the map)
+        '''
+        if 0 <= i < self.map_size[0] and 0 <= j < self.map_size[1]:
+            return self._zobrist[i * self.map_size[1] + j][direction]
+        return 0
+
+    def attach_zobrist(self, keys):
+        '''
+        Set the Zobrist keys of the segments of the snake and compute the hash of the body.
+        The hash is then updated in O(1) every time the snake moves.
+
+        Parameters:
+        -----------
+        keys: [[int]]
+            ZobristKeys.segments[index] of the snake
+        '''
+        self._zobrist = keys
+        self._hash = 0
+        locations = self.locations.tolist()
+        for (i, j), (next_i, next_j) in zip(locations[:-1], locations[1:]):
+            self._hash ^= self._get_segment_key(i, j, self._get_segment_direction(i, j, next_i, next_j))
+        if len(locations) > 0:
+            self._hash ^= self._get_segment_key(locations[-1][0], locations[-1][1], ZobristKeys.HEAD)
+
+    def get_hash(self):
+        '''
+        Get the XOR of the Zobrist keys of the segments of the snake (0 if no keys are attached)
+        '''
+        return self._hash
+
+    @property
+    def locations(self):
+        '''
+        The coordinates of the body, np.array(length, 2).
+        Head of the snake is element n and the end is element 0
+        '''
+        return self._body[self._tail_position:self._tail_position + self._length]
+
+    @locations.setter
+    def locations(self, locations):
+        self._allocate_body(max(self.map_size[0] * self.map_size[1], len(locations)) + 1)
+        for i, j in locations:
+            self._push_head(i, j)
+
+    def restore(self, locations, health, is_alive, facing_direction, body_stacking, ate_food):
+        '''
+        Set the full state of the snake without updating the occupancy.
+        Used by Snakes.restore, which rebuilds the occupancy of all the snakes at once.
+
+        Parameters:
+        ----------
+        locations: np.array(length, 2)
+            Head of the snake is element n and the end is element 0
+        health: int
+        is_alive: bool
+        facing_direction: int or None
+        body_stacking: int
+        ate_food: bool
+        '''
+        length = len(locations)
+        if length > self._capacity:
+            self._allocate_body(length + 1)
+        self._body[:length] = locations
+        self._body[self._capacity:self._capacity + length] = locations
+        self._tail_position = 0
+        self._length = length
+        self.health = health
+        self._is_alive = is_alive
+        self.facing_direction = facing_direction
+        self._number_of_initial_body_stacking = body_stacking
+        self.ate_food = ate_food
+        if self._zobrist is not None:
+            self.attach_zobrist(self._zobrist)
 
     @classmethod
-    def make_from_list(cls, locations, health, map_size):
+    def make_from_list(cls, locations, health, map_size, random_state=None):
         '''
         Class method to make a snake from a list of coordinates.
         Parameters:
@@ -60,16 +213,18 @@ class Snake:
         health: int
             The health of the snake
         map_size: (int, int)
+        random_state: np.random.Generator or np.random.RandomState, optional
+            Random generator of the colour of the snake
         '''
         tmp_locations = []
         for i, j in locations[::-1]: # head is element n
-            tmp_locations.append(np.array([i, j])) 
+            tmp_locations.append((i, j))
 
         if len(tmp_locations) == 0:
             head = None
         else:
             head = tmp_locations[-1]
-        cls = Snake(head, map_size)
+        cls = Snake(head, map_size, random_state=random_state)
         cls.locations = tmp_locations
         cls.health = health
         if len(tmp_locations) == 0:
@@ -109,16 +264,15 @@ class Snake:
         is_forbidden = False
         if not self._is_alive:
             return is_forbidden
-        
-        if self.facing_direction == None:
-            self.facing_direction == direction
 
-        if self.is_facing_opposite_of_direction(direction) and len(self.locations) > 0:
+        if isinstance(direction, np.ndarray): # e.g., np.array([Snake.UP])
+            direction = int(direction.reshape(-1)[0])
+
+        if self.is_facing_opposite_of_direction(direction) and self._length > 0:
             direction = self.facing_direction
             is_forbidden = True
 
-        head = self.get_head()
-        new_head = self._translate_coordinate_in_direction(head, direction)
+        new_head = self._translate_coordinate_in_direction(self.get_head(), direction)
 
         # If the snake is within the first 3 turns of being alive, do no remove the end
         if self._number_of_initial_body_stacking > 0:
@@ -127,10 +281,47 @@ class Snake:
         elif self.ate_food:
             self.ate_food = False
         else:
-            self.locations = self.locations[1:] # remove the end
-        self.locations.append(new_head)
+            self._pop_tail() # remove the end
+        self._push_head(*new_head)
         self.facing_direction = direction
         return is_forbidden
+
+    def attach_occupancy(self, occupancy, index, free_cells=None):
+        '''
+        Set the map that is kept up to date with the number of body parts of the snake
+        on each coordinate. The current locations are added to the map.
+
+        Parameters:
+        -----------
+        occupancy: np.array(map_size[0], map_size[1], number_of_snakes)
+            occupancy[:, :, index] is used for this snake
+
+        index: int
+
+        free_cells: FreeCellIndex, optional
+            Coordinates that are not occupied by any snake
+        '''
+        self._occupancy = occupancy
+        self._index = index
+        self._free_cells = free_cells
+        for location in self.locations.tolist():
+            self._update_occupancy(location, 1)
+
+    def _update_occupancy(self, location, count):
+        '''
+        Helper function to add count to the occupancy of a location inside the map
+        '''
+        if self._occupancy is None:
+            return
+        i, j = location
+        if 0 <= i < self.map_size[0] and 0 <= j < self.map_size[1]:
+            cell = self._occupancy[i, j]
+            cell[self._index] += count
+            if self._free_cells is not None:
+                if count > 0:
+                    self._free_cells.remove((i, j))
+                elif not cell.any():
+                    self._free_cells.add((i, j))
         
     def is_facing_opposite_of_direction(self, direction):
         '''
@@ -157,28 +348,25 @@ class Snake:
         Returns the location of head in the previous time step
         
         Move 1 space in the opposite direction of self.facing direction
+
+        Returns:
+        -------
+        previous_head: (int, int)
         '''
-        head = self.get_head()
-        previous_head = np.copy(head)
-        
-        if self.facing_direction == Snake.UP:
-            previous_head[0] += 1
-        elif self.facing_direction == Snake.DOWN:
-            previous_head[0] -= 1
-        elif self.facing_direction == Snake.RIGHT:
-            previous_head[1] -= 1
-        elif self.facing_direction == Snake.LEFT:
-            previous_head[1] += 1
-        return previous_head
+        i, j = self.get_head().tolist()
+        di, dj = self.DIRECTION_OFFSETS.get(self.facing_direction, (0, 0))
+        return (i - di, j - dj)
 
     def get_head(self):
-        return self.locations[-1]
+        if self._length == 0:
+            raise IndexError("The snake does not have a body")
+        return self._body[self._tail_position + self._length - 1]
 
     def get_tail(self):
-        return self.locations[0]
+        return self._body[self._tail_position]
 
     def get_body(self):
-        return self.locations[:-1]
+        return self._body[self._tail_position:self._tail_position + self._length - 1]
 
     def _translate_coordinate_in_direction(self, origin, direction):
         '''
@@ -197,17 +385,9 @@ class Snake:
         coordinate: (int, int)
             Translated coordinate
         '''
-        new_coordinate = np.copy(origin)
-        if direction == self.UP:
-            new_coordinate[0] = new_coordinate[0] - 1
-        elif direction == self.DOWN:
-            new_coordinate[0] = new_coordinate[0] + 1
-        elif direction == self.LEFT:
-            new_coordinate[1] = new_coordinate[1] - 1
-        elif direction == self.RIGHT:
-            new_coordinate[1] = new_coordinate[1] + 1
-        
-        return new_coordinate
+        i, j = origin
+        di, dj = self.DIRECTION_OFFSETS.get(direction, (0, 0))
+        return (int(i) + di, int(j) + dj)
 
     def can_snake_move_in_direction(self, direction):
         '''
@@ -270,6 +450,16 @@ class Snake:
             # To check if the snake is dead or not
             return map_image
 
+        if self._occupancy is not None and return_type != "Numbered":
+            is_occupied = self._occupancy[:, :, self._index] > 0
+            if return_type == "Colour":
+                map_image[is_occupied] = self.colour
+                map_image[self.get_head()[0], self.get_head()[1], :] *= 0.5
+            else:
+                map_image[is_occupied] = 1
+                map_image[self.get_head()[0], self.get_head()[1]] = 5
+            return map_image
+
         for i, location in enumerate(self.locations):
             if return_type == "Colour":
                 map_image[location[0], location[1], :] = self.colour
@@ -291,7 +481,11 @@ class Snake:
         Set snake to be dead
         '''
         self._is_alive = False
-        self.locations = []
+        for location in self.locations.tolist():
+            self._update_occupancy(location, -1)
+        self._tail_position = 0
+        self._length = 0
+        self._hash = 0
 
     def is_alive(self):
         '''
@@ -303,7 +497,7 @@ class Snake:
         '''
         Get the snake size
         '''
-        return len(self.locations)
+        return self._length
 
     def set_ate_food(self):
         '''
@@ -315,6 +509,11 @@ class Snake:
 class Snakes:
     '''
     The Snakes class managers n number of snakes
+
+    The locations of the snakes are kept in self.occupancy, which is updated by each snake
+    as it moves (O(1) per move) and is used by the map getters and collision checks.
+    The coordinates without any snake are kept in self.free_cells, which is used to
+    spawn snakes and food without scanning the map.
     
     Parameters
     ----------
@@ -323,29 +522,101 @@ class Snakes:
     
     snake_spawn_locations: [(int, int)] optional
         Parameter to force snakes to spawn in certain positions. Used for testing
+
+    random_state: np.random.Generator or np.random.RandomState, optional
+        Random generator of the spawn locations, np.random by default
+
+    colour_random_state: np.random.Generator or np.random.RandomState, optional
+        Random generator of the colours of the snakes, np.random by default
     '''
-    def __init__(self, map_size, number_of_snakes, snake_spawn_locations=[]):
+    def __init__(self, map_size, number_of_snakes, snake_spawn_locations=[],
+                 random_state=None, colour_random_state=None):
         self.map_size = map_size
         self.number_of_snakes = number_of_snakes
-        self.snakes = self._initialise_snakes(number_of_snakes, snake_spawn_locations)
-
-    def _initialise_snakes(self, number_of_snakes, snake_spawn_locations):
+        self.free_cells = FreeCellIndex(map_size)
+        self.snakes = self._initialise_snakes(number_of_snakes, snake_spawn_locations,
+                                              random_state, colour_random_state)
+        self._attach_snakes()
+
+    def _attach_snakes(self):
+        '''
+        Helper function to (re)build the occupancy grid and the free cells from self.snakes.
+        self.occupancy[i, j, k] is the number of body parts of snake k on coordinate i, j
+        '''
+        self.occupancy = np.zeros((self.map_size[0], self.map_size[1], len(self.snakes)),
+                                  dtype=np.uint8)
+        self.free_cells = FreeCellIndex(self.map_size)
+        self.zobrist_keys = ZobristKeys.get(self.map_size, len(self.snakes))
+        for k, snake in enumerate(self.snakes):
+            snake.attach_occupancy(self.occupancy, k, self.free_cells)
+            snake.attach_zobrist(self.zobrist_keys.segments[k])
+
+    def _initialise_snakes(self, number_of_snakes, snake_spawn_locations, random_state=None,
+                           colour_random_state=None):
         snakes = []
 
         if len(snake_spawn_locations) == 0:
-            starting_positions = get_random_coordinates(self.map_size, number_of_snakes)
+            starting_positions = self.free_cells.sample(number_of_snakes, random_state=random_state)
         else:
             error_message = "the number of coordinates in snake_spawn_locations must match the number of snakes"
             assert len(snake_spawn_locations) == self.number_of_snakes, error_message
             starting_positions = snake_spawn_locations
 
         for i in range(number_of_snakes):
-            snakes.append(Snake(starting_position=starting_positions[i], map_size=self.map_size))
+            snakes.append(Snake(starting_position=starting_positions[i], map_size=self.map_size,
+                                random_state=colour_random_state))
 
         return snakes
 
+    def get_hash(self):
+        '''
+        Get the Zobrist hash of the snakes: their bodies and the health, initial body stacking
+        counter and ate_food flag of the snakes that are alive. O(number_of_snakes)
+        '''
+        snakes_hash = 0
+        for k, snake in enumerate(self.snakes):
+            if snake.is_alive():
+                snakes_hash ^= snake.get_hash() ^ self.zobrist_keys.get_snake_key(
+                    k, snake.health, snake._number_of_initial_body_stacking, snake.ate_food)
+        return snakes_hash
+
+    def restore(self, state):
+        '''
+        Set the snakes to the snakes of a GameState and rebuild the occupancy and free cells
+        in place.
+
+        Parameters:
+        ----------
+        state: GameState
+        '''
+        coordinates = np.frombuffer(state.bodies, dtype=np.int16).reshape(-1, 2)
+        start = 0
+        for k, snake in enumerate(self.snakes):
+            end = start + state.lengths[k]
+            facing_direction = state.facing_directions[k]
+            snake.restore(coordinates[start:end], state.health[k], state.is_alive[k],
+                          None if facing_direction == NO_DIRECTION else facing_direction,
+                          state.body_stacking[k], state.ate_food[k])
+            start = end
+
+        # Count the body parts of every snake on each coordinate inside the map at once
+        snake_indexes = np.repeat(np.arange(len(self.snakes)), state.lengths)
+        is_inside = np.all((coordinates >= 0) & (coordinates < self.map_size), axis=1)
+        cells = (coordinates[is_inside, 0].astype(np.intp) * self.map_size[1] +
+                 coordinates[is_inside, 1]) * len(self.snakes) + snake_indexes[is_inside]
+        self.occupancy.reshape(-1)[:] = np.bincount(cells, minlength=self.occupancy.size)
+        self.reset_free_cells()
+
+    def reset_free_cells(self):
+        '''
+        Rebuild the free cells from the occupancy in their canonical order (see FreeCellIndex.reset),
+        as restore does. A game whose free cells are reset then spawns food like the games
+        restored from its snapshot.
+        '''
+        self.free_cells.reset(self.occupancy.any(axis=2))
+
     @classmethod
-    def make_from_dict(cls, map_size, snake_dicts):
+    def make_from_dict(cls, map_size, snake_dicts, random_state=None):
         '''
         Class method to create the Snakes class from a dictionary of snakes
 
@@ -355,9 +626,12 @@ class Snakes:
         snake_dicts: [{}]
             A list of snake_dict.
             dictionary are in the form of the battlesnake engine
+        random_state: np.random.Generator or np.random.RandomState, optional
+            Random generator of the colours of the snakes
         '''
         number_of_snakes = len(snake_dicts)
-        cls = Snakes(map_size, number_of_snakes)
+        cls = Snakes(map_size, number_of_snakes, random_state=random_state,
+                     colour_random_state=random_state)
         cls.snakes = []
         
         for snake_dict in snake_dicts:
@@ -367,10 +641,39 @@ class Snakes:
                 locations.append((loc["y"], loc["x"]))
             
             health = snake_dict["health"]
-            snake = Snake.make_from_list(locations, health, map_size)
+            snake = Snake.make_from_list(locations, health, map_size, random_state=random_state)
             cls.snakes.append(snake)
+        cls._attach_snakes()
         return cls
 
+    def _get_drawn_snakes(self, excluded_snakes=[]):
+        '''
+        Helper function to get the indexes of the snakes that are drawn on the maps:
+        snakes that are alive, with their head inside the map and not in excluded_snakes.
+        '''
+        return [i for i, snake in enumerate(self.snakes)
+                if snake.is_alive() and not snake.is_head_outside_map()
+                and snake not in excluded_snakes]
+
+    def get_snake_51_value(self, coord, excluded_snakes=[]):
+        '''
+        Function to get the value of get_snake_51_map at a single coordinate
+        without building the map.
+
+        Parameters:
+        ----------
+        coord: (int, int)
+        excluded_snakes: [Snake]
+        '''
+        i, j = coord
+        value = 0
+        for k in self._get_drawn_snakes(excluded_snakes):
+            if np.array_equal(self.snakes[k].get_head(), coord):
+                value += 5
+            elif self.occupancy[i, j, k] > 0:
+                value += 1
+        return value
+
     def get_snake_51_map(self, excluded_snakes=[]):
         '''
         Function to generate a 51 map of the locations of any snake
@@ -408,7 +711,7 @@ class Snakes:
         return np.sum(self.get_snake_depth_numbered_map(
             excluded_snakes=excluded_snakes), 2)
 
-    def get_snake_depth_numbered_map(self, excluded_snakes=[]):
+    def get_snake_depth_numbered_map(self, excluded_snakes=[], out=None):
         '''
         Function to generate a numbered map of the locations of any snake
         1 will be the head, 2, 3 etc will be the body
@@ -419,6 +722,9 @@ class Snakes:
             Snakes to not be included in the binary map. 
             Used to check if there are collisions between snakes
 
+        out: np.array(map_sizep[0], map_size[1], number_of_snakes), optional
+            Array to write the map_image in instead of allocating a new one
+
         Returns:
         --------
         map_image: np.array(map_sizep[0], map_size[1], number_of_snakes)
@@ -427,16 +733,46 @@ class Snakes:
              the body that the snake is present in that location and 0
             indicates that the snake is not present in that location
         '''
-        map_image = np.zeros((self.map_size[0], self.map_size[1],
-                              len(self.snakes)),
-                             dtype=np.uint8)
-        for i, snake in enumerate(self.snakes):
-            if snake not in excluded_snakes:
-                map_image[:, :, i] = snake.get_snake_map(return_type="Numbered")
+        map_image = self._get_empty_depth_map(out)
+        for k in self._get_drawn_snakes(excluded_snakes):
+            self.draw_snake(k, map_image[:, :, k], return_type="Numbered")
         return map_image
 
+    def draw_snake(self, index, out, return_type="51"):
+        '''
+        Function to draw a single snake on a zeroed map.
+        The snake is drawn even if it is dead or its head is outside of the map (see _get_drawn_snakes)
+
+        Parameters:
+        ----------
+        index: int
+        out: np.array(map_size[0], map_size[1])
+        return_type: str, options ["51", "Numbered"]
+            "51": 5 indicates the head and 1 indicates the body
+            "Numbered": the coordinates are numbered 1, 2, 3 etc from the end of the snake
+        '''
+        snake = self.snakes[index]
+        if return_type == "Numbered":
+            locations = snake.locations
+            out[locations[:, 0], locations[:, 1]] = np.arange(1, len(locations) + 1)
+        else:
+            np.minimum(self.occupancy[:, :, index], 1, out=out)
+            head = snake.get_head()
+            out[head[0], head[1]] = 5
 
-    def get_snake_depth_51_map(self, excluded_snakes=[]):
+
+    def _get_empty_depth_map(self, out=None):
+        '''
+        Helper function to get a zeroed np.array(map_size[0], map_size[1], number_of_snakes),
+        reusing out if provided
+        '''
+        if out is None:
+            return np.zeros((self.map_size[0], self.map_size[1], len(self.snakes)),
+                            dtype=np.uint8)
+        out[:] = 0
+        return out
+
+    def get_snake_depth_51_map(self, excluded_snakes=[], out=None):
         '''
         Function to generate a 51 map of the locations of the snakes
 
@@ -446,6 +782,9 @@ class Snakes:
             Snakes to not be included in the binary map. 
             Used to check if there are collisions between snakes
 
+        out: np.array(map_sizep[0], map_size[1], number_of_snakes), optional
+            Array to write the map_image in instead of allocating a new one
+
         Returns:
         --------
         map_image: np.array(map_sizep[0], map_size[1], number_of_snakes)
@@ -454,12 +793,9 @@ class Snakes:
              that the snake is present in that location and 0
             indicates that the snake is not present in that location
         '''
-        map_image = np.zeros((self.map_size[0], self.map_size[1],
-                              len(self.snakes)),
-                             dtype=np.uint8)
-        for i, snake in enumerate(self.snakes):
-            if snake not in excluded_snakes:
-                map_image[:, :, i] = snake.get_snake_map(return_type="Binary")
+        map_image = self._get_empty_depth_map(out)
+        for k in self._get_drawn_snakes(excluded_snakes):
+            self.draw_snake(k, map_image[:, :, k], return_type="51")
 
         return map_image
 
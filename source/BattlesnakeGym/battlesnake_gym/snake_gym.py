@@ -18,11 +18,18 @@ from gym.utils import seeding
 import json
 import string
 
-from .snake import Snakes
+from .snake import Snake, Snakes
 from .food import Food
 from .game_state_parser import Game_state_parser
-from .rewards import SimpleRewards
-from .utils import get_random_coordinates, MultiAgentActionSpace, get_distance
+from .rewards import SimpleRewards, compile_rewards, get_turn_events, get_turn_rewards
+from .state import GameState, NO_DIRECTION, pack_food_map
+from .outcome import Outcome, OUTCOME_STRINGS, OUTCOME_REWARDS, SnakeArrayView
+from .profiling import PhaseProfiler
+from .lazy_observation import LazyObservation
+from . import territory
+from . import json_export
+from .board_renderer import BoardRenderer
+from .utils import MultiAgentActionSpace
 
 class BattlesnakeGym(gym.Env):
     metadata = {
@@ -48,6 +55,13 @@ class BattlesnakeGym(gym.Env):
         4- "bordered-51s" similar to flat-51s
         5- "max-bordered-num" option will provide borders of -1 until a maximum map size of 21, 21
         6- "max-bordered-51s" similar to max-bordered-num
+        Feature channels can be appended to any option with "+" (e.g., "bordered-51s+reachable+voronoi"),
+        they are added after the snakes in the order of FEATURE_CHANNELS:
+        - "reachable": one channel per snake, 1 on the coordinates that the snake can reach
+        - "voronoi": one channel per snake, 1 on the coordinates that the snake reaches before the others
+        - "food_distance": one channel with the number of turns to the closest food + 1
+          (1 on the food, 0 if no food can be reached)
+        The features are computed with territory.multi_source_bfs, searching up to FEATURE_MAX_DEPTH turns
     
     map_size: (int, int), optional, default=(15, 15)
     
@@ -67,12 +81,40 @@ class BattlesnakeGym(gym.Env):
         Dictionary to indicate the initial game state
         Dict is in the same form as in the battlesnake engine
         https://docs.battlesnake.com/snake-api
+
+    rewards: Rewards, optional, default=SimpleRewards()
+
+    validate: Bool, optional, default=False
+        Check after every step that no snakes overlap on the map. Snapshots of the game are
+        taken during the step so that the game states can be printed if the check fails.
+        Used for debugging, it is off by default so that step does not serialise the game.
+
+    seed: int, optional, default=None
+        Seed of the random generators of the gym, see seed
     '''
     MAX_BORDER = (21, 21) # Largest map size (19, 19) + 2 for -1 borders
+    FEATURE_CHANNELS = ("reachable", "voronoi", "food_distance")
+    FEATURE_MAX_DEPTH = 40
+    FOOD_SPAWN_FLIPS = 1024 # Number of food spawn chances drawn at once
+    ACTION_MASK_KINDS = ("forbidden", "wall", "body", "head_to_head_risk")
+    ACTION_OFFSETS = np.array([Snake.DIRECTION_OFFSETS[action] for action in
+                               [Snake.UP, Snake.DOWN, Snake.LEFT, Snake.RIGHT]])
+    OPPOSITE_ACTIONS = {Snake.UP: Snake.DOWN, Snake.DOWN: Snake.UP,
+                        Snake.LEFT: Snake.RIGHT, Snake.RIGHT: Snake.LEFT}
+    # Phases timed by enable_profiling and the methods that run them
+    PROFILED_PHASES = {"step": "step",
+                       "reset": "reset",
+                       "move": "_move_snakes",
+                       "collisions": "_resolve_collisions",
+                       "food": "_end_turn",
+                       "rewards": "_get_rewards",
+                       "validation": "_check_snake_maps",
+                       "observation": "_get_observation"}
     def __init__(self, observation_type="flat-51s", map_size=(15, 15),
                  number_of_snakes=4, 
                  snake_spawn_locations=[], food_spawn_locations=[],
-                 verbose=False, initial_game_state=None, rewards=SimpleRewards()):
+                 verbose=False, initial_game_state=None, rewards=SimpleRewards(),
+                 validate=False, seed=None):
         
         self.map_size = map_size
         self.number_of_snakes = number_of_snakes
@@ -87,12 +129,60 @@ class BattlesnakeGym(gym.Env):
             [spaces.Discrete(4) for _ in range(number_of_snakes)])
 
         self.observation_type = observation_type
+        self.feature_channels = self._get_feature_channels()
         self.observation_space = self.get_observation_space()
         
         self.viewer = None
         self.state = None
         self.verbose = verbose
         self.rewards = rewards
+        self.validate = validate
+        self.seed(seed)
+
+        self._profiler = None
+
+        # Border templates keyed by (shape, dtype, map_size) and the last buffer they were written into
+        self._border_templates = {}
+        self._bordered_buffer = None
+        # Incremented at every step and reset so that lazy observations of older turns are not built
+        self._observation_turn_id = 0
+        # Feature planes of the lazy observation of a turn, as (turn id, features)
+        self._lazy_features = None
+        # BoardRenderer of the last map size that was rendered
+        self._renderer = None
+
+    def _get_feature_channels(self):
+        '''
+        Helper function to get the feature channels requested in self.observation_type
+        '''
+        requested = self.observation_type.split("+")[1:]
+        for feature in requested:
+            if feature not in self.FEATURE_CHANNELS:
+                raise ValueError("Unknown feature channel {}, options are {}".format(
+                    feature, self.FEATURE_CHANNELS))
+        return [feature for feature in self.FEATURE_CHANNELS if feature in requested]
+
+    def _get_observation_depth(self):
+        '''
+        Helper function to get the number of channels of the observation
+        '''
+        depth = self.number_of_snakes + 1
+        for feature in self.feature_channels:
+            depth += 1 if feature == "food_distance" else self.number_of_snakes
+        return depth
+
+    def _get_observation_high(self, shape):
+        '''
+        Helper function to get the upper bound of each channel of the observation.
+        The food distances go up to FEATURE_MAX_DEPTH + 1, the other channels up to 5.
+        '''
+        channel_highs = [5] * (self.number_of_snakes + 1)
+        for feature in self.feature_channels:
+            if feature == "food_distance":
+                channel_highs.append(self.FEATURE_MAX_DEPTH + 1)
+            else:
+                channel_highs.extend([5] * self.number_of_snakes)
+        return np.broadcast_to(np.array(channel_highs), shape).copy()
 
     def get_observation_space(self):
         '''
@@ -100,21 +190,18 @@ class BattlesnakeGym(gym.Env):
         and self.observation_type
         '''
         if "flat" in self.observation_type:
-            observation_space = spaces.Box(low=-1, high=5,
-                                           shape=(self.map_size[0],
-                                                  self.map_size[1],
-                                                  self.number_of_snakes+1),
-                                           dtype=np.uint8)
+            shape = (self.map_size[0], self.map_size[1], self._get_observation_depth())
+            observation_space = spaces.Box(low=-1, high=self._get_observation_high(shape),
+                                           shape=shape, dtype=np.uint8)
         elif "bordered" in self.observation_type:
             if "max-bordered" in self.observation_type:
                 border_size = self.MAX_BORDER[0] - self.map_size[0]
             else:
                 border_size = 2
-            observation_space = spaces.Box(low=-1, high=5,
-                                           shape=(self.map_size[0]+border_size,
-                                                  self.map_size[1]+border_size,
-                                                  self.number_of_snakes+1),
-                                           dtype=np.uint8)
+            shape = (self.map_size[0]+border_size, self.map_size[1]+border_size,
+                     self._get_observation_depth())
+            observation_space = spaces.Box(low=-1, high=self._get_observation_high(shape),
+                                           shape=shape, dtype=np.uint8)
         return observation_space
 
     def initialise_game_state(self, game_state_dict):
@@ -128,16 +215,103 @@ class BattlesnakeGym(gym.Env):
         assert np.array_equal(gsp.map_size, self.map_size), "Map size of the game state is incorrect"
         assert gsp.number_of_snakes == self.number_of_snakes, "Number of names of the game state is incorrect"
 
-        return gsp.parse()
+        return gsp.parse(random_state=self._colour_rng)
         
-    def seed(self, seed):
+    def enable_profiling(self):
+        '''
+        Start timing each phase of step and reset (see PROFILED_PHASES).
+        The methods of the phases are replaced by timed wrappers on this gym only,
+        so a gym without profiling has no overhead.
+        '''
+        if self._profiler is not None:
+            return
+        self._profiler = PhaseProfiler()
+        for phase, method_name in self.PROFILED_PHASES.items():
+            self._profiler.wrap_method(self, method_name, phase)
+
+    def disable_profiling(self):
+        '''
+        Stop timing the phases of step and reset and discard the timers
+        '''
+        if self._profiler is None:
+            return
+        for method_name in self.PROFILED_PHASES.values():
+            delattr(self, method_name)
+        self._profiler = None
+
+    def profile_report(self, reset=False):
+        '''
+        Get the cumulative timers and call counters of each phase since profiling was
+        enabled (or since the last reset).
+
+        Parameters:
+        ----------
+        reset: bool, default False
+            Set the timers and counters to 0 after the report
+
+        Returns:
+        --------
+        report: {str: {"calls": int, "total_time": float, "mean_time": float}}
+            Times are in seconds. Empty if profiling is not enabled
+        '''
+        if self._profiler is None:
+            return {}
+        report = self._profiler.report()
+        if reset:
+            self._profiler.reset()
+        return report
+
+    def seed(self, seed=None):
         '''
         Inherited function of the openAI gym to set the randomisation seed.
+        The food spawn chances, the food locations, the spawn locations and the colours of the
+        snakes are drawn from independent np.random.Generator streams derived from the seed,
+        so the games of a seeded gym do not depend on the global random state or on other gyms.
         '''
         self.np_random, seed = seeding.np_random(seed)
+        streams = np.random.SeedSequence(seed).spawn(4)
+        self._food_spawn_rng, self._food_rng, self._spawn_rng, self._colour_rng = \
+            [np.random.default_rng(stream) for stream in streams]
+        self._food_spawn_flips = []
+        self._food_spawn_index = 0
         return [seed]
 
-    def reset(self, map_size=None):
+    def get_random_state(self):
+        '''
+        Get the state of the random generators of the gym, e.g., to continue a restored
+        snapshot with the same food as the original game (see set_random_state)
+
+        Returns:
+        --------
+        random_state: tuple
+        '''
+        generators = (self._food_spawn_rng, self._food_rng, self._spawn_rng, self._colour_rng)
+        return (tuple(rng.bit_generator.state for rng in generators),
+                tuple(self._food_spawn_flips), self._food_spawn_index)
+
+    def set_random_state(self, random_state):
+        '''
+        Reinstate the random generators of the gym from get_random_state
+        '''
+        generator_states, food_spawn_flips, self._food_spawn_index = random_state
+        generators = (self._food_spawn_rng, self._food_rng, self._spawn_rng, self._colour_rng)
+        for rng, state in zip(generators, generator_states):
+            rng.bit_generator.state = state
+        self._food_spawn_flips = list(food_spawn_flips)
+
+    def _should_spawn_food(self):
+        '''
+        Helper function to get whether the food spawn chance of the turn succeeded.
+        The chances are drawn FOOD_SPAWN_FLIPS turns at a time.
+        '''
+        if self._food_spawn_index == len(self._food_spawn_flips):
+            flips = self._food_spawn_rng.random(self.FOOD_SPAWN_FLIPS) < Food.FOOD_SPAWN_CHANCE
+            self._food_spawn_flips = flips.tolist()
+            self._food_spawn_index = 0
+        self._food_spawn_index += 1
+        return self._food_spawn_flips[self._food_spawn_index - 1]
+
+    def reset(self, map_size=None, out=None, lazy=False):
         '''
         Inherited function of the openAI gym to reset the environment.
 
@@ -145,36 +319,235 @@ class BattlesnakeGym(gym.Env):
         -----------
         map_size: (int, int), default None
             Optional paramter to reset the map size
+
+        out: np.array, default None
+            Optional buffer of shape observation_space.shape to write the observation in.
+            See step
+
+        lazy: bool, default False
+            Return a LazyObservation, see step
         '''
+        self._observation_turn_id += 1
         if map_size is not None:
-            self.observation_space = self.get_observation_space()
             self.map_size = map_size
+            self.observation_space = self.get_observation_space()
+            self._bordered_buffer = None
         
         if self.initial_game_state is not None:
             self.snakes, self.food, self.turn_count = self.initialise_game_state(self.initial_game_state)
         else:
             self.turn_count = 0
 
-            self.snakes = Snakes(self.map_size, self.number_of_snakes, self.snake_spawn_locations)
+            self.snakes = Snakes(self.map_size, self.number_of_snakes, self.snake_spawn_locations,
+                                 random_state=self._spawn_rng, colour_random_state=self._colour_rng)
             self.food = Food(self.map_size, self.food_spawn_locations)
-            self.food.spawn_food(self.snakes.get_snake_51_map())
+            self.food.spawn_food(self.snakes.free_cells, random_state=self._food_rng)
+        self.food.attach_zobrist(self.snakes.zobrist_keys.food)
 
         dones = {i:False for i in range(self.number_of_snakes)}
         
-        snakes_health = {}
-        snake_info = {}
-        self.snake_max_len = {}
+        self.snake_max_len = np.zeros(self.number_of_snakes, dtype=np.int32)
+        outcomes = np.full(self.number_of_snakes, Outcome.DID_NOT_COLLIDE, dtype=np.int8)
+        return self._make_observation(out, lazy), {}, dones, self._get_info(outcomes)
+
+    def _get_info(self, outcomes):
+        '''
+        Helper function to build the info returned by reset and step
+
+        Returns:
+        --------
+        info: {}
+            current_turn: int
+            outcomes: np.array(number_of_snakes) of Outcome codes
+            health: np.array(number_of_snakes)
+            max_len: np.array(number_of_snakes)
+                Number of turns that each snake survived
+            snake_info, snake_health:
+                {snake index: value} views of outcomes (as strings) and health
+            snake_max_len:
+                Same as max_len
+        '''
+        health = np.array([snake.health for snake in self.snakes.get_snakes()], dtype=np.int32)
+        max_len = self.snake_max_len.copy()
+        return {'current_turn': self.turn_count,
+                'outcomes': outcomes,
+                'health': health,
+                'max_len': max_len,
+                'snake_health': SnakeArrayView(health),
+                'snake_info': SnakeArrayView(outcomes, OUTCOME_STRINGS),
+                'snake_max_len': max_len}
+
+    def snapshot(self):
+        '''
+        Get a compact and immutable copy of the game that can be reinstated with restore.
+        Useful to simulate candidate moves during lookahead and search.
+
+        Returns:
+        --------
+        state: GameState
+        '''
+        snakes = self.snakes.get_snakes()
+        return GameState(
+            map_size=tuple(self.map_size),
+            turn_count=int(self.turn_count),
+            bodies=b"".join([snake.locations.tobytes() for snake in snakes]),
+            lengths=tuple([snake.get_size() for snake in snakes]),
+            health=tuple([int(snake.health) for snake in snakes]),
+            is_alive=tuple([snake.is_alive() for snake in snakes]),
+            facing_directions=tuple([NO_DIRECTION if snake.facing_direction is None
+                                     else int(snake.facing_direction) for snake in snakes]),
+            body_stacking=tuple([snake._number_of_initial_body_stacking for snake in snakes]),
+            ate_food=tuple([snake.ate_food for snake in snakes]),
+            food=pack_food_map(self.food.get_food_map()),
+            snake_max_len=tuple(self.snake_max_len.tolist()),
+            food_spawn_locations=tuple([tuple(location) for location in self.food.food_spawn_locations]))
+
+    def restore(self, state):
+        '''
+        Reinstate a game that was saved with snapshot. The arrays of the current game
+        are reused so the gym must have the same map size and number of snakes.
+
+        Parameters:
+        ----------
+        state: GameState
+        '''
+        if tuple(state.map_size) != tuple(self.map_size) or len(state.lengths) != self.number_of_snakes:
+            raise ValueError("The snapshot of a {} map with {} snakes can not be restored in a {} map with {} snakes".format(
+                state.map_size, len(state.lengths), self.map_size, self.number_of_snakes))
+        if getattr(self, "snakes", None) is None:
+            self.snakes = Snakes(self.map_size, self.number_of_snakes, random_state=self._spawn_rng,
+                                 colour_random_state=self._colour_rng)
+            self.food = Food(self.map_size)
+
+        self._observation_turn_id += 1
+        self.turn_count = state.turn_count
+        self.snakes.restore(state)
+        self.food.locations_map[:] = state.get_food_map()
+        self.food.attach_zobrist(self.snakes.zobrist_keys.food)
+        self.food.food_spawn_locations = list(state.food_spawn_locations)
+        self.snake_max_len = np.array(state.snake_max_len, dtype=np.int32)
+
+    @property
+    def state_hash(self):
+        '''
+        64-bit Zobrist hash of the position: the bodies of the snakes, the food, the health,
+        initial body stacking counter and ate_food flag of the snakes that are alive and the turn
+        (see ZobristKeys). The hash is updated incrementally as the game is played, so reading it
+        is O(number_of_snakes). Identical positions of gyms with the same map size and number of
+        snakes have the same hash, which can be used as the key of transposition tables or caches.
+        '''
+        return (self.snakes.get_hash() ^ self.food.get_hash() ^
+                self.snakes.zobrist_keys.get_turn_key(self.turn_count))
+
+    def action_masks(self, kinds=ACTION_MASK_KINDS):
+        '''
+        Get the actions that each snake can take in the current state, computed from the
+        occupancy grid of the snakes.
+
+        Parameters:
+        ----------
+        kinds: (str), default ACTION_MASK_KINDS
+            The kinds of actions to ban:
+            - "forbidden": moving back into the neck of the snake (see Snake.move)
+            - "wall": moving outside of the map
+            - "body": moving into a snake body that will still be there after the turn
+               (the ends of the snakes that are not growing move away)
+            - "head_to_head_risk": moving next to the head of another snake that is at least
+               as long, where both snakes could move into the same coordinate
+
+        Returns:
+        --------
+        masks: np.array(number_of_snakes, 4) of np.uint8
+            masks[i, action] is 1 if snake i can take the action and 0 otherwise.
+            All the actions of dead snakes are allowed.
+        '''
+        for kind in kinds:
+            if kind not in self.ACTION_MASK_KINDS:
+                raise ValueError("Unknown action mask kind {}, options are {}".format(
+                    kind, self.ACTION_MASK_KINDS))
+
+        snakes = self.snakes.get_snakes()
+        masks = np.ones((len(snakes), 4), dtype=bool)
+        alive = [k for k, snake in enumerate(snakes) if snake.is_alive()]
+        if len(alive) == 0:
+            return masks.astype(np.uint8)
+
+        heads = np.array([snakes[k].get_head() for k in alive], dtype=np.intp)
+        targets = heads[:, None, :] + self.ACTION_OFFSETS[None, :, :]
+        is_inside = ((targets >= 0) & (targets < self.map_size)).all(axis=2)
+        target_i = np.clip(targets[:, :, 0], 0, self.map_size[0] - 1)
+        target_j = np.clip(targets[:, :, 1], 0, self.map_size[1] - 1)
+        alive_masks = np.ones((len(alive), 4), dtype=bool)
+
+        if "forbidden" in kinds:
+            for a, k in enumerate(alive):
+                if snakes[k].facing_direction is not None:
+                    alive_masks[a, self.OPPOSITE_ACTIONS[snakes[k].facing_direction]] = False
+
+        if "wall" in kinds:
+            alive_masks &= is_inside
+
+        if "body" in kinds:
+            occupied = self.snakes.occupancy.sum(axis=2, dtype=np.int16)
+            for k in alive:
+                snake = snakes[k]
+                if snake._number_of_initial_body_stacking == 0 and not snake.ate_food:
+                    tail = snake.get_tail()
+                    occupied[tail[0], tail[1]] -= 1
+            alive_masks &= ~(is_inside & (occupied[target_i, target_j] > 0))
+
+        if "head_to_head_risk" in kinds:
+            lengths = np.array([snakes[k].get_size() for k in alive])
+            # is_threat[a, b]: snake b is another snake at least as long as snake a
+            is_threat = (lengths[None, :] >= lengths[:, None]) & ~np.eye(len(alive), dtype=bool)
+            # same_target[a, action, b, other_action]: both snakes could move to the same coordinate
+            cells = np.where(is_inside, target_i * self.map_size[1] + target_j, -1)
+            same_target = cells[:, :, None, None] == cells[None, None, :, :]
+            is_risky = (same_target.any(axis=3) & is_threat[:, None, :]).any(axis=2)
+            alive_masks &= ~(is_inside & is_risky)
+
+        masks[alive] = alive_masks
+        return masks.astype(np.uint8)
+
+    def _index_snake_heads(self):
+        '''
+        Helper function to index the heads of the snakes that are alive. Built once per turn
+        (after moving) and used by _did_snake_collide.
+
+        Returns:
+        --------
+        head_indexes: {}
+            "heads": {(int, int): [int]}
+                The indexes of the snakes with their head on each coordinate
+            "previous_heads": {(int, int): [int]}
+                The indexes of the snakes with their previous head on each coordinate
+            "heads_in_body": {int: [int]}
+                For each snake, the indexes of the other snakes with their head in its body
+        '''
+        heads = {}
+        previous_heads = {}
         for i, snake in enumerate(self.snakes.get_snakes()):
-            snakes_health[i] = snake.health
-            snake_info[i] = "Did not collide" 
-            self.snake_max_len[i] = 0
-        info = {'current_turn': self.turn_count,
-                'snake_health': snakes_health,
-                'snake_info': snake_info, 
-                'snake_max_len': self.snake_max_len}
-        return self._get_observation(), {}, dones, info
+            if not snake.is_alive():
+                continue
+            heads.setdefault(tuple(int(c) for c in snake.get_head()), []).append(i)
+            previous_heads.setdefault(tuple(int(c) for c in snake.get_previous_snake_head()),
+                                      []).append(i)
+
+        heads_in_body = {}
+        for coord, snake_indexes in heads.items():
+            if not 0 <= coord[0] < self.map_size[0] or not 0 <= coord[1] < self.map_size[1]:
+                continue
+            for owner in np.flatnonzero(self.snakes.occupancy[coord]):
+                # The head of the owner does not count as its body
+                is_owner_head = owner in snake_indexes
+                if self.snakes.occupancy[coord][owner] - is_owner_head > 0:
+                    heads_in_body.setdefault(owner, []).extend(
+                        [j for j in snake_indexes if j != owner])
 
-    def _did_snake_collide(self, snake, snakes_to_be_killed):
+        return {"heads": heads, "previous_heads": previous_heads,
+                "heads_in_body": heads_in_body}
+
+    def _did_snake_collide(self, snake, snakes_to_be_killed, head_indexes=None):
         '''
         Helper function to check if a snake has collided into something else. Checks the following:
         1) If the snake's head hit a wall (i.e., if the head is outside of the map)
@@ -188,28 +561,34 @@ class BattlesnakeGym(gym.Env):
         
         snakes_to_be_killed: a list of snakes that will be killed in the end of the turn.
 
+        head_indexes: {}, optional
+            Output of self._index_snake_heads(). Built if not provided.
+
         Returns:
         ----------
         should_kill_snake: Bool
             Boolean to indicate if the snake is dead or not
 
-        collision_outcome: options = ["Snake hit wall", 
-                                      "Snake was eaten - same tile", 
-                                      "Snake was eaten - adjacent tile", 
-                                      "Snake hit body - hit itself", 
-                                      "Snake hit body - hit other", 
-                                      "Did not collide",
-                                      "Ate another snake",
-                                      "Other snake hit body"]
+        collision_outcome: Outcome, options = [Outcome.HIT_WALL,
+                                               Outcome.EATEN_SAME_TILE,
+                                               Outcome.EATEN_ADJACENT_TILE,
+                                               Outcome.HIT_ITSELF,
+                                               Outcome.HIT_OTHER,
+                                               Outcome.DID_NOT_COLLIDE,
+                                               Outcome.ATE_ANOTHER_SNAKE,
+                                               Outcome.OTHER_SNAKE_HIT_BODY]
         '''       
-        snake_head_location = snake.get_head()
-        ate_another_snake = False
+        if head_indexes is None:
+            head_indexes = self._index_snake_heads()
+        snakes = self.snakes.get_snakes()
+        snake_index = snakes.index(snake)
+        snake_head_location = tuple(int(c) for c in snake.get_head())
         snakes_eaten_this_turn = []
         
         # 1) Check if the snake ran into a wall
-        outcome = "Snake hit wall"
+        outcome = Outcome.HIT_WALL
         if snake.is_head_outside_map():
-            if self.verbose: print(outcome)
+            if self.verbose: print(outcome.description)
             should_kill_snake = True
             return should_kill_snake, outcome
 
@@ -219,19 +598,16 @@ class BattlesnakeGym(gym.Env):
         #  | |< S1   
         #   ^ 
         #   S2
-        for other_snake in self.snakes.get_snakes():
-            if other_snake == snake:
+        for other_index in head_indexes["heads"].get(snake_head_location, []):
+            if other_index == snake_index:
                 continue
-            if other_snake.is_alive():
-                other_snake_head = other_snake.get_head()
-                if np.array_equal(snake_head_location, other_snake_head):
-                    if other_snake.get_size() >= snake.get_size():
-                        outcome = "Snake was eaten - same tile"
-                        if self.verbose: print(outcome)
-                        return True, outcome
-                    else:
-                        ate_another_snake = True
-                        snakes_eaten_this_turn.append(other_snake)
+            other_snake = snakes[other_index]
+            if other_snake.get_size() >= snake.get_size():
+                outcome = Outcome.EATEN_SAME_TILE
+                if self.verbose: print(outcome.description)
+                return True, outcome
+            else:
+                snakes_eaten_this_turn.append(other_snake)
                 
         # 2.2) Check if snake's head collided with another snakes head when they were adjacent to one another
         # (i.e., that the heads swapped positions)
@@ -239,92 +615,58 @@ class BattlesnakeGym(gym.Env):
         #    S1     S1
         #   |  |> <|  |
         #
-        for other_snake in self.snakes.get_snakes():
-            if other_snake == snake:
+        # The other snake's previous head is the snake's head and the other snake's head
+        # is the snake's previous head
+        snake_previous_head = tuple(int(c) for c in snake.get_previous_snake_head())
+        for other_index in head_indexes["previous_heads"].get(snake_head_location, []):
+            if other_index == snake_index:
                 continue
-            # Check if snake swapped places with the other_snake.
-            # 1) check if heads are adjacent
-            # 2) check if heads swapped places
-            if other_snake.is_alive():
-                other_snake_head = other_snake.get_head()
-                if get_distance(snake_head_location, other_snake_head) == 1:
-                    if np.array_equal(snake_head_location, other_snake.get_previous_snake_head())\
-                       and np.array_equal(other_snake_head, snake.get_previous_snake_head()):
-                        if other_snake.get_size() >= snake.get_size():
-                            outcome = "Snake was eaten - adjacent tile"
-                            if self.verbose: print(outcome)
-                            return True, outcome
-                        else:
-                            ate_another_snake = True
-                            snakes_eaten_this_turn.append(other_snake)
+            if other_index not in head_indexes["heads"].get(snake_previous_head, []):
+                continue
+            other_snake = snakes[other_index]
+            if other_snake.get_size() >= snake.get_size():
+                outcome = Outcome.EATEN_ADJACENT_TILE
+                if self.verbose: print(outcome.description)
+                return True, outcome
+            else:
+                snakes_eaten_this_turn.append(other_snake)
 
         # 3.1) Check if snake ran into it's own body
-        outcome = "Snake hit body - hit itself"
-        for self_body_locations in snake.get_body():
-            if np.array_equal(snake_head_location, self_body_locations):
-                if self.verbose: print("Snake hit itself")
-                return True, outcome
+        outcome = Outcome.HIT_ITSELF
+        if self.snakes.occupancy[snake_head_location][snake_index] > 1:
+            if self.verbose: print("Snake hit itself")
+            return True, outcome
             
         # 3.2) Check if snake ran into another snake's body
-        outcome = "Snake hit body - hit other"
-        snake_binary_map = self.snakes.get_snake_51_map(excluded_snakes=[snake]+snakes_eaten_this_turn)
-        if snake_binary_map[snake_head_location[0], snake_head_location[1]] == 1:
+        outcome = Outcome.HIT_OTHER
+        snake_51_value = self.snakes.get_snake_51_value(snake_head_location,
+                                                        excluded_snakes=[snake]+snakes_eaten_this_turn)
+        if snake_51_value == 1:
             if self.verbose: print("Snake hit another snake")
             return True, outcome
 
         # 4) Check if another snake ran into this snake
-        for other_snake in self.snakes.get_snakes():
-            if other_snake == snake:
-                continue
-            if other_snake.is_alive():
-                if other_snake not in snakes_to_be_killed:
-                    other_snake_head = other_snake.get_head()
-                    for location in snake.get_body():
-                        if np.array_equal(location, other_snake_head):
-                            return False, "Other snake hit body"
+        for other_index in head_indexes["heads_in_body"].get(snake_index, []):
+            if snakes[other_index] not in snakes_to_be_killed:
+                return False, Outcome.OTHER_SNAKE_HIT_BODY
         
-        if ate_another_snake:                            
-            return False, "Ate another snake"
+        if len(snakes_eaten_this_turn) > 0:
+            return False, Outcome.ATE_ANOTHER_SNAKE
 
-        return False, "Did not collide"
+        return False, Outcome.DID_NOT_COLLIDE
 
-    def step(self, actions, episodes=None):
+    def _move_snakes(self, actions):
         '''
-        Inherited function of the openAI gym. The steps taken mimic the steps provided in 
-        https://docs.battlesnake.com/rules -> Programming Your Snake -> 3) Turn resolution.
-        
-        Parameters:
-        ---------
-        action: np.array(number_of_snakes)
-            Array of integers containing an action for each number of snake. 
-            The integers range from 0 to 3 corresponding to Snake.UP, Snake.DOWN, Snake.LEFT, Snake.RIGHT 
-            respectively
+        Helper function to reduce the health of the snakes and move them (first part of step)
 
         Returns:
-        -------
-
-        observation: np.array
-            Output of the current state of the gym
-
-        reward: {}
-            The rewards obtained by each snake. 
-            Dictionary is of length number_of_snakes
-
-        done: Bool
-            Indication of whether the gym is complete or not.
-            Gym is complete when there is only 1 snake remaining
+        --------
+        outcomes: np.array(number_of_snakes) of np.int8
+            Outcome.STARVED or Outcome.FORBIDDEN_MOVE for the snakes that died while moving
+            and Outcome.DEAD for the other snakes
         '''
-
-        # setup reward dict
-        reward = {}
-        snake_info = {}
-
-        # DEBUGING
-        json_before_moving = self.get_json()
-        
-        # Reduce health and move
+        outcomes = np.full(self.number_of_snakes, Outcome.DEAD, dtype=np.int8)
         for i, snake in enumerate(self.snakes.get_snakes()):
-            reward[i] = 0
             if not snake.is_alive():
                 continue
 
@@ -332,26 +674,29 @@ class BattlesnakeGym(gym.Env):
             snake.health -= 1
             if snake.health == 0:
                 snake.kill_snake()
-                reward[i] += self.rewards.get_reward("starved", i, episodes)
-                snake_info[i] = "Starved"
+                outcomes[i] = Outcome.STARVED
                 continue
 
             action = actions[i] 
             is_forbidden = snake.move(action)
             if is_forbidden:
                 snake.kill_snake()
-                reward[i] += self.rewards.get_reward("forbidden_move", i, episodes)
-                snake_info[i] = "Forbidden move"
-            
-        # check for food and collision
-        number_of_food_eaten = 0
-        number_of_snakes_alive = 0
+                outcomes[i] = Outcome.FORBIDDEN_MOVE
+        return outcomes
 
-        
-        # DEBUGING
-        json_after_moving = self.get_json()
-        
+    def _resolve_collisions(self, outcomes):
+        '''
+        Helper function to resolve the collisions and let the snakes eat food (second part of step).
+        The outcome of each snake that moved is written in outcomes (see _move_snakes).
+
+        Returns:
+        --------
+        ate_food: [int]
+            Indexes of the snakes that ate food
+        '''
+        ate_food = []
         snakes_to_be_killed = []
+        head_indexes = self._index_snake_heads()
         for i, snake in enumerate(self.snakes.get_snakes()):
             if not snake.is_alive():
                 continue
@@ -359,194 +704,406 @@ class BattlesnakeGym(gym.Env):
             snake_head_location = snake.get_head()
 
             # Check for collisions with the snake
-            should_kill_snake, outcome = self._did_snake_collide(snake, snakes_to_be_killed)
+            should_kill_snake, outcome = self._did_snake_collide(snake, snakes_to_be_killed,
+                                                                 head_indexes)
             if should_kill_snake:
                 snakes_to_be_killed.append(snake)
-            snake_info[i] = outcome
+            outcomes[i] = outcome
 
             # Check if snakes ate any food
             if not should_kill_snake and self.food.does_coord_have_food(snake_head_location):
-                number_of_food_eaten += 1
+                ate_food.append(i)
                 snake.set_ate_food()
                 self.food.remove_food_from_coord(snake_head_location)
-                reward[i] += self.rewards.get_reward("ate_food", i, episodes)
 
-            # Calculate rewards for collision
-            if outcome == "Snake hit wall":
-                reward[i] += self.rewards.get_reward("hit_wall", i, episodes)
-                
-            elif outcome == "Snake was eaten - same tile":
-                reward[i] += self.rewards.get_reward("was_eaten", i, episodes)
-                
-            elif outcome == "Snake was eaten - adjacent tile":
-                reward[i] += self.rewards.get_reward("was_eaten", i, episodes)
-                
-            elif outcome == "Snake hit body - hit itself":
-                reward[i] += self.rewards.get_reward("hit_self", i, episodes)
-                
-            elif outcome == "Snake hit body - hit other":
-                reward[i] += self.rewards.get_reward("hit_other_snake", i,
-                                                    episodes)
-
-            elif outcome == "Other snake hit body":
-                reward[i] += self.rewards.get_reward("other_snake_hit_body", i,
-                                                    episodes)
-                
-            elif outcome == "Did not collide":
-                pass
-                
-            elif outcome == "Ate another snake":
-                reward[i] += self.rewards.get_reward("ate_another_snake", i,
-                                                    episodes)
         for snake_to_be_killed in snakes_to_be_killed:
             snake_to_be_killed.kill_snake()
-        
-        snakes_alive = []
-        for i, snake in enumerate(self.snakes.get_snakes()):
-            snakes_alive.append(snake.is_alive())
-            if snake.is_alive():
-                number_of_snakes_alive += 1
+        return ate_food
+
+    def _end_turn(self, random_state=None, spawn_food=True):
+        '''
+        Helper function to spawn food and count the turn (last part of step)
+
+        Parameters:
+        ----------
+        random_state: np.random.Generator or np.random.RandomState, optional
+            Random generator for the food, see Food.end_of_turn.
+            By default, the random generators of the gym are used (see seed)
+
+        spawn_food: bool, default True
+            If False, no food is spawned at the end of the turn
+
+        Returns:
+        --------
+        snakes_alive: [bool]
+        '''
+        snakes_alive = [snake.is_alive() for snake in self.snakes.get_snakes()]
+        if spawn_food and random_state is None:
+            self.food.end_of_turn(self.snakes.free_cells, random_state=self._food_rng,
+                                  should_spawn=self._should_spawn_food())
+        elif spawn_food:
+            self.food.end_of_turn(self.snakes.free_cells, random_state=random_state)
+        self.turn_count += 1
+        self.snake_max_len += snakes_alive
+        return snakes_alive
+
+    def _get_rewards(self, outcomes, ate_food, snakes_alive, episodes=None):
+        '''
+        Helper function to calculate the rewards of a turn from the outcome of each snake
+
+        Parameters:
+        ----------
+        outcomes: np.array(number_of_snakes)
+            Outcome codes of the turn, see _move_snakes and _resolve_collisions
+        ate_food: [int]
+            Indexes of the snakes that ate food
+        snakes_alive: [bool]
+        episodes: [int], optional
+
+        Returns:
+        --------
+        reward: {int: float}
+        '''
+        game_done = self.number_of_snakes > 1 and np.sum(snakes_alive) <= 1
+        reward_vector = compile_rewards(self.rewards)
+        if reward_vector is not None:
+            is_ate_food = np.zeros(self.number_of_snakes, dtype=bool)
+            is_ate_food[list(ate_food)] = True
+            events = get_turn_events(outcomes, is_ate_food, np.asarray(snakes_alive, dtype=bool),
+                                     game_done)
+            return dict(enumerate(get_turn_rewards(reward_vector, events).tolist()))
+
+        # Fallback for rewards that depend on the snake or the episode
+        reward = {}
+        for i, outcome in enumerate(outcomes.tolist()):
+            reward[i] = 0
+            if OUTCOME_REWARDS[outcome] is not None:
+                reward[i] += self.rewards.get_reward(OUTCOME_REWARDS[outcome], i, episodes)
+
+            if i in ate_food:
+                reward[i] += self.rewards.get_reward("ate_food", i, episodes)
+
+            if snakes_alive[i]:
                 reward[i] += self.rewards.get_reward("another_turn", i, episodes)
-        
-        self.food.end_of_turn(self.snakes.get_snake_51_map())
 
-        if self.number_of_snakes > 1 and np.sum(snakes_alive) <= 1:
-            done = True
+        if game_done:
             for i, is_snake_alive in enumerate(snakes_alive):
                 if is_snake_alive:
                     reward[i] += self.rewards.get_reward("won", i, episodes)
                 else:
                     reward[i] += self.rewards.get_reward("died", i, episodes)
-        else:
-            done = False
-            
-        snake_alive_dict = {i: a for i, a in enumerate(np.logical_not(snakes_alive).tolist())}
-        self.turn_count += 1
+        return reward
 
-        snakes_health = {}
-        for i, snake in enumerate(self.snakes.get_snakes()):
-            snakes_health[i] = snake.health
-            if snake.is_alive():
-                self.snake_max_len[i] += 1
-            if i not in snake_info:
-                snake_info[i] = "Dead"
-                
+    def _check_snake_maps(self, outcomes, actions, state_before_moving, state_after_moving):
+        '''
+        Helper function to check that no snake overlaps on the map after a turn (validate mode).
+        If the check fails, the game states before moving, after moving and at the end of the turn
+        are printed as json and a RuntimeError is raised.
+
+        Parameters:
+        ----------
+        outcomes: np.array(number_of_snakes)
+        actions: np.array(number_of_snakes)
+        state_before_moving, state_after_moving: GameState
+            Snapshots of the game taken during step
+        '''
         sum_map = self.snakes.get_snake_51_map()
         if np.max(sum_map) > 5 or 2 in sum_map:
-            print("snake info {}".format(snake_info))
+            print("snake info {}".format(SnakeArrayView(outcomes, OUTCOME_STRINGS)))
             print("actions {}".format(actions))
-            print("before moving json {}".format(json_before_moving))
-            print("after moving json {}".format(json_after_moving))
+            print("before moving json {}".format(self._get_json_from_state(state_before_moving)))
+            print("after moving json {}".format(self._get_json_from_state(state_after_moving)))
             print("final json {}".format(self.get_json()))
-            raise
+            raise RuntimeError("Snakes overlap on the map after turn {}".format(self.turn_count))
+
+    def _get_json_from_state(self, state):
+        '''
+        Helper function to get the json of a snapshot, see get_json
+        '''
+        env = BattlesnakeGym(map_size=self.map_size, number_of_snakes=self.number_of_snakes)
+        env.restore(state)
+        return env.get_json()
+
+    def step(self, actions, episodes=None, out=None, lazy=False):
+        '''
+        Inherited function of the openAI gym. The steps taken mimic the steps provided in 
+        https://docs.battlesnake.com/rules -> Programming Your Snake -> 3) Turn resolution.
+        
+        Parameters:
+        ---------
+        action: np.array(number_of_snakes)
+            Array of integers containing an action for each number of snake. 
+            The integers range from 0 to 3 corresponding to Snake.UP, Snake.DOWN, Snake.LEFT, Snake.RIGHT 
+            respectively
+
+        episodes: [int], optional
+            Episode number of each snake, used by the rewards
+
+        out: np.array, default None
+            Optional buffer of shape observation_space.shape to write the observation in.
+            The dtype of the buffer is kept (e.g., np.uint8 for flat observations or
+            np.float32 for bordered observations) and the buffer is returned as the observation.
+            The border is only written when a new buffer is given, so reusing the same buffer
+            every step does not allocate any memory for the observation.
+
+        lazy: bool, default False
+            If True, a LazyObservation is returned instead of an array. The observation (or a
+            single plane of it) is only built when it is read, which must happen before the
+            next step or reset. Turns where the observation is not read (e.g., for dead snakes,
+            skipped frames or search rollouts) then skip building it.
+
+        Returns:
+        -------
+
+        observation: np.array
+            Output of the current state of the gym
+
+        reward: {}
+            The rewards obtained by each snake. 
+            Dictionary is of length number_of_snakes
+
+        done: Bool
+            Indication of whether the gym is complete or not.
+            Gym is complete when there is only 1 snake remaining
+
+        info: {}
+            Outcome codes, health and number of turns survived of the snakes, see _get_info
+        '''
+
+        self._observation_turn_id += 1
+        if self.validate:
+            state_before_moving = self.snapshot()
+        
+        # Reduce health and move
+        outcomes = self._move_snakes(actions)
+        
+        if self.validate:
+            state_after_moving = self.snapshot()
+        
+        # check for food and collision
+        ate_food = self._resolve_collisions(outcomes)
+        snakes_alive = self._end_turn()
+        reward = self._get_rewards(outcomes, ate_food, snakes_alive, episodes)
+            
+        snake_alive_dict = {i: a for i, a in enumerate(np.logical_not(snakes_alive).tolist())}
+
+        if self.validate:
+            self._check_snake_maps(outcomes, actions, state_before_moving, state_after_moving)
             
-        return self._get_observation(), reward, snake_alive_dict, {'current_turn': self.turn_count,
-                                                                   'snake_health': snakes_health,
-                                                                   'snake_info': snake_info,
-                                                                   'snake_max_len': self.snake_max_len}
+        return self._make_observation(out, lazy), reward, snake_alive_dict, self._get_info(outcomes)
                 
-    def _get_observation(self):
+    def _make_observation(self, out=None, lazy=False):
+        '''
+        Helper function to build the observation returned by step and reset, or a
+        LazyObservation that builds it when it is read
+        '''
+        if lazy:
+            return LazyObservation(self, out)
+        return self._get_observation(out)
+
+    def _get_observation_plane(self, index, dtype):
+        '''
+        Helper function to build observation[:, :, index] on its own (see LazyObservation.get_plane)
+
+        Parameters:
+        ----------
+        index: int
+            0 for the food, i + 1 for snake i and the feature channels after the snakes
+        dtype: np.dtype
+        '''
+        shape = self.observation_space.shape
+        if "flat" in self.observation_type:
+            plane = np.zeros(shape[:2], dtype=dtype)
+            b = 0
+        else:
+            plane = np.array(self._get_border_template(shape, dtype)[:, :, 0])
+            b = (shape[0] - self.map_size[0]) // 2
+        interior = plane[b:b+self.map_size[0], b:b+self.map_size[1]]
+
+        if index == 0:
+            interior[:] = self.food.get_food_map()
+        elif index > self.number_of_snakes:
+            # All the feature planes come from the same searches, they are computed once per turn
+            if self._lazy_features is None or self._lazy_features[0] != self._observation_turn_id:
+                self._lazy_features = (self._observation_turn_id, self._get_feature_planes())
+            interior[:] = self._lazy_features[1][:, :, index - self.number_of_snakes - 1]
+        elif index - 1 in self.snakes._get_drawn_snakes():
+            return_type = "51" if "51s" in self.observation_type else "Numbered"
+            self.snakes.draw_snake(index - 1, interior, return_type=return_type)
+        return plane
+
+    def _get_observation(self, out=None):
         '''
         Helper function to generate the output observation.
+
+        Parameters:
+        ----------
+        out: np.array, default None
+            Buffer to write the observation in. If None, a new array is allocated
+            (np.uint8 for flat observations and np.float64 for bordered observations)
         '''
         if "flat" in self.observation_type:
-            return self._get_state()
+            if out is None:
+                out = np.empty(self.observation_space.shape, dtype=np.uint8)
+            self._check_observation_buffer(out)
+            self._get_state(out=out)
+            return out
         elif "bordered" in self.observation_type:
-            state = self._get_state()
+            if out is None:
+                out = np.empty(self.observation_space.shape, dtype=np.float64)
+                self._bordered_buffer = None
+            self._check_observation_buffer(out)
+            if np.issubdtype(out.dtype, np.unsignedinteger):
+                raise ValueError("Bordered observations need a signed dtype for the -1 border, "
+                                 "got {}".format(out.dtype))
 
-            if "max-bordered" in self.observation_type:
-                border_size = self.MAX_BORDER[0] - self.map_size[0]
-            else: 
-                border_size = 2
-                
-            bordered_state_shape = (state.shape[0]+border_size, state.shape[1]+border_size,
-                                    state.shape[2])
-            bordered_state = np.ones(shape=bordered_state_shape)*-1
-            
-            b = int(border_size/2)
-            bordered_state[b:-b, b:-b,:] = state
-            return bordered_state
+            if out is not self._bordered_buffer:
+                np.copyto(out, self._get_border_template(out.shape, out.dtype))
+                self._bordered_buffer = out
+
+            b = (out.shape[0] - self.map_size[0]) // 2
+            self._get_state(out=out[b:b+self.map_size[0], b:b+self.map_size[1], :])
+            return out
+
+    def _check_observation_buffer(self, out):
+        '''
+        Helper function to check that an output buffer matches the observation space
+        '''
+        if out.shape != self.observation_space.shape:
+            raise ValueError("Observation buffer of shape {} does not match the observation space {}".format(
+                out.shape, self.observation_space.shape))
+
+    def _get_border_template(self, shape, dtype):
+        '''
+        Helper function to get an observation of -1 with zeros inside the map.
+        The template is built once for each shape and dtype.
+        '''
+        key = (shape, np.dtype(dtype), tuple(self.map_size))
+        if key not in self._border_templates:
+            template = np.full(shape, -1, dtype=dtype)
+            b = (shape[0] - self.map_size[0]) // 2
+            template[b:b+self.map_size[0], b:b+self.map_size[1], :] = 0
+            template.flags.writeable = False
+            self._border_templates[key] = template
+        return self._border_templates[key]
 
-    def _get_state(self):
+    def _get_state(self, out=None):
         ''''
         Helper function to generate the state of the game.
 
+        Parameters:
+        ----------
+        out: np.array(map_size[0], map_size[1], depth), default None
+            Buffer (or view of a buffer) to write the state in
+
         Returns:
         --------
-        state: np.array(map_size[1], map_size[2], number_of_snakes + 1)
+        state: np.array(map_size[0], map_size[1], depth)
             state[:, :, 0] corresponds to a binary image of the location of the food
-            state[:, :, 1:] corrsponds to binary images of the locations of other snakes
+            state[:, :, 1:number_of_snakes+1] corrsponds to binary images of the locations of other snakes
+            state[:, :, number_of_snakes+1:] are the feature channels (see _get_feature_planes)
         '''
         FOOD_INDEX = 0
-        SNAKE_INDEXES = FOOD_INDEX + np.array(range(1, self.number_of_snakes + 1))
+        number_of_snakes = self.snakes.number_of_snakes
 
-        depth_of_state = 1 + self.snakes.number_of_snakes
-        state = np.zeros((self.map_size[0], self.map_size[1], depth_of_state),
-                         dtype=np.uint8)
+        if out is None:
+            out = np.empty((self.map_size[0], self.map_size[1], self._get_observation_depth()),
+                           dtype=np.uint8)
 
         # Include the postions of the food
-        state[:, :, FOOD_INDEX] = self.food.get_food_map()
+        out[:, :, FOOD_INDEX] = self.food.get_food_map()
         
         # Include the positions of the snakes
+        snake_channels = out[:, :, FOOD_INDEX+1:FOOD_INDEX+1+number_of_snakes]
         if "51s" in self.observation_type:
-            state[:, :, SNAKE_INDEXES] = self.snakes.get_snake_depth_51_map()
+            self.snakes.get_snake_depth_51_map(out=snake_channels)
         else:
-            state[:, :, SNAKE_INDEXES] = self.snakes.get_snake_depth_numbered_map()   
-        return state
+            self.snakes.get_snake_depth_numbered_map(out=snake_channels)
+
+        if len(self.feature_channels) > 0:
+            out[:, :, FOOD_INDEX+1+number_of_snakes:] = self._get_feature_planes()
+        return out
+
+    def _get_feature_planes(self):
+        '''
+        Helper function to compute the feature channels of self.feature_channels with a
+        tail-aware breadth first search from the heads of the snakes and from the food.
+
+        Returns:
+        --------
+        features: np.array(map_size[0], map_size[1], depth - number_of_snakes - 1) of int32
+        '''
+        free_times = territory.get_free_times(self.map_size, self.snakes.snakes)
+        planes = []
+        if "reachable" in self.feature_channels or "voronoi" in self.feature_channels:
+            heads = np.zeros((self.number_of_snakes,) + tuple(self.map_size), dtype=bool)
+            for k in self.snakes._get_drawn_snakes():
+                i, j = self.snakes.snakes[k].get_head()
+                heads[k, i, j] = True
+            distances = territory.multi_source_bfs(heads, free_times, self.FEATURE_MAX_DEPTH)
+            if "reachable" in self.feature_channels:
+                planes.extend(distances != territory.UNREACHABLE)
+            if "voronoi" in self.feature_channels:
+                planes.extend(territory.get_voronoi_map(distances))
+
+        if "food_distance" in self.feature_channels:
+            food = self.food.get_food_map()[None] > 0
+            distances = territory.multi_source_bfs(food, free_times, self.FEATURE_MAX_DEPTH)[0]
+            planes.append(np.minimum(distances + 1, np.iinfo(np.uint8).max))
+        return np.stack(planes, axis=-1).astype(np.int32)
 
     def _get_board(self, state):
         ''''
         Generate visualisation of the gym. Based on the state (generated by _get_state).
         '''
-        
-        FOOD_INDEX = 0
-        SNAKE_INDEXES = FOOD_INDEX + np.array(range(1, self.number_of_snakes + 1))
+        return self._get_renderer().render(state, self.snakes.get_snake_colours())
 
-        BOUNDARY = 20
-        BOX_SIZE = 40
-        SPACE_BETWEEN_BOXES = 10
-        snake_colours = self.snakes.get_snake_colours()
-        
-        # Create board
-        board_size = (self.map_size[0]*(BOX_SIZE + SPACE_BETWEEN_BOXES) + 2*BOUNDARY,
-                      self.map_size[1]*(BOX_SIZE + SPACE_BETWEEN_BOXES) + 2*BOUNDARY)
-        board = np.ones((board_size[0], board_size[1], 3), dtype=np.uint8) * 255
+    def _get_renderer(self):
+        '''
+        Helper function to get the BoardRenderer of the current map size
+        '''
+        if self._renderer is None or self._renderer.map_size != tuple(self.map_size):
+            self._renderer = BoardRenderer(self.map_size)
+        return self._renderer
 
-        # Create boxes
-        for i in range(0, self.map_size[0]):
-            for j in range(0, self.map_size[1]):
-                state_value = state[i][j]
+    def render_episode(self, states):
+        '''
+        Draw the rgb_array images of a recorded episode at once, e.g., to make a gif.
 
-                t_i1 = BOUNDARY + i * (BOX_SIZE + SPACE_BETWEEN_BOXES)
-                t_i2 = t_i1 + BOX_SIZE
+        Parameters:
+        ----------
+        states: [GameState]
+            Snapshots of the game taken after each reset and step (see snapshot)
 
-                t_j1 = BOUNDARY + j * (BOX_SIZE + SPACE_BETWEEN_BOXES)
-                t_j2 = t_j1 + BOX_SIZE
+        Returns:
+        --------
+        boards: np.array(len(states), height, width, 3)
+            The same images as render(mode="rgb_array") after each turn
+        '''
+        map_size = tuple(states[0].map_size) if len(states) > 0 else tuple(self.map_size)
+        episode_states = np.zeros((len(states),) + map_size + (self.number_of_snakes + 1,),
+                                  dtype=np.uint8)
+        for t, state in enumerate(states):
+            episode_states[t, :, :, 0] = state.get_food_map()
+            for k, body in enumerate(state.get_bodies()):
+                # Same snakes as Snakes._get_drawn_snakes
+                if not state.is_alive[k] or len(body) == 0:
+                    continue
+                head = body[-1]
+                if head[0] < 0 or head[0] >= map_size[0] or head[1] < 0 or head[1] >= map_size[1]:
+                    continue
+                if "51s" in self.observation_type:
+                    episode_states[t, body[:, 0], body[:, 1], k + 1] = 1
+                    episode_states[t, head[0], head[1], k + 1] = 5
+                else:
+                    episode_states[t, body[:, 0], body[:, 1], k + 1] = np.arange(1, len(body) + 1)
 
+        if map_size != tuple(self.map_size):
+            renderer = BoardRenderer(map_size)
+        else:
+            renderer = self._get_renderer()
+        return renderer.render(episode_states, self.snakes.get_snake_colours())
 
-                board[t_i1:t_i2, t_j1:t_j2] = 255 * 0.7
-                
-                # If state contains food
-                if state_value[FOOD_INDEX] >= 1:
-                    box_margin = int(BOX_SIZE/5)
-                    board[t_i1 + box_margin:t_i2 - box_margin,
-                          t_j1 + box_margin:t_j2 - box_margin] = [255, 0, 0]
-
-                # If state contains a snake body
-                if 1 in state_value[SNAKE_INDEXES]:
-                    snake_present_in = np.argmax(state_value[SNAKE_INDEXES])
-                    board[t_i1:t_i2, t_j1:t_j2] = snake_colours[snake_present_in]
-                    
-                # If state contains a snake head
-                if 5 in state_value[SNAKE_INDEXES]:
-                    snake_present_in = np.argmax(state_value[SNAKE_INDEXES])
-                    board[t_i1:t_i2, t_j1:t_j2] = snake_colours[snake_present_in]
-                    t_i_h = 10
-                    t_j_h = 10
-                    board[(t_i1+t_i_h):(t_i2-t_i_h), (t_j1+t_j_h):(t_j2-t_j_h)] = [255, 255, 255]
-
-        return board
-    
     def get_json(self):
         '''
         Generate a json representation of the gym following the same input as the battlesnake
@@ -563,18 +1120,18 @@ class BattlesnakeGym(gym.Env):
         # Get food
         food_list = []
         y, x = np.where(self.food.locations_map==1)
-        for x_, y_ in zip(x, y):
+        for x_, y_ in zip(x.tolist(), y.tolist()):
             food_list.append({"x": x_, "y": y_})
         
         # Get snakes
         snake_dict_list = []
         for i, snakes in enumerate(self.snakes.snakes):
             snake_location = []
-            for coord in snakes.locations[::-1]:
+            for coord in snakes.locations[::-1].tolist():
                 snake_location.append({"x": coord[1], "y": coord[0]})
                 
             snake_dict = {}
-            snake_dict["health"] = snakes.health
+            snake_dict["health"] = int(snakes.health)
             snake_dict["body"] = snake_location
             snake_dict["id"] = i
             snake_dict["name"] = "Snake {}".format(i)
@@ -587,6 +1144,17 @@ class BattlesnakeGym(gym.Env):
                         }
         return json
 
+    def get_json_bytes(self):
+        '''
+        Same as get_json but directly serialised into UTF-8 JSON bytes
+        (see json_export.format_game), e.g., to log every turn of a game.
+        json_export.game_states_to_json_bytes serialises a list of snapshots at once.
+        '''
+        bodies = [snake.locations for snake in self.snakes.snakes]
+        health = [snake.health for snake in self.snakes.snakes]
+        return json_export.format_game(self.turn_count, self.map_size, self.food.locations_map,
+                                       bodies, health).encode()
+
     def _get_ascii(self):
         '''
         Generate visualisation of the gym. Prints ascii representation of the gym.
@@ -0,0 +1,78 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# 
+# Licensed under the Apache License, Version 2.0 (the "License").
+# You may not use this file except in compliance with the License.
+# A copy of the License is located at
+# 
+#     http://www.apache.org/licenses/LICENSE-2.0
+# 
+# or in the "license" file accompanying this file. This file is distributed 
+# on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either 
+# express or implied. See the License for the specific language governing 
+# permissions and limitations under the License.
+
+
+from collections import namedtuple
+
+import numpy as np
+
+NO_DIRECTION = -1 # facing_directions value of snakes that have not moved yet
+
+class GameState(namedtuple("GameState", ["map_size", "turn_count", "bodies", "lengths",
+                                         "health", "is_alive", "facing_directions",
+                                         "body_stacking", "ate_food", "food",
+                                         "snake_max_len", "food_spawn_locations"])):
+    '''
+    Compact and immutable copy of a game, made by BattlesnakeGym.snapshot and
+    reinstated with BattlesnakeGym.restore.
+    All the fields are tuples, ints or bytes so that a GameState is hashable and cheap to copy.
+
+    Fields:
+    -------
+    map_size: (int, int)
+    turn_count: int
+    bodies: bytes
+        The coordinates (y, x) of every snake packed as np.int16, from the end to the head.
+        Snake k uses lengths[k] coordinates after the coordinates of snakes 0..k-1
+    lengths: (int,)
+    health: (int,)
+    is_alive: (bool,)
+    facing_directions: (int,)
+        Snake.UP, Snake.DOWN, Snake.LEFT, Snake.RIGHT or NO_DIRECTION
+    body_stacking: (int,)
+        Number of turns left where the end of the snake is not removed
+    ate_food: (bool,)
+    food: bytes
+        The food map packed with np.packbits
+    snake_max_len: (int,)
+    food_spawn_locations: ((int, int),)
+        The remaining forced food locations, see BattlesnakeGym
+    '''
+    __slots__ = ()
+
+    def get_bodies(self):
+        '''
+        Get the coordinates of each snake
+
+        Returns:
+        --------
+        bodies: [np.array(length, 2)]
+            The end of the snake is element 0 and the head is element n
+        '''
+        coordinates = np.frombuffer(self.bodies, dtype=np.int16).reshape(-1, 2)
+        ends = np.cumsum(self.lengths)
+        return np.split(coordinates, ends[:-1])
+
+    def get_food_map(self):
+        '''
+        Get the binary food map, np.array(map_size[0], map_size[1]) of np.uint8
+        '''
+        number_of_cells = self.map_size[0] * self.map_size[1]
+        food = np.unpackbits(np.frombuffer(self.food, dtype=np.uint8), count=number_of_cells)
+        return food.reshape(self.map_size)
+
+def pack_food_map(food_map):
+    '''
+    Helper function to pack a food map into GameState.food
+    '''
+    return np.packbits(np.asarray(food_map).reshape(-1) > 0).tobytes()
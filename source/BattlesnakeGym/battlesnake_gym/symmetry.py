@@ -0,0 +1,93 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License").
+# You may not use this file except in compliance with the License.
+# A copy of the License is located at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# or in the "license" file accompanying this file. This file is distributed
+# on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either
+# express or implied. See the License for the specific language governing
+# permissions and limitations under the License.
+
+'''
+The 8 rotations and reflections of the board (dihedral group of the square).
+Transform t flips the board left-right if t >= 4 and then rotates it counterclockwise
+by (t % 4) * 90 degrees. The transforms of the observations are numpy views so that
+augmenting data does not copy the maps, and the action indexes (Snake.UP, Snake.DOWN,
+Snake.LEFT, Snake.RIGHT) are permuted to match the transformed board.
+Rotations by 90 degrees swap the height and width, so the maps should be square
+(e.g., max-bordered observations) to be stacked with their transforms.
+'''
+
+import numpy as np
+
+from .snake import Snake
+
+NUMBER_OF_TRANSFORMS = 8
+ACTIONS = (Snake.UP, Snake.DOWN, Snake.LEFT, Snake.RIGHT)
+
+def transform_observation(observation, transform, axes=(-3, -2)):
+    '''
+    Get a view of observation on the transformed board
+
+    Parameters:
+    ----------
+    observation: np.array
+        e.g., np.array(height, width, channels) or np.array(batch_size, height, width, channels)
+
+    transform: int
+        0 to NUMBER_OF_TRANSFORMS - 1
+
+    axes: (int, int), default=(-3, -2)
+        Axes of the rows and columns of the map. Use (-2, -1) for channels first maps
+    '''
+    if transform >= 4:
+        observation = np.flip(observation, axis=axes[1])
+    return np.rot90(observation, k=transform % 4, axes=axes)
+
+def _get_action_permutations():
+    '''
+    Helper function to find where each transform sends each action by transforming
+    a 3x3 map marking the coordinate next to the center in the direction of the action.
+    '''
+    permutations = np.zeros((NUMBER_OF_TRANSFORMS, len(ACTIONS)), dtype=np.int64)
+    for transform in range(NUMBER_OF_TRANSFORMS):
+        for action in ACTIONS:
+            di, dj = Snake.DIRECTION_OFFSETS[action]
+            direction_map = np.zeros((3, 3), dtype=bool)
+            direction_map[1 + di, 1 + dj] = True
+            i, j = np.argwhere(transform_observation(direction_map, transform, axes=(0, 1)))[0]
+            permutations[transform, action] = Snake.SEGMENT_DIRECTIONS[(i - 1, j - 1)]
+    return permutations
+
+# ACTION_PERMUTATIONS[t, a] is the action on the board transformed by t that is the same move as a
+ACTION_PERMUTATIONS = _get_action_permutations()
+
+def transform_actions(actions, transform):
+    '''
+    Permute action indexes to match transform_observation. Values that are not
+    actions (e.g., the padding of the MXNet replay buffer) are not modified.
+
+    Parameters:
+    ----------
+    actions: int or np.array of ints
+    transform: int
+    '''
+    actions = np.asarray(actions)
+    is_action = (actions >= 0) & (actions < len(ACTIONS))
+    transformed = ACTION_PERMUTATIONS[transform][np.where(is_action, actions, 0)]
+    return np.where(is_action, transformed, actions)
+
+def transform_action_masks(masks, transform):
+    '''
+    Permute the last axis of action masks (or of any per-action values such as Q values)
+    to match transform_observation. The masks are copied, they are small compared to the maps.
+
+    Parameters:
+    ----------
+    masks: np.array(..., 4)
+    transform: int
+    '''
+    return masks[..., np.argsort(ACTION_PERMUTATIONS[transform])]
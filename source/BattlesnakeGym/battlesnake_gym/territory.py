@@ -0,0 +1,108 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License").
+# You may not use this file except in compliance with the License.
+# A copy of the License is located at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# or in the "license" file accompanying this file. This file is distributed
+# on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either
+# express or implied. See the License for the specific language governing
+# permissions and limitations under the License.
+
+import numpy as np
+
+UNREACHABLE = -1
+
+def get_free_times(map_size, snakes):
+    '''
+    Number of turns until each coordinate of the map is no longer covered by a snake.
+    The segment i of a snake (0 being the end) moves out of its coordinate after i + 1 turns,
+    delayed by the turns where the end of the snake stays in place (initial stacking and food).
+
+    Parameters:
+    ----------
+    map_size: (int, int)
+    snakes: [Snake]
+
+    Returns:
+    --------
+    free_times: np.array(map_size[0], map_size[1]) of int32
+        0 for coordinates that are not covered by a snake
+    '''
+    free_times = np.zeros(map_size, dtype=np.int32)
+    for snake in snakes:
+        if not snake.is_alive():
+            continue
+        locations = snake.locations
+        is_inside = (locations[:, 0] >= 0) & (locations[:, 0] < map_size[0]) & \
+            (locations[:, 1] >= 0) & (locations[:, 1] < map_size[1])
+        delay = snake._number_of_initial_body_stacking + int(snake.ate_food)
+        times = np.arange(1, len(locations) + 1, dtype=np.int32) + delay
+        # Stacked segments share a coordinate which is free once the latest one has moved
+        np.maximum.at(free_times, (locations[is_inside, 0], locations[is_inside, 1]),
+                      times[is_inside])
+    return free_times
+
+def multi_source_bfs(sources, free_times, max_depth):
+    '''
+    Breadth first search of the number of turns needed to reach each coordinate, run for
+    several groups of sources at once with whole-map numpy operations.
+    A coordinate can be entered after d turns if free_times <= d, so the tails that move
+    out of the way open new paths as the search goes on. Coordinates that were reached are
+    considered reachable at any later turn.
+    The cost is bounded by max_depth iterations over np.array(number_of_groups, map_size).
+
+    Parameters:
+    ----------
+    sources: np.array(number_of_groups, map_size[0], map_size[1]) of bool
+        Starting coordinates (distance 0) of each group
+
+    free_times: np.array(map_size[0], map_size[1])
+        See get_free_times
+
+    max_depth: int
+        Coordinates that need more turns are UNREACHABLE
+
+    Returns:
+    --------
+    distances: np.array(number_of_groups, map_size[0], map_size[1]) of int32
+        Number of turns to reach each coordinate from the closest source of its group
+    '''
+    number_of_groups, height, width = sources.shape
+    distances = np.full(sources.shape, UNREACHABLE, dtype=np.int32)
+    distances[sources] = 0
+
+    # 1 cell padding so that the neighbours are shifted views of the same array
+    reached = np.zeros((number_of_groups, height + 2, width + 2), dtype=bool)
+    reached[:, 1:-1, 1:-1] = sources
+    neighbours = np.empty(sources.shape, dtype=bool)
+    for depth in range(1, max_depth + 1):
+        np.logical_or(reached[:, :-2, 1:-1], reached[:, 2:, 1:-1], out=neighbours)
+        neighbours |= reached[:, 1:-1, :-2]
+        neighbours |= reached[:, 1:-1, 2:]
+        new_cells = neighbours & ~reached[:, 1:-1, 1:-1] & (free_times <= depth)
+        if not new_cells.any():
+            break
+        distances[new_cells] = depth
+        reached[:, 1:-1, 1:-1] |= new_cells
+    return distances
+
+def get_voronoi_map(distances):
+    '''
+    Get the coordinates that each group reaches strictly before every other group.
+
+    Parameters:
+    ----------
+    distances: np.array(number_of_groups, map_size[0], map_size[1])
+        Output of multi_source_bfs
+
+    Returns:
+    --------
+    is_owned: np.array(number_of_groups, map_size[0], map_size[1]) of bool
+    '''
+    masked_distances = np.where(distances == UNREACHABLE, np.iinfo(np.int32).max, distances)
+    closest = masked_distances.min(axis=0)
+    is_closest = (masked_distances == closest) & (distances != UNREACHABLE)
+    return is_closest & (is_closest.sum(axis=0) == 1)
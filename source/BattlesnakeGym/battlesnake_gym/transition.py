@@ -0,0 +1,81 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# 
+# Licensed under the Apache License, Version 2.0 (the "License").
+# You may not use this file except in compliance with the License.
+# A copy of the License is located at
+# 
+#     http://www.apache.org/licenses/LICENSE-2.0
+# 
+# or in the "license" file accompanying this file. This file is distributed 
+# on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either 
+# express or implied. See the License for the specific language governing 
+# permissions and limitations under the License.
+
+
+import threading
+
+import numpy as np
+
+from .snake_gym import BattlesnakeGym
+
+# Gyms used to apply the rules to a GameState when the caller does not give one, keyed by
+# (map_size, number_of_snakes). Each thread has its own gyms.
+_thread_local = threading.local()
+
+def _get_rule_gym(map_size, number_of_snakes):
+    rule_gyms = getattr(_thread_local, "rule_gyms", None)
+    if rule_gyms is None:
+        rule_gyms = _thread_local.rule_gyms = {}
+    key = (tuple(map_size), number_of_snakes)
+    if key not in rule_gyms:
+        rule_gyms[key] = BattlesnakeGym(map_size=tuple(map_size), number_of_snakes=number_of_snakes)
+    return rule_gyms[key]
+
+def transition(state, joint_action, rng_state=None, env=None):
+    '''
+    Apply one turn to a game, using the same rules as BattlesnakeGym.step but without
+    computing rewards, info dictionaries or observations. The result only depends on the
+    arguments. Designed for search (e.g., MCTS or minimax) over snapshots of a game.
+
+    Parameters:
+    ----------
+    state: GameState
+        The game before the turn, e.g., made by BattlesnakeGym.snapshot
+
+    joint_action: [int]
+        The action of each snake (Snake.UP, Snake.DOWN, Snake.LEFT or Snake.RIGHT)
+
+    rng_state: dict, optional
+        State of the bit generator of a np.random.Generator (see np.random.Generator.bit_generator)
+        that drives the food spawning. If None, no food is spawned so the transition is deterministic
+
+    env: BattlesnakeGym, optional
+        Gym used to apply the rules, with the map size and number of snakes of state.
+        Its game is overwritten. By default, a gym owned by the calling thread is used
+
+    Returns:
+    --------
+    next_state: GameState
+
+    outcomes: np.array(number_of_snakes)
+        The Outcome code of each snake
+
+    next_rng_state: dict or None
+        The state of the bit generator after the turn
+    '''
+    if env is None:
+        env = _get_rule_gym(state.map_size, len(state.lengths))
+    env.restore(state)
+
+    outcomes = env._move_snakes(joint_action)
+    env._resolve_collisions(outcomes)
+    if rng_state is None:
+        env._end_turn(spawn_food=False)
+        next_rng_state = None
+    else:
+        bit_generator = getattr(np.random, rng_state["bit_generator"])()
+        bit_generator.state = rng_state
+        random_state = np.random.Generator(bit_generator)
+        env._end_turn(random_state=random_state)
+        next_rng_state = random_state.bit_generator.state
+    return env.snapshot(), outcomes, next_rng_state
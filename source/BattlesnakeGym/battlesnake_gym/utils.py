@@ -13,53 +13,151 @@
 
 import numpy as np
 import gym
-import math
 
-def is_coord_in(coord, array):
-    for a in array:
-        if a[0] == coord[0] and a[1] == coord[1]:
-            return True
-    return False
-
-def get_random_coordinates(map_size, n, excluding=[]):
+def get_random_integers(random_state, high, size=None):
     '''
-    Helper function to get n number of random coordinates based on the map
+    Helper function to draw integers in [0, high) from a np.random.Generator,
+    a np.random.RandomState or the np.random module
+
     Parameters:
     ----------
-    map_size, (int, int)
-        Size of the map with possible coordinates
-    
-    n, int
-        number of coordinates to get
-
-    excluding: [(int, int)]
-        A list of coordinates to not include in the randomly generated coordinates
+    random_state: np.random.Generator, np.random.RandomState or None
+        If None, np.random is used
+    high: int
+    size: int, optional
     '''
-    coordinates_indexes = []
-    coordinates = []
-    count = 0
-    for i in range(map_size[0]):
-        for j in range(map_size[1]):
-            if is_coord_in(coord=(i, j), array=excluding):
-                continue
-            coordinates.append((i, j))
-            coordinates_indexes.append(count)
-            count += 1
-
-    indexes = np.random.choice(coordinates_indexes, n, replace=False)
-    random_coordinates = np.array(coordinates)[indexes]
-    return random_coordinates
-
-def generate_coordinate_list_from_binary_map(map_image):
+    if random_state is None:
+        random_state = np.random
+    if isinstance(random_state, np.random.Generator):
+        return random_state.integers(high, size=size)
+    return random_state.randint(high, size=size)
+
+class FreeCellIndex:
     '''
-    Helper function to convert binary maps into a list of coordinates
+    Set of the free coordinates of a map that supports O(1) insertion, removal and
+    uniform random sampling.
+    The free cells are kept in a dense list with a map from each cell to its position
+    in the list. Removing a cell swaps it with the last free cell.
+
+    Parameters:
+    ----------
+    map_size: (int, int)
+        All the coordinates of the map are initially free
     '''
-    coordinate_list = []
-    for i in range(map_image.shape[0]):
-        for j in range(map_image.shape[1]):
-            if map_image[i][j] > 0:
-                coordinate_list.append((i, j))
-    return coordinate_list
+    def __init__(self, map_size):
+        self.map_size = map_size
+        number_of_cells = map_size[0] * map_size[1]
+        self._cells = list(range(number_of_cells))
+        self._positions = list(range(number_of_cells))
+        self._number_of_free_cells = number_of_cells
+
+    def __len__(self):
+        return self._number_of_free_cells
+
+    def reset(self, is_occupied):
+        '''
+        Rebuild the free cells from a map of the occupied coordinates. The dense list
+        is rebuilt in a canonical order that only depends on is_occupied
+
+        Parameters:
+        ----------
+        is_occupied: np.array(map_size[0], map_size[1]) of bool
+        '''
+        is_occupied = is_occupied.reshape(-1)
+        cells = np.concatenate([np.flatnonzero(~is_occupied), np.flatnonzero(is_occupied)])
+        positions = np.empty_like(cells)
+        positions[cells] = np.arange(len(cells))
+        self._cells = cells.tolist()
+        self._positions = positions.tolist()
+        self._number_of_free_cells = len(cells) - int(np.count_nonzero(is_occupied))
+
+    def get_order(self):
+        '''
+        Get the order of the dense list, which determines the draws of sample
+
+        Returns:
+        --------
+        cells: np.array(map_size[0] * map_size[1]) of np.uint16
+            The row-major index of every cell of the map, the free cells first
+        '''
+        return np.array(self._cells, dtype=np.uint16)
+
+    def set_order(self, cells):
+        '''
+        Reorder the dense list to an order of get_order. The free cells are not changed
+
+        Parameters:
+        ----------
+        cells: np.array(map_size[0] * map_size[1])
+            Order of an index with the same free cells
+        '''
+        cells = np.asarray(cells, dtype=np.intp)
+        if len(cells) != len(self._cells) or not np.array_equal(
+                np.sort(cells[:self._number_of_free_cells]),
+                np.sort(self._cells[:self._number_of_free_cells])):
+            raise ValueError("The order does not have the same free cells")
+        positions = np.empty_like(cells)
+        positions[cells] = np.arange(len(cells))
+        self._cells = cells.tolist()
+        self._positions = positions.tolist()
+
+    def __contains__(self, coord):
+        return self._positions[self._to_cell(coord)] < self._number_of_free_cells
+
+    def _to_cell(self, coord):
+        return int(coord[0]) * self.map_size[1] + int(coord[1])
+
+    def _swap(self, position1, position2):
+        cell1, cell2 = self._cells[position1], self._cells[position2]
+        self._cells[position1], self._cells[position2] = cell2, cell1
+        self._positions[cell2], self._positions[cell1] = position1, position2
+
+    def remove(self, coord):
+        '''
+        Mark coord as not free. Does nothing if coord is not free
+        '''
+        position = self._positions[self._to_cell(coord)]
+        if position < self._number_of_free_cells:
+            self._number_of_free_cells -= 1
+            self._swap(position, self._number_of_free_cells)
+
+    def add(self, coord):
+        '''
+        Mark coord as free. Does nothing if coord is already free
+        '''
+        position = self._positions[self._to_cell(coord)]
+        if position >= self._number_of_free_cells:
+            self._swap(position, self._number_of_free_cells)
+            self._number_of_free_cells += 1
+
+    def sample(self, n=1, random_state=None):
+        '''
+        Get n distinct free coordinates chosen uniformly at random (in a random order).
+        The coordinates stay free.
+
+        The draws depend on the order of the dense list, which is a function of the past
+        insertions and removals. reset rebuilds the list in a canonical order (the free cells in
+        row-major order), so games restored from the same state spawn food in the same way.
+        get_order and set_order save and reinstate the order of a game that continues.
+
+        Parameters:
+        ----------
+        n: int
+        random_state: np.random.Generator or np.random.RandomState, optional
+            Random generator to use instead of np.random
+
+        Returns:
+        --------
+        coordinates: [(int, int)]
+        '''
+        assert n <= self._number_of_free_cells, "Not enough free cells to sample from"
+        coordinates = []
+        for k in range(n):
+            # Partial Fisher-Yates shuffle of the free cells
+            position = k + int(get_random_integers(random_state, self._number_of_free_cells - k))
+            self._swap(k, position)
+            coordinates.append(divmod(self._cells[k], self.map_size[1]))
+        return coordinates
 
 class MultiAgentActionSpace(list):
     '''
@@ -76,6 +174,3 @@ class MultiAgentActionSpace(list):
     def sample(self):
         """ samples action for each agent from uniform distribution"""
         return [agent_action_space.sample() for agent_action_space in self._agents_action_space]
-
-def get_distance(point1, point2):
-    return math.sqrt((point1[0]-point2[0])**2 + (point1[1]-point2[1])**2)
@@ -0,0 +1,446 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License").
+# You may not use this file except in compliance with the License.
+# A copy of the License is located at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# or in the "license" file accompanying this file. This file is distributed
+# on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either
+# express or implied. See the License for the specific language governing
+# permissions and limitations under the License.
+
+import multiprocessing
+from multiprocessing import shared_memory
+from multiprocessing.connection import wait
+import os
+import traceback
+
+import numpy as np
+
+from .snake_gym import BattlesnakeGym
+
+class SharedArrays:
+    '''
+    Named numpy arrays packed into one multiprocessing.shared_memory block.
+    The process that creates the block passes (name, specs) to the other processes,
+    which attach to the same memory without copying.
+
+    Parameters:
+    ----------
+    specs: {str: (tuple, np.dtype)}
+        Shape and dtype of each array
+
+    name: str, optional
+        Name of an existing block to attach to. If None, a new block is created
+    '''
+    ALIGNMENT = 64
+
+    def __init__(self, specs, name=None):
+        self.specs = specs
+        offsets, size = {}, 0
+        for array_name, (shape, dtype) in specs.items():
+            offsets[array_name] = size
+            nbytes = int(np.prod(shape)) * np.dtype(dtype).itemsize
+            size += -(-nbytes // self.ALIGNMENT) * self.ALIGNMENT
+
+        self._is_owner = name is None
+        if self._is_owner:
+            self.memory = shared_memory.SharedMemory(create=True, size=max(size, 1))
+        else:
+            self.memory = shared_memory.SharedMemory(name=name)
+        self.name = self.memory.name
+        self.arrays = {array_name: np.ndarray(shape, dtype=dtype, buffer=self.memory.buf,
+                                              offset=offsets[array_name])
+                       for array_name, (shape, dtype) in specs.items()}
+
+    def __getitem__(self, array_name):
+        return self.arrays[array_name]
+
+    def close(self):
+        '''
+        Release the arrays. The block is freed when its creator closes it
+        '''
+        self.arrays = {}
+        self.memory.close()
+        if self._is_owner:
+            self.memory.unlink()
+
+def _run_worker(connection, env_ids, seeds, gym_kwargs, shared_name, shared_specs, auto_reset):
+    '''
+    Loop of a worker process of BattlesnakeVectorEnv. The worker owns the gyms of env_ids and
+    writes their results into the shared arrays. If auto_reset, the games that are over after
+    a step are reset: their observation is the first observation of the next game while the
+    reward, done and info are the ones of the last turn.
+
+    Commands are (command, env_ids) tuples received from connection:
+    - ("reset", [int]) and ("step", [int]): reset or step the given games (all the games of the
+      worker if None), reading the actions from the shared arrays. The worker replies with
+      ("ok", env_ids) once the results are written, or ("error", (env_ids, traceback)) if a gym raised
+    - ("close", None): exit
+    '''
+    shared = SharedArrays(shared_specs, name=shared_name)
+    try:
+        envs = {env_id: BattlesnakeGym(seed=seed, **gym_kwargs) for env_id, seed in zip(env_ids, seeds)}
+        observations, actions = shared["observations"], shared["actions"]
+        rewards, dones = shared["rewards"], shared["dones"]
+        outcomes, health, turns = shared["outcomes"], shared["health"], shared["turns"]
+        game_done = shared["game_done"]
+        while True:
+            command, command_env_ids = connection.recv()
+            if command == "close":
+                break
+            if command_env_ids is None:
+                command_env_ids = env_ids
+            try:
+                for env_id in command_env_ids:
+                    env = envs[env_id]
+                    if command == "reset":
+                        _, reward, done, info = env.reset(out=observations[env_id])
+                    else:
+                        _, reward, done, info = env.step(actions[env_id], out=observations[env_id])
+                    rewards[env_id] = [reward.get(i, 0) for i in range(env.number_of_snakes)]
+                    dones[env_id] = [done[i] for i in range(env.number_of_snakes)]
+                    outcomes[env_id] = info["outcomes"]
+                    health[env_id] = info["health"]
+                    turns[env_id] = info["current_turn"]
+                    number_of_snakes_alive = env.number_of_snakes - sum(done.values())
+                    game_done[env_id] = number_of_snakes_alive == 0 or \
+                        (env.number_of_snakes > 1 and number_of_snakes_alive <= 1)
+                    if auto_reset and command == "step" and game_done[env_id]:
+                        env.reset(out=observations[env_id])
+            except Exception:
+                connection.send(("error", (command_env_ids, traceback.format_exc())))
+            else:
+                connection.send(("ok", command_env_ids))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        shared.close()
+        connection.close()
+
+class BattlesnakeVectorEnv:
+    '''
+    Steps many BattlesnakeGym games in worker processes, so that simulation uses several cores.
+    Each worker owns a contiguous slice of the games. The observations, rewards, dones and
+    the compact info of every game live in shared memory (see SharedArrays): the workers write
+    the results of step and reset directly into them, and the commands sent through the pipes
+    only contain game indexes. Nothing is pickled per step apart from these small messages.
+
+    The arrays returned by step and reset are views of the shared memory, so they are
+    overwritten by the next call. Copy them to keep them.
+
+    Parameters:
+    ----------
+    number_of_envs: int
+
+    number_of_workers: int, optional
+        Number of worker processes, by default one per core (and at most one per game)
+
+    seed: int, optional
+        Seed of the games. Each game gets an independent seed, see get_env_seeds
+
+    dtype: np.dtype, optional
+        dtype of the observations. By default, np.uint8 for flat observations
+        and np.float32 for bordered observations
+
+    start_method: str, optional
+        Start method of the worker processes (e.g., "fork" or "spawn"), see multiprocessing.get_context
+
+    auto_reset: bool, default False
+        Reset the games that are over at the end of step. Their observation is then the first
+        observation of the next game, while their reward, done and info are the ones of the last turn
+
+    **gym_kwargs:
+        Arguments of each BattlesnakeGym (e.g., observation_type, map_size, number_of_snakes, rewards)
+    '''
+    def __init__(self, number_of_envs, number_of_workers=None, seed=None, dtype=None,
+                 start_method=None, auto_reset=False, **gym_kwargs):
+        self.number_of_envs = number_of_envs
+        self.auto_reset = auto_reset
+        if number_of_workers is None:
+            number_of_workers = os.cpu_count() or 1
+        self.number_of_workers = max(1, min(number_of_workers, number_of_envs))
+
+        # Gym used to get the spaces, it is never stepped
+        env = BattlesnakeGym(**gym_kwargs)
+        self.observation_space = env.observation_space
+        self.action_space = env.action_space
+        self.number_of_snakes = env.number_of_snakes
+        if dtype is None:
+            dtype = np.uint8 if "flat" in env.observation_type else np.float32
+
+        N, S = number_of_envs, self.number_of_snakes
+        self._shared = SharedArrays({"observations": ((N,) + self.observation_space.shape, dtype),
+                                     "actions": ((N, S), np.int64),
+                                     "rewards": ((N, S), np.float32),
+                                     "dones": ((N, S), bool),
+                                     "outcomes": ((N, S), np.int8),
+                                     "health": ((N, S), np.int32),
+                                     "turns": ((N,), np.int32),
+                                     "game_done": ((N,), bool)})
+
+        self.env_seeds = self.get_env_seeds(seed, number_of_envs)
+        self.worker_env_ids = [env_ids.tolist() for env_ids in
+                               np.array_split(np.arange(number_of_envs), self.number_of_workers)]
+        # Index of the worker that owns each game
+        self.env_workers = np.repeat(np.arange(self.number_of_workers),
+                                     [len(env_ids) for env_ids in self.worker_env_ids])
+
+        context = multiprocessing.get_context(start_method)
+        self._connections, self._processes = [], []
+        for env_ids in self.worker_env_ids:
+            connection, worker_connection = context.Pipe()
+            process = context.Process(target=_run_worker, daemon=True,
+                                      args=(worker_connection, env_ids,
+                                            [self.env_seeds[env_id] for env_id in env_ids],
+                                            gym_kwargs, self._shared.name, self._shared.specs,
+                                            auto_reset))
+            process.start()
+            worker_connection.close()
+            self._connections.append(connection)
+            self._processes.append(process)
+        # Number of commands sent to each worker that were not answered yet
+        self._pending = [0] * self.number_of_workers
+        self.closed = False
+
+    @staticmethod
+    def get_env_seeds(seed, number_of_envs):
+        '''
+        Get the seed of each game of a BattlesnakeVectorEnv
+
+        Returns:
+        --------
+        seeds: [int] or [None]
+            Seeds derived from seed with np.random.SeedSequence, or None for every game if seed is None
+        '''
+        if seed is None:
+            return [None] * number_of_envs
+        return [int(child.generate_state(1)[0])
+                for child in np.random.SeedSequence(seed).spawn(number_of_envs)]
+
+    def _send(self, worker, command, env_ids=None):
+        self._connections[worker].send((command, env_ids))
+        self._pending[worker] += 1
+
+    def _receive(self, worker):
+        '''
+        Helper function to get the reply of a worker
+
+        Returns:
+        --------
+        env_ids: [int]
+            The games of the command
+        error: str or None
+            The traceback of the worker if the command failed
+        '''
+        status, result = self._connections[worker].recv()
+        self._pending[worker] -= 1
+        if status == "error":
+            return result
+        return result, None
+
+    @staticmethod
+    def _raise_errors(errors):
+        '''
+        Helper function to raise the first of the (worker, traceback) errors of the workers
+        '''
+        if len(errors) > 0:
+            raise RuntimeError("Worker {} failed:\n{}".format(*errors[0]))
+
+    def _run(self, command, env_ids=None):
+        '''
+        Helper function to run a command on the games env_ids (all games if None)
+        and wait for the workers
+        '''
+        if any(self._pending):
+            raise RuntimeError("Games are still being stepped asynchronously, call recv first")
+        if env_ids is None:
+            workers, worker_env_ids = range(self.number_of_workers), [None] * self.number_of_workers
+        else:
+            env_ids = np.asarray(env_ids, dtype=np.int64)
+            workers = np.unique(self.env_workers[env_ids]).tolist()
+            worker_env_ids = [env_ids[self.env_workers[env_ids] == worker].tolist() for worker in workers]
+        for worker, ids in zip(workers, worker_env_ids):
+            self._send(worker, command, ids)
+        # Wait for all the workers before raising so that no reply is left pending
+        errors = []
+        for worker in workers:
+            _, error = self._receive(worker)
+            if error is not None:
+                errors.append((worker, error))
+        self._raise_errors(errors)
+
+    def _get_results(self, env_ids=None):
+        '''
+        Helper function to get the results of the games env_ids (views of all the games if None)
+        '''
+        results = [self._shared[name] for name in ["observations", "rewards", "dones", "turns",
+                                                   "outcomes", "health", "game_done"]]
+        if env_ids is not None:
+            results = [array[env_ids] for array in results]
+        observation, reward, done, turns, outcomes, health, game_done = results
+        info = {"current_turn": turns, "outcomes": outcomes, "health": health,
+                "game_done": game_done}
+        return observation, reward, done, info
+
+    def reset(self, env_ids=None):
+        '''
+        Reset the games env_ids (all the games if None)
+
+        Returns:
+        --------
+        observation, reward, done, info of all the games, see step
+        '''
+        self._run("reset", env_ids)
+        return self._get_results()
+
+    def step(self, actions):
+        '''
+        Step every game
+
+        Parameters:
+        ----------
+        actions: np.array(number_of_envs, number_of_snakes)
+
+        Returns:
+        --------
+        observation: np.array(number_of_envs, observation_space.shape)
+
+        reward: np.array(number_of_envs, number_of_snakes)
+
+        done: np.array(number_of_envs, number_of_snakes)
+            Whether each snake is dead
+
+        info: {}
+            current_turn: np.array(number_of_envs)
+            outcomes: np.array(number_of_envs, number_of_snakes) of Outcome codes
+            health: np.array(number_of_envs, number_of_snakes)
+            game_done: np.array(number_of_envs)
+                Whether each game is over (1 or less snakes alive). If auto_reset,
+                these games were reset after the turn
+        '''
+        self._shared["actions"][:] = np.reshape(actions, (self.number_of_envs, self.number_of_snakes))
+        self._run("step")
+        return self._get_results()
+
+    def close(self):
+        '''
+        Stop the workers and free the shared memory
+        '''
+        if self.closed:
+            return
+        for worker, process in enumerate(self._processes):
+            if process.is_alive():
+                try:
+                    self._connections[worker].send(("close", None))
+                except (BrokenPipeError, OSError):
+                    pass
+        for connection, process in zip(self._connections, self._processes):
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+            connection.close()
+        self._shared.close()
+        self.closed = True
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __del__(self):
+        if not getattr(self, "closed", True):
+            self.close()
+
+class BattlesnakeEnvPool(BattlesnakeVectorEnv):
+    '''
+    Asynchronous BattlesnakeVectorEnv: send starts a turn of some games and returns immediately,
+    and recv returns the games whose turn is finished, in the order the workers finish them.
+    Policy inference on the games returned by recv can then run while the workers simulate
+    the games that were sent. The games that are over are reset automatically (see auto_reset).
+
+    Typical loop:
+        env_ids = np.arange(pool.number_of_envs)
+        observation, _, _, _ = pool.reset()
+        pool.send(policy(observation), env_ids)
+        while training:
+            env_ids, observation, reward, done, info = pool.recv(min_ready)
+            pool.send(policy(observation), env_ids)
+
+    Parameters:
+    ----------
+    Same as BattlesnakeVectorEnv, with auto_reset always enabled
+    '''
+    def __init__(self, number_of_envs, number_of_workers=None, seed=None, dtype=None,
+                 start_method=None, **gym_kwargs):
+        super().__init__(number_of_envs, number_of_workers, seed=seed, dtype=dtype,
+                         start_method=start_method, auto_reset=True, **gym_kwargs)
+        self._is_stepping = np.zeros(number_of_envs, dtype=bool)
+        self._ready_env_ids = []
+
+    def send(self, actions, env_ids=None):
+        '''
+        Start a turn of the games env_ids without waiting for the workers
+
+        Parameters:
+        ----------
+        actions: np.array(len(env_ids), number_of_snakes)
+
+        env_ids: [int], optional
+            All the games by default. The games must not be stepping already
+        '''
+        if env_ids is None:
+            env_ids = np.arange(self.number_of_envs)
+        env_ids = np.asarray(env_ids, dtype=np.int64).reshape(-1)
+        if len(np.unique(env_ids)) != len(env_ids) or self._is_stepping[env_ids].any():
+            raise ValueError("Games can only be sent once until they are received")
+        self._shared["actions"][env_ids] = np.reshape(actions, (len(env_ids), self.number_of_snakes))
+        self._is_stepping[env_ids] = True
+
+        workers = self.env_workers[env_ids]
+        for worker in np.unique(workers).tolist():
+            self._send(worker, "step", env_ids[workers == worker].tolist())
+
+    def recv(self, min_ready=1):
+        '''
+        Wait until at least min_ready of the games that were sent finished their turn
+        (or until all of them did)
+
+        If a worker failed, a RuntimeError is raised. The games of the failed command can be
+        sent again (after resetting them), and the games that finished their turn before
+        the error are returned by the next recv.
+
+        Returns:
+        --------
+        env_ids: np.array(number_of_ready_games)
+            The games that finished their turn, possibly more than min_ready
+
+        observation, reward, done, info:
+            The results of these games (copies), indexed like env_ids. See BattlesnakeVectorEnv.step
+        '''
+        errors = []
+        while len(self._ready_env_ids) < min_ready and len(errors) == 0:
+            workers = [worker for worker in range(self.number_of_workers) if self._pending[worker] > 0]
+            if len(workers) == 0:
+                break
+            ready_connections = wait([self._connections[worker] for worker in workers])
+            for worker in workers:
+                while self._pending[worker] > 0 and self._connections[worker] in ready_connections \
+                        and self._connections[worker].poll():
+                    env_ids, error = self._receive(worker)
+                    if error is None:
+                        self._ready_env_ids.extend(env_ids)
+                    else:
+                        self._is_stepping[env_ids] = False
+                        errors.append((worker, error))
+        self._raise_errors(errors)
+        if len(self._ready_env_ids) == 0:
+            raise RuntimeError("No game was sent, call send first")
+
+        env_ids = np.array(self._ready_env_ids, dtype=np.int64)
+        self._ready_env_ids = []
+        self._is_stepping[env_ids] = False
+        return (env_ids,) + self._get_results(env_ids)
@@ -0,0 +1,88 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# 
+# Licensed under the Apache License, Version 2.0 (the "License").
+# You may not use this file except in compliance with the License.
+# A copy of the License is located at
+# 
+#     http://www.apache.org/licenses/LICENSE-2.0
+# 
+# or in the "license" file accompanying this file. This file is distributed 
+# on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either 
+# express or implied. See the License for the specific language governing 
+# permissions and limitations under the License.
+
+
+import numpy as np
+
+class ZobristKeys:
+    '''
+    Random 64-bit keys to hash the games of a map size and number of snakes
+    (https://en.wikipedia.org/wiki/Zobrist_hashing).
+    The hash of a game is the XOR of the keys of its features, so it can be updated in O(1)
+    when a feature is added or removed (e.g., a snake moves or a food is eaten).
+
+    The features are:
+    - each segment of snake k on cell c with the direction of the next segment towards the head
+      (STACKED if the next segment is on the same cell and HEAD for the head). Together, the
+      segments describe the full body of the snake.
+    - each food on cell c
+    - the health, initial body stacking counter and ate_food flag of each snake that is alive
+    - the turn, quantised to NUMBER_OF_TURN_KEYS values
+
+    The keys are generated from a fixed seed so that the hashes of different gyms with the
+    same map size and number of snakes can be compared.
+
+    Parameters:
+    ----------
+    map_size: (int, int)
+    number_of_snakes: int
+    seed: int, default 0
+    '''
+    STACKED = 4
+    HEAD = 5
+    NUMBER_OF_SEGMENT_DIRECTIONS = 6 # Snake.UP, Snake.DOWN, Snake.LEFT, Snake.RIGHT, STACKED, HEAD
+    MAX_HEALTH = 100
+    MAX_BODY_STACKING = 2
+    NUMBER_OF_TURN_KEYS = 1024
+
+    _cache = {}
+
+    def __init__(self, map_size, number_of_snakes, seed=0):
+        self.map_size = tuple(map_size)
+        self.number_of_snakes = number_of_snakes
+        number_of_cells = map_size[0] * map_size[1]
+
+        random_state = np.random.RandomState(seed)
+        def get_keys(*shape):
+            return random_state.randint(0, 2**64, size=shape, dtype=np.uint64).tolist()
+
+        # Python ints are used because they are faster than numpy scalars for single XORs
+        self.segments = get_keys(number_of_snakes, number_of_cells, self.NUMBER_OF_SEGMENT_DIRECTIONS)
+        self.food = get_keys(number_of_cells)
+        self.health = get_keys(number_of_snakes, self.MAX_HEALTH + 1)
+        self.body_stacking = get_keys(number_of_snakes, self.MAX_BODY_STACKING + 1)
+        self.ate_food = get_keys(number_of_snakes)
+        self.turn = get_keys(self.NUMBER_OF_TURN_KEYS)
+
+    @classmethod
+    def get(cls, map_size, number_of_snakes):
+        '''
+        Get the shared keys of a map size and number of snakes
+        '''
+        key = (tuple(map_size), number_of_snakes)
+        if key not in cls._cache:
+            cls._cache[key] = ZobristKeys(map_size, number_of_snakes)
+        return cls._cache[key]
+
+    def get_snake_key(self, index, health, body_stacking, ate_food):
+        '''
+        Get the key of the health, initial body stacking and ate_food flag of a snake that is alive
+        '''
+        key = self.health[index][min(max(health, 0), self.MAX_HEALTH)]
+        key ^= self.body_stacking[index][min(body_stacking, self.MAX_BODY_STACKING)]
+        if ate_food:
+            key ^= self.ate_food[index]
+        return key
+
+    def get_turn_key(self, turn_count):
+        return self.turn[turn_count % self.NUMBER_OF_TURN_KEYS]
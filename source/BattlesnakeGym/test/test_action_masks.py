@@ -0,0 +1,77 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License").
+# You may not use this file except in compliance with the License.
+# A copy of the License is located at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# or in the "license" file accompanying this file. This file is distributed
+# on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either
+# express or implied. See the License for the specific language governing
+# permissions and limitations under the License.
+
+
+import unittest
+
+import numpy as np
+
+from battlesnake_gym.snake_gym import BattlesnakeGym
+from battlesnake_gym.batched_gym import BatchedBattlesnakeGym
+from battlesnake_gym.snake import Snake
+from battlesnake_gym.transition import transition
+
+U, D, L, R = Snake.UP, Snake.DOWN, Snake.LEFT, Snake.RIGHT
+
+class TestActionMasks(unittest.TestCase):
+    def test_masks(self):
+        env = BattlesnakeGym(map_size=(5, 5), number_of_snakes=3,
+                             snake_spawn_locations=[(0, 0), (2, 2), (4, 4)])
+        env.reset()
+        masks = env.action_masks()
+        self.assertEqual(masks.shape, (3, 4))
+        self.assertEqual(list(masks[0]), [0, 1, 0, 1]) # Walls
+        self.assertEqual(list(masks[2]), [1, 0, 1, 0]) # Walls
+
+        env.step([D, R, L])
+        env.step([D, R, L])
+        env.step([R, U, L]) # Snake 0: (2, 1), (1, 0), (2, 0), Snake 1: (1, 4), (2, 4), (2, 3)
+        self.assertEqual(list(env.action_masks(kinds=("forbidden",))[0]), [1, 1, 0, 1])
+        self.assertEqual(list(env.action_masks(kinds=("wall",))[1]), [1, 1, 1, 0])
+        # Snake 0 would move into its own neck or snake 1's body
+        self.assertEqual(list(env.action_masks(kinds=("body",))[0]), [1, 1, 0, 1])
+        with self.assertRaises(ValueError):
+            env.action_masks(kinds=("unknown",))
+
+    def test_head_to_head_risk(self):
+        env = BattlesnakeGym(map_size=(7, 7), number_of_snakes=2,
+                             snake_spawn_locations=[(3, 1), (3, 3)])
+        env.reset()
+        masks = env.action_masks(kinds=("head_to_head_risk",))
+        # Both snakes have the same length and could meet in (3, 2)
+        self.assertEqual(list(masks[0]), [1, 1, 1, 0])
+        self.assertEqual(list(masks[1]), [1, 1, 0, 1])
+
+    def test_allowed_moves_are_safe(self):
+        '''
+        Test that the allowed moves never hit a wall, a body or the neck of the snake
+        '''
+        for seed in range(10):
+            np.random.seed(seed)
+            env = BattlesnakeGym(map_size=(7, 7), number_of_snakes=3)
+            env.reset()
+            for _ in range(30):
+                masks = env.action_masks(kinds=("forbidden", "wall", "body"))
+                state = env.snapshot()
+                for i in np.flatnonzero(state.is_alive):
+                    for action in np.flatnonzero(masks[i]):
+                        actions = np.random.randint(0, 4, 3)
+                        actions[i] = action
+                        _, outcomes, _ = transition(state, actions)
+                        self.assertNotIn(BatchedBattlesnakeGym.OUTCOMES[outcomes[i]],
+                                         ["Forbidden move", "Snake hit wall",
+                                          "Snake hit body - hit itself", "Snake hit body - hit other"])
+                env.step(np.random.randint(0, 4, 3))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,160 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License").
+# You may not use this file except in compliance with the License.
+# A copy of the License is located at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# or in the "license" file accompanying this file. This file is distributed
+# on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either
+# express or implied. See the License for the specific language governing
+# permissions and limitations under the License.
+
+import unittest
+
+import numpy as np
+
+from battlesnake_gym.snake_gym import BattlesnakeGym
+from battlesnake_gym.batched_gym import BatchedBattlesnakeGym
+from battlesnake_gym.snake import Snake
+
+class TestBatchedBattlesnakeGym(unittest.TestCase):
+    '''
+    Test that the BatchedBattlesnakeGym resolves turns in the same way as the BattlesnakeGym.
+    The food of the BattlesnakeGym is copied into the batched games after each turn
+    because food is spawned randomly.
+    '''
+
+    def _simulate_both(self, snake_location, actions_per_game, map_size=(7, 7)):
+        number_of_games = len(actions_per_game)
+        number_of_snakes = len(snake_location)
+        batched_env = BatchedBattlesnakeGym(number_of_games, map_size=map_size,
+                                            number_of_snakes=number_of_snakes,
+                                            snake_spawn_locations=snake_location,
+                                            seed=0)
+        batched_env.reset()
+        envs = []
+        for game_id in range(number_of_games):
+            env = BattlesnakeGym(map_size=map_size, number_of_snakes=number_of_snakes,
+                                 snake_spawn_locations=snake_location)
+            env.reset()
+            batched_env.food[game_id, 1:-1, 1:-1] = env.food.get_food_map()
+            envs.append(env)
+
+        for turn in range(len(actions_per_game[0])):
+            actions = np.array([actions[turn] for actions in actions_per_game])
+            observation, reward, done, info = batched_env.step(actions)
+            for game_id, env in enumerate(envs):
+                env_observation, env_reward, env_done, env_info = env.step(actions[game_id])
+                self.assertEqual(info["snake_info"][game_id], env_info["snake_info"])
+                self.assertEqual(batched_env.get_outcome_strings(info["outcomes"][game_id]),
+                                 env_info["snake_info"])
+                self.assertEqual(list(reward[game_id]), [env_reward[i] for i in range(number_of_snakes)])
+                self.assertEqual(list(done[game_id]), [env_done[i] for i in range(number_of_snakes)])
+                self.assertEqual(info["snake_health"][game_id], env_info["snake_health"])
+                self.assertEqual(list(info["health"][game_id]), list(env_info["health"]))
+                env_food = env.food.get_food_map()
+                batched_food = batched_env.food[game_id, 1:-1, 1:-1]
+                self.assertTrue(np.array_equal(observation[game_id, :, :, 1:], env_observation[:, :, 1:]))
+                self.assertTrue(np.array_equal(observation[game_id, :, :, 0], batched_food))
+                batched_food[:] = env_food
+        return batched_env, envs
+
+    def test_same_outcomes_as_gym(self):
+        '''
+        Test head-to-head fights, body hits, forbidden moves and wall hits in different games
+        '''
+        U, D, L, R = Snake.UP, Snake.DOWN, Snake.LEFT, Snake.RIGHT
+        snake_location = [(3, 1), (3, 5), (0, 3)]
+        actions_per_game = [
+            [[R, L, D], [R, L, D], [R, L, L], [U, U, L]],  # Heads swap, equal sizes
+            [[R, L, R], [R, L, R], [D, U, R]],             # Same tile, equal sizes
+            [[U, U, D], [U, L, D], [R, L, D], [L, R, L]],  # Body hits and forbidden moves
+            [[L, R, U], [L, R, U], [U, D, U]],             # Wall hits
+        ]
+        self._simulate_both(snake_location, [actions + [[U, U, U]] * (4 - len(actions))
+                                             for actions in actions_per_game])
+
+    def test_random_games(self):
+        '''
+        Test long random games
+        '''
+        rng = np.random.RandomState(0)
+        snake_location = [(0, 0), (2, 2), (4, 4), (6, 6)]
+        actions_per_game = rng.randint(0, 4, size=(8, 60, 4)).tolist()
+        self._simulate_both(snake_location, actions_per_game)
+
+    def test_partial_reset(self):
+        '''
+        Test that only the games that are reset are modified
+        '''
+        env = BatchedBattlesnakeGym(3, observation_type="bordered-51s", map_size=(9, 9),
+                                    number_of_snakes=2, seed=1)
+        observation, _, _, _ = env.reset()
+        self.assertEqual(observation.shape, (3, 11, 11, 3))
+        self.assertTrue(np.all(observation[:, 0] == -1))
+        self.assertTrue(np.all(np.sum(observation[:, 1:-1, 1:-1, 1:] == 5, axis=(1, 2)) == 1))
+
+        env.step(np.full((3, 2), Snake.UP))
+        env.reset(game_ids=[1])
+        self.assertEqual(list(env.turn_count), [1, 0, 1])
+        self.assertEqual(list(env.lengths[1]), [1, 1])
+
+    def test_mixed_map_sizes(self):
+        '''
+        Test games of different map sizes stepped together against a BattlesnakeGym
+        with max-bordered observations for each game
+        '''
+        rng = np.random.RandomState(0)
+        map_sizes = [(7, 7), (11, 11), (19, 19), (7, 7)]
+        snake_location = [(0, 0), (2, 2), (4, 4), (6, 6)]
+        batched_env = BatchedBattlesnakeGym(len(map_sizes), observation_type="max-bordered-51s",
+                                            number_of_snakes=4, snake_spawn_locations=snake_location,
+                                            seed=0, map_sizes=map_sizes)
+        batched_env.reset()
+        envs = []
+        for game_id, map_size in enumerate(map_sizes):
+            env = BattlesnakeGym(observation_type="max-bordered-51s", map_size=map_size,
+                                 number_of_snakes=4, snake_spawn_locations=snake_location)
+            env.reset()
+            envs.append(env)
+
+        for turn in range(60):
+            for game_id, env in enumerate(envs):
+                b = (BatchedBattlesnakeGym.MAX_BORDER[0] - env.map_size[0]) // 2
+                batched_env.food[game_id, b:-b, b:-b] = env.food.get_food_map()
+            actions = rng.randint(0, 4, size=(len(map_sizes), 4))
+            observation, reward, done, info = batched_env.step(actions)
+            self.assertEqual(observation.shape, (len(map_sizes), 21, 21, 5))
+            for game_id, env in enumerate(envs):
+                env_observation, env_reward, env_done, env_info = env.step(actions[game_id])
+                self.assertEqual(info["snake_info"][game_id], env_info["snake_info"])
+                self.assertEqual(list(reward[game_id]), [env_reward[i] for i in range(4)])
+                self.assertEqual(list(done[game_id]), [env_done[i] for i in range(4)])
+                self.assertTrue(np.array_equal(observation[game_id, :, :, 1:], env_observation[:, :, 1:]))
+
+    def test_change_map_sizes_on_reset(self):
+        '''
+        Test that reset can change the map size of some of the games
+        '''
+        env = BatchedBattlesnakeGym(3, observation_type="max-bordered-51s", number_of_snakes=2,
+                                    seed=0, map_sizes=[(7, 7)] * 3)
+        observation, _, _, _ = env.reset()
+        self.assertTrue(np.all(np.sum(observation[..., 0] != -1, axis=(1, 2)) == 49))
+
+        observation, _, _, _ = env.reset(game_ids=[0, 2], map_sizes=[(19, 19), (11, 11)])
+        self.assertEqual(list(np.sum(observation[..., 0] != -1, axis=(1, 2))), [361, 49, 121])
+        self.assertEqual(env.map_sizes.tolist(), [[19, 19], [7, 7], [11, 11]])
+        heads = env.get_heads()
+        self.assertFalse(np.any(env._walls[env._game_index, heads]))
+
+        with self.assertRaises(ValueError):
+            env.reset(map_sizes=(21, 21))
+        with self.assertRaises(ValueError):
+            BatchedBattlesnakeGym(2, observation_type="flat-51s", map_sizes=[(7, 7), (11, 11)])
+        with self.assertRaises(ValueError):
+            BatchedBattlesnakeGym(2, map_size=(7, 7)).reset(map_sizes=(11, 11))
+
+if __name__ == '__main__':
+    unittest.main()
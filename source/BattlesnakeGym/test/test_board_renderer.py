@@ -0,0 +1,78 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License").
+# You may not use this file except in compliance with the License.
+# A copy of the License is located at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# or in the "license" file accompanying this file. This file is distributed
+# on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either
+# express or implied. See the License for the specific language governing
+# permissions and limitations under the License.
+
+import unittest
+
+import numpy as np
+
+from battlesnake_gym.snake_gym import BattlesnakeGym
+
+def draw_board_per_box(state, snake_colours, map_size):
+    '''
+    Reference drawing of the board one box at a time
+    '''
+    BOUNDARY, BOX_SIZE, SPACE_BETWEEN_BOXES = 20, 40, 10
+    snake_indexes = np.arange(1, len(snake_colours) + 1)
+    board = np.ones((map_size[0]*(BOX_SIZE + SPACE_BETWEEN_BOXES) + 2*BOUNDARY,
+                     map_size[1]*(BOX_SIZE + SPACE_BETWEEN_BOXES) + 2*BOUNDARY, 3),
+                    dtype=np.uint8) * 255
+    for i in range(map_size[0]):
+        for j in range(map_size[1]):
+            state_value = state[i][j]
+            t_i1 = BOUNDARY + i * (BOX_SIZE + SPACE_BETWEEN_BOXES)
+            t_j1 = BOUNDARY + j * (BOX_SIZE + SPACE_BETWEEN_BOXES)
+            box = board[t_i1:t_i1 + BOX_SIZE, t_j1:t_j1 + BOX_SIZE]
+            box[:] = 255 * 0.7
+            if state_value[0] >= 1:
+                box[8:-8, 8:-8] = [255, 0, 0]
+            if 1 in state_value[snake_indexes]:
+                box[:] = snake_colours[np.argmax(state_value[snake_indexes])]
+            if 5 in state_value[snake_indexes]:
+                box[:] = snake_colours[np.argmax(state_value[snake_indexes])]
+                box[10:-10, 10:-10] = [255, 255, 255]
+    return board
+
+class TestBoardRenderer(unittest.TestCase):
+    '''
+    Test that the rgb_array images are the same as drawing the board box by box
+    '''
+
+    def _play(self, observation_type):
+        np.random.seed(0)
+        env = BattlesnakeGym(observation_type=observation_type, map_size=(7, 9), number_of_snakes=3)
+        env.reset()
+        boards, snapshots = [env.render(mode="rgb_array")], [env.snapshot()]
+        states = [env._get_state()]
+        for _ in range(30):
+            _, _, dones, _ = env.step(np.random.randint(0, 4, size=3))
+            boards.append(env.render(mode="rgb_array"))
+            snapshots.append(env.snapshot())
+            states.append(env._get_state())
+            if sum(not done for done in dones.values()) <= 1:
+                break
+        return env, boards, snapshots, states
+
+    def test_same_as_per_box(self):
+        for observation_type in ["flat-51s", "bordered-num"]:
+            env, boards, _, states = self._play(observation_type)
+            colours = env.snakes.get_snake_colours()
+            for board, state in zip(boards, states):
+                self.assertTrue(np.array_equal(board, draw_board_per_box(state, colours, env.map_size)))
+
+    def test_render_episode(self):
+        for observation_type in ["flat-51s", "max-bordered-num"]:
+            env, boards, snapshots, _ = self._play(observation_type)
+            self.assertTrue(np.array_equal(env.render_episode(snapshots), np.stack(boards)))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,105 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License").
+# You may not use this file except in compliance with the License.
+# A copy of the License is located at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# or in the "license" file accompanying this file. This file is distributed
+# on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either
+# express or implied. See the License for the specific language governing
+# permissions and limitations under the License.
+
+import unittest
+
+import numpy as np
+
+from battlesnake_gym.snake_gym import BattlesnakeGym
+from battlesnake_gym.vector_env import BattlesnakeEnvPool
+from battlesnake_gym.rewards import Rewards
+from battlesnake_gym.snake import Snake
+
+class WallFailingRewards(Rewards):
+    '''
+    Rewards that fail in the worker when a snake hits a wall
+    '''
+    def get_reward(self, name, snake_id, episode):
+        if name == "hit_wall":
+            raise ValueError("No reward for hitting a wall")
+        return 0
+
+class TestEnvPool(unittest.TestCase):
+    '''
+    Test that the games of the pool are the same as stepping seeded gyms
+    and resetting them when they are over
+    '''
+
+    def test_same_as_gyms(self):
+        number_of_envs, number_of_snakes = 6, 2
+        gym_kwargs = dict(observation_type="bordered-51s", map_size=(5, 5),
+                          number_of_snakes=number_of_snakes)
+        envs = [BattlesnakeGym(seed=seed, **gym_kwargs)
+                for seed in BattlesnakeEnvPool.get_env_seeds(1, number_of_envs)]
+        rng = np.random.RandomState(0)
+        number_of_games = 0
+        with BattlesnakeEnvPool(number_of_envs, 3, seed=1, **gym_kwargs) as pool:
+            observation, _, _, _ = pool.reset()
+            for env_id, env in enumerate(envs):
+                self.assertTrue(np.array_equal(observation[env_id], env.reset()[0]))
+            env_ids = np.arange(number_of_envs)
+            for turn in range(100):
+                actions = rng.randint(0, 4, size=(len(env_ids), number_of_snakes))
+                pool.send(actions, env_ids)
+                for env_id, action in zip(env_ids, actions):
+                    envs[env_id].last_actions = action
+                env_ids, observation, reward, done, info = pool.recv(min_ready=1 + turn % 4)
+                self.assertGreaterEqual(len(env_ids), 1)
+                for k, env_id in enumerate(env_ids):
+                    env = envs[env_id]
+                    env_observation, env_reward, env_done, _ = env.step(env.last_actions)
+                    self.assertEqual(reward[k].tolist(), [env_reward[i] for i in range(number_of_snakes)])
+                    self.assertEqual(done[k].tolist(), [env_done[i] for i in range(number_of_snakes)])
+                    game_done = sum(not d for d in env_done.values()) <= 1
+                    self.assertEqual(info["game_done"][k], game_done)
+                    if game_done:
+                        env_observation = env.reset()[0]
+                        number_of_games += 1
+                    self.assertTrue(np.array_equal(observation[k], env_observation))
+        self.assertGreater(number_of_games, 0)
+
+    def test_misuse(self):
+        with BattlesnakeEnvPool(2, 2, map_size=(5, 5), number_of_snakes=2) as pool:
+            pool.reset()
+            with self.assertRaises(RuntimeError):
+                pool.recv()
+            pool.send(np.zeros((1, 2)), [0])
+            with self.assertRaises(ValueError):
+                pool.send(np.zeros((1, 2)), [0])
+            with self.assertRaises(RuntimeError):
+                pool.step(np.zeros((2, 2)))
+            env_ids, _, _, _, _ = pool.recv()
+            self.assertEqual(env_ids.tolist(), [0])
+
+    def test_worker_error(self):
+        '''
+        Test that the games of a failed worker can be sent again and that the other games are kept
+        '''
+        with BattlesnakeEnvPool(2, 2, map_size=(5, 5), number_of_snakes=2,
+                                snake_spawn_locations=[(0, 0), (4, 4)],
+                                rewards=WallFailingRewards()) as pool:
+            pool.reset()
+            # Game 0 hits a wall, game 1 moves inside the map
+            pool.send([[Snake.UP, Snake.UP], [Snake.DOWN, Snake.UP]], [0, 1])
+            with self.assertRaises(RuntimeError):
+                pool.recv(min_ready=2)
+            env_ids, _, _, _, _ = pool.recv()
+            self.assertEqual(env_ids.tolist(), [1])
+
+            pool.reset([0])
+            pool.send([[Snake.DOWN, Snake.UP], [Snake.RIGHT, Snake.LEFT]], [0, 1])
+            env_ids, _, _, _, _ = pool.recv(min_ready=2)
+            self.assertEqual(sorted(env_ids.tolist()), [0, 1])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,112 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License").
+# You may not use this file except in compliance with the License.
+# A copy of the License is located at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# or in the "license" file accompanying this file. This file is distributed
+# on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either
+# express or implied. See the License for the specific language governing
+# permissions and limitations under the License.
+
+
+import unittest
+
+import numpy as np
+
+from battlesnake_gym.snake_gym import BattlesnakeGym
+from battlesnake_gym.utils import FreeCellIndex
+
+class TestFreeCellIndex(unittest.TestCase):
+    def test_add_and_remove(self):
+        free_cells = FreeCellIndex((3, 4))
+        free_cells.remove((1, 2))
+        free_cells.remove((1, 2))
+        free_cells.remove((0, 0))
+        self.assertEqual(len(free_cells), 10)
+        self.assertFalse((1, 2) in free_cells)
+        free_cells.add((1, 2))
+        free_cells.add((1, 2))
+        self.assertEqual(len(free_cells), 11)
+        self.assertTrue((1, 2) in free_cells)
+
+        np.random.seed(0)
+        samples = free_cells.sample(11)
+        self.assertEqual(len(set(samples)), 11)
+        self.assertFalse((0, 0) in samples)
+
+    def test_uniform_sampling(self):
+        np.random.seed(0)
+        free_cells = FreeCellIndex((2, 2))
+        free_cells.remove((0, 1))
+        counts = {}
+        for _ in range(3000):
+            coord = free_cells.sample()[0]
+            counts[coord] = counts.get(coord, 0) + 1
+        self.assertEqual(set(counts), {(0, 0), (1, 0), (1, 1)})
+        for count in counts.values():
+            self.assertTrue(900 < count < 1100)
+
+    def test_reset_is_canonical(self):
+        '''
+        Test that reset gives the same samples for the same free cells whatever their history
+        '''
+        is_occupied = np.zeros((5, 5), dtype=bool)
+        is_occupied[1, 1:4] = True
+        free_cells1 = FreeCellIndex((5, 5))
+        free_cells2 = FreeCellIndex((5, 5))
+        for coord in [(1, 3), (1, 1), (1, 2), (4, 4)]:
+            free_cells2.remove(coord)
+        free_cells2.add((4, 4))
+        free_cells2.sample(5, random_state=np.random.default_rng(1))
+        free_cells1.reset(is_occupied)
+        free_cells2.reset(is_occupied)
+        self.assertEqual(free_cells1.sample(22, random_state=np.random.default_rng(0)),
+                         free_cells2.sample(22, random_state=np.random.default_rng(0)))
+
+    def test_set_order(self):
+        '''
+        Test that an index reordered with the order of another index samples like it
+        '''
+        is_occupied = np.zeros((4, 4), dtype=bool)
+        is_occupied[2, :3] = True
+        free_cells1 = FreeCellIndex((4, 4))
+        for coord in [(2, 1), (3, 3), (2, 0), (2, 2)]:
+            free_cells1.remove(coord)
+        free_cells1.add((3, 3))
+        free_cells1.sample(4, random_state=np.random.default_rng(1))
+        free_cells2 = FreeCellIndex((4, 4))
+        free_cells2.reset(is_occupied)
+        free_cells2.set_order(free_cells1.get_order())
+        self.assertEqual(free_cells1.sample(13, random_state=np.random.default_rng(0)),
+                         free_cells2.sample(13, random_state=np.random.default_rng(0)))
+        self.assertFalse((2, 1) in free_cells2)
+
+        free_cells2.remove((0, 0))
+        with self.assertRaises(ValueError):
+            free_cells2.set_order(free_cells1.get_order())
+
+    def test_gym_keeps_free_cells(self):
+        '''
+        Test that the free cells of the gym match the cells without snakes
+        '''
+        np.random.seed(0)
+        env = BattlesnakeGym(map_size=(7, 7), number_of_snakes=4)
+        env.reset()
+        for _ in range(30):
+            env.step(np.random.randint(0, 4, 4))
+            occupied = np.zeros((7, 7), dtype=bool)
+            for snake in env.snakes.snakes:
+                for i, j in snake.locations:
+                    if 0 <= i < 7 and 0 <= j < 7:
+                        occupied[i, j] = True
+            free_cells = env.snakes.free_cells
+            self.assertEqual(len(free_cells), np.sum(~occupied))
+            for i in range(7):
+                for j in range(7):
+                    self.assertEqual((i, j) in free_cells, not occupied[i, j])
+
+if __name__ == '__main__':
+    unittest.main()
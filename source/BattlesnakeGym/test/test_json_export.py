@@ -0,0 +1,70 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License").
+# You may not use this file except in compliance with the License.
+# A copy of the License is located at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# or in the "license" file accompanying this file. This file is distributed
+# on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either
+# express or implied. See the License for the specific language governing
+# permissions and limitations under the License.
+
+import json
+import unittest
+
+import numpy as np
+
+from battlesnake_gym.snake_gym import BattlesnakeGym
+from battlesnake_gym.batched_gym import BatchedBattlesnakeGym
+from battlesnake_gym.json_export import game_states_to_json_bytes
+
+class TestJsonExport(unittest.TestCase):
+    '''
+    Test that the JSON bytes are the same as serialising get_json
+    '''
+
+    def _dumps(self, game):
+        return json.dumps(game, separators=(",", ":")).encode()
+
+    def test_same_as_get_json(self):
+        np.random.seed(0)
+        env = BattlesnakeGym(map_size=(7, 9), number_of_snakes=3)
+        env.reset()
+        games, snapshots = [env.get_json()], [env.snapshot()]
+        self.assertEqual(env.get_json_bytes(), self._dumps(games[-1]))
+        for _ in range(40):
+            _, _, dones, _ = env.step(np.random.randint(0, 4, size=3))
+            games.append(env.get_json())
+            snapshots.append(env.snapshot())
+            self.assertEqual(env.get_json_bytes(), self._dumps(games[-1]))
+            if sum(not done for done in dones.values()) <= 1:
+                break
+        self.assertEqual(game_states_to_json_bytes(snapshots), self._dumps(games))
+
+    def test_batched_games(self):
+        rng = np.random.RandomState(0)
+        map_sizes = [(7, 7), (11, 11)]
+        snake_location = [(0, 0), (2, 2), (4, 4)]
+        batched_env = BatchedBattlesnakeGym(len(map_sizes), observation_type="max-bordered-51s",
+                                            number_of_snakes=3, snake_spawn_locations=snake_location,
+                                            map_sizes=map_sizes)
+        batched_env.reset()
+        envs = [BattlesnakeGym(map_size=map_size, number_of_snakes=3,
+                               snake_spawn_locations=snake_location) for map_size in map_sizes]
+        for turn in range(20):
+            for game_id, env in enumerate(envs):
+                if turn == 0:
+                    env.reset()
+                else:
+                    env.step(actions[game_id])
+                b = (BatchedBattlesnakeGym.MAX_BORDER[0] - env.map_size[0]) // 2
+                batched_env.food[game_id, b:-b, b:-b] = env.food.get_food_map()
+            self.assertEqual(batched_env.get_json_bytes(),
+                             self._dumps([env.get_json() for env in envs]))
+            actions = rng.randint(0, 4, size=(len(map_sizes), 3))
+            batched_env.step(actions)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,58 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License").
+# You may not use this file except in compliance with the License.
+# A copy of the License is located at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# or in the "license" file accompanying this file. This file is distributed
+# on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either
+# express or implied. See the License for the specific language governing
+# permissions and limitations under the License.
+
+
+import unittest
+
+import numpy as np
+
+from battlesnake_gym.snake_gym import BattlesnakeGym
+from battlesnake_gym.lazy_observation import LazyObservation
+
+class TestLazyObservation(unittest.TestCase):
+    def _compare(self, observation_type):
+        np.random.seed(0)
+        env = BattlesnakeGym(observation_type=observation_type, map_size=(7, 7), number_of_snakes=3)
+        observation, _, _, _ = env.reset(lazy=True)
+        self.assertIsInstance(observation, LazyObservation)
+        for turn in range(30):
+            expected = env._get_observation()
+            self.assertEqual(observation.shape, expected.shape)
+            if turn % 2 == 0:
+                for index in range(expected.shape[2]):
+                    self.assertTrue(np.array_equal(observation.get_plane(index), expected[:, :, index]))
+                self.assertFalse(observation.is_built())
+            self.assertTrue(np.array_equal(observation, expected))
+            self.assertEqual(np.asarray(observation).dtype, expected.dtype)
+            self.assertTrue(observation.is_built())
+            observation, _, _, _ = env.step(np.random.randint(0, 4, 3), lazy=True)
+
+    def test_observation_types(self):
+        self._compare("flat-51s")
+        self._compare("flat-num")
+        self._compare("bordered-51s")
+        self._compare("max-bordered-num")
+
+    def test_read_after_next_step(self):
+        np.random.seed(0)
+        env = BattlesnakeGym(map_size=(7, 7), number_of_snakes=2)
+        built_observation, _, _, _ = env.reset(lazy=True)
+        expected = np.array(built_observation)
+        observation, _, _, _ = env.step([0, 0], lazy=True)
+        env.step([0, 0], lazy=True)
+        self.assertTrue(np.array_equal(built_observation, expected))
+        with self.assertRaises(RuntimeError):
+            np.asarray(observation)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,56 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License").
+# You may not use this file except in compliance with the License.
+# A copy of the License is located at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# or in the "license" file accompanying this file. This file is distributed
+# on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either
+# express or implied. See the License for the specific language governing
+# permissions and limitations under the License.
+
+
+import unittest
+
+import numpy as np
+
+from battlesnake_gym.snake_gym import BattlesnakeGym
+
+class TestObservationBuffer(unittest.TestCase):
+    '''
+    Test that observations written in caller-provided buffers match the allocated observations
+    '''
+    def _compare(self, observation_type, dtype, map_size=(7, 7)):
+        np.random.seed(0)
+        env = BattlesnakeGym(observation_type=observation_type, map_size=map_size, number_of_snakes=3)
+        buffer = np.zeros(env.observation_space.shape, dtype=dtype)
+
+        observation, _, _, _ = env.reset(out=buffer)
+        self.assertIs(observation, buffer)
+        self.assertTrue(np.array_equal(buffer, env._get_observation()))
+        for _ in range(20):
+            observation, _, _, _ = env.step(np.random.randint(0, 4, 3), out=buffer)
+            self.assertIs(observation, buffer)
+            self.assertEqual(observation.dtype, dtype)
+            self.assertTrue(np.array_equal(buffer, env._get_observation()))
+
+    def test_flat(self):
+        self._compare("flat-51s", np.uint8)
+        self._compare("flat-num", np.float32)
+
+    def test_bordered(self):
+        self._compare("bordered-51s", np.float32)
+        self._compare("max-bordered-num", np.float32)
+        self._compare("max-bordered-51s", np.float32, map_size=(19, 19))
+
+    def test_invalid_buffer(self):
+        env = BattlesnakeGym(observation_type="bordered-51s", map_size=(7, 7), number_of_snakes=3)
+        with self.assertRaises(ValueError):
+            env.reset(out=np.zeros((7, 7, 4), dtype=np.float32))
+        with self.assertRaises(ValueError):
+            env.reset(out=np.zeros((9, 9, 4), dtype=np.uint8))
+
+if __name__ == '__main__':
+    unittest.main()
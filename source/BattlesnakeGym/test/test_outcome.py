@@ -0,0 +1,51 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License").
+# You may not use this file except in compliance with the License.
+# A copy of the License is located at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# or in the "license" file accompanying this file. This file is distributed
+# on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either
+# express or implied. See the License for the specific language governing
+# permissions and limitations under the License.
+
+import unittest
+
+import numpy as np
+
+from battlesnake_gym.snake_gym import BattlesnakeGym
+from battlesnake_gym.snake import Snake
+from battlesnake_gym.outcome import Outcome, OUTCOME_STRINGS, get_outcome_code
+
+class TestOutcome(unittest.TestCase):
+    '''
+    Test the outcome codes of the info of step and the string dict views
+    '''
+
+    def test_info_arrays_and_views(self):
+        env = BattlesnakeGym(map_size=(5, 5), number_of_snakes=2,
+                             snake_spawn_locations=[(0, 0), (4, 4)], food_spawn_locations=[(2, 2)])
+        _, _, _, info = env.reset()
+        self.assertEqual(info["snake_info"], {0: "Did not collide", 1: "Did not collide"})
+        self.assertEqual(info["snake_health"], {0: 100, 1: 100})
+
+        _, _, _, info = env.step([Snake.UP, Snake.LEFT])
+        self.assertEqual(info["outcomes"].tolist(), [Outcome.HIT_WALL, Outcome.DID_NOT_COLLIDE])
+        self.assertEqual(info["snake_info"], {0: "Snake hit wall", 1: "Did not collide"})
+        self.assertEqual(dict(info["snake_info"]), {0: "Snake hit wall", 1: "Did not collide"})
+        self.assertEqual(info["health"].tolist(), [info["snake_health"][0], 99])
+        self.assertEqual(info["max_len"].tolist(), [0, 1])
+        self.assertNotIn(2, info["snake_info"])
+
+        counts = np.bincount(info["outcomes"], minlength=len(Outcome))
+        self.assertEqual(counts[Outcome.HIT_WALL], 1)
+
+    def test_descriptions(self):
+        for outcome in Outcome:
+            self.assertEqual(outcome.description, OUTCOME_STRINGS[outcome])
+            self.assertEqual(get_outcome_code(outcome.description), outcome)
+
+if __name__ == '__main__':
+    unittest.main()
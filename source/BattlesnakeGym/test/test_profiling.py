@@ -0,0 +1,47 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License").
+# You may not use this file except in compliance with the License.
+# A copy of the License is located at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# or in the "license" file accompanying this file. This file is distributed
+# on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either
+# express or implied. See the License for the specific language governing
+# permissions and limitations under the License.
+
+
+import unittest
+
+import numpy as np
+
+from battlesnake_gym.snake_gym import BattlesnakeGym
+
+class TestProfiling(unittest.TestCase):
+    def test_profile_report(self):
+        np.random.seed(0)
+        env = BattlesnakeGym(map_size=(7, 7), number_of_snakes=2)
+        self.assertEqual(env.profile_report(), {})
+
+        env.enable_profiling()
+        env.reset()
+        for _ in range(5):
+            env.step(np.random.randint(0, 4, 2))
+        # Snapshots made outside of step are not a phase of step
+        env.snapshot()
+        report = env.profile_report(reset=True)
+        self.assertEqual(set(report), set(BattlesnakeGym.PROFILED_PHASES))
+        self.assertEqual(report["step"]["calls"], 5)
+        self.assertEqual(report["reset"]["calls"], 1)
+        self.assertEqual(report["observation"]["calls"], 6)
+        self.assertTrue(report["step"]["total_time"] >= report["move"]["total_time"] > 0)
+        self.assertEqual(env.profile_report()["step"]["calls"], 0)
+
+        env.disable_profiling()
+        self.assertEqual(env.profile_report(), {})
+        for method_name in BattlesnakeGym.PROFILED_PHASES.values():
+            self.assertFalse(method_name in vars(env))
+
+if __name__ == '__main__':
+    unittest.main()
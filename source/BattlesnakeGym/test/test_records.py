@@ -0,0 +1,202 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License").
+# You may not use this file except in compliance with the License.
+# A copy of the License is located at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# or in the "license" file accompanying this file. This file is distributed
+# on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either
+# express or implied. See the License for the specific language governing
+# permissions and limitations under the License.
+
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+
+from battlesnake_gym.snake_gym import BattlesnakeGym
+from battlesnake_gym import records as records_module
+from battlesnake_gym.records import GameRecordWriter, GameRecords, GameRecorder, \
+    encode_game_state, decode_game_state, encode_random_state, decode_random_state, \
+    pack_actions, unpack_actions
+
+class TestRecords(unittest.TestCase):
+    '''
+    Test that the recorded games are re-simulated exactly
+    '''
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "games.bsrec")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def _record(self, env, number_of_games, append=False, seed=0, keyframe_interval=64):
+        '''
+        Play random games and return the snapshots of every turn of each game
+        '''
+        rng = np.random.RandomState(seed)
+        games = []
+        with GameRecordWriter(self.path, append=append) as writer:
+            recorder = GameRecorder(env, writer, seed=seed, keyframe_interval=keyframe_interval)
+            for _ in range(number_of_games):
+                recorder.reset()
+                snapshots = [env.snapshot()]
+                for _ in range(200):
+                    # Random moves that avoid the walls, the bodies and moving backwards if possible
+                    masks = env.action_masks(("forbidden", "wall", "body")) + 1e-3
+                    actions = [rng.choice(4, p=mask / mask.sum()) for mask in masks]
+                    _, _, dones, _ = recorder.step(actions)
+                    snapshots.append(env.snapshot())
+                    if sum(not done for done in dones.values()) <= 1:
+                        break
+                games.append(snapshots)
+            recorder.end_game()
+        return games
+
+    def test_pack_actions(self):
+        actions = np.random.RandomState(0).randint(0, 4, size=(11, 3))
+        packed_actions = pack_actions(actions)
+        self.assertEqual(len(packed_actions), 9)
+        self.assertTrue(np.array_equal(unpack_actions(packed_actions, 11, 3), actions))
+        with self.assertRaises(ValueError):
+            pack_actions([[0, 4]])
+
+    def test_encode_game_state(self):
+        env = BattlesnakeGym(map_size=(7, 9), number_of_snakes=3, seed=0,
+                             food_spawn_locations=[(1, 2), (3, 4)])
+        env.reset()
+        for _ in range(10):
+            state = env.snapshot()
+            self.assertEqual(decode_game_state(encode_game_state(state)), state)
+            env.step(np.random.RandomState(0).randint(0, 4, size=3))
+
+    def test_replay(self):
+        env = BattlesnakeGym(map_size=(7, 7), number_of_snakes=3)
+        games = self._record(env, 5)
+        with GameRecords(self.path) as records:
+            self.assertEqual(len(records), 5)
+            for index, snapshots in enumerate(games):
+                record = records[index]
+                self.assertIsNone(record.initial_state)
+                self.assertEqual(record.number_of_turns, len(snapshots) - 1)
+                self.assertEqual(list(records.iter_states(index)), snapshots)
+            for index in [3, 0, 4]:
+                for turn in [0, len(games[index]) // 2, len(games[index]) - 1]:
+                    self.assertEqual(records.get_state(index, turn), games[index][turn])
+                self.assertEqual(records.get_state(index), games[index][-1])
+
+    def test_replay_initial_state(self):
+        env = BattlesnakeGym(map_size=(7, 7), number_of_snakes=2,
+                             snake_spawn_locations=[(1, 1), (5, 5)],
+                             food_spawn_locations=[(3, 3), (0, 6), (6, 0)])
+        games = self._record(env, 3)
+        with GameRecords(self.path) as records:
+            for index, snapshots in enumerate(games):
+                self.assertEqual(records[index].initial_state, snapshots[0])
+                self.assertEqual(list(records.iter_states(index)), snapshots)
+
+    def test_append(self):
+        games = self._record(BattlesnakeGym(map_size=(7, 7), number_of_snakes=2), 2)
+        games += self._record(BattlesnakeGym(map_size=(11, 11), number_of_snakes=4), 3,
+                              append=True, seed=1)
+        with GameRecords(self.path) as records:
+            self.assertEqual(len(records), 5)
+            self.assertEqual(records[4].map_size, (11, 11))
+            for index, snapshots in enumerate(games):
+                self.assertEqual(records.get_state(index), snapshots[-1])
+
+    def test_encode_random_state(self):
+        env = BattlesnakeGym(map_size=(7, 7), number_of_snakes=2, seed=3)
+        env.reset()
+        for _ in range(5):
+            env.step([0, 1])
+        random_state = env.get_random_state()
+        decoded_random_state = decode_random_state(encode_random_state(random_state))
+        self.assertEqual(decoded_random_state[0], random_state[0])
+        self.assertEqual(decoded_random_state[1], random_state[1][random_state[2]:])
+
+    def test_keyframes(self):
+        keyframe_interval = 3
+        env = BattlesnakeGym(map_size=(11, 11), number_of_snakes=2)
+        games = self._record(env, 6, keyframe_interval=keyframe_interval)
+        self.assertTrue(any(len(snapshots) > 2 * keyframe_interval for snapshots in games))
+        with GameRecords(self.path) as records:
+            for index, snapshots in enumerate(games):
+                self.assertEqual(records[index].keyframe_interval, keyframe_interval)
+                for k in range((len(snapshots) - 1) // keyframe_interval):
+                    state, _, _ = records.get_keyframe(index, k)
+                    self.assertEqual(state, snapshots[(k + 1) * keyframe_interval])
+                with self.assertRaises(IndexError):
+                    records.get_keyframe(index, (len(snapshots) - 1) // keyframe_interval)
+
+                for turn, snapshot in enumerate(snapshots):
+                    with mock.patch.object(records_module, "_simulate_turn",
+                                           wraps=records_module._simulate_turn) as simulate_turn:
+                        self.assertEqual(records.get_state(index, turn), snapshot)
+                    self.assertLess(simulate_turn.call_count, keyframe_interval)
+                start = len(snapshots) // 2
+                self.assertEqual(list(records.iter_states(index, start)), snapshots[start:])
+
+    def test_passive_recording(self):
+        '''
+        Test that the recorded games are played as in a gym without a recorder
+        '''
+        rng = np.random.RandomState(0)
+        for kwargs in [{}, {"snake_spawn_locations": [(1, 1), (9, 9)]}]:
+            env = BattlesnakeGym(map_size=(11, 11), number_of_snakes=2, seed=0, **kwargs)
+            other_env = BattlesnakeGym(map_size=(11, 11), number_of_snakes=2, **kwargs)
+            with GameRecordWriter(self.path) as writer:
+                recorder = GameRecorder(env, writer, keyframe_interval=2)
+                for seed in [5, 6]:
+                    other_env.set_random_state(env.get_random_state())
+                    recorder.reset(seed=seed)
+                    if recorder._is_reset_seeded():
+                        other_env.seed(seed)
+                        other_env.reset()
+                    else:
+                        other_env.reset()
+                        other_env.seed(seed)
+                    self.assertEqual(env.snapshot(), other_env.snapshot())
+                    for _ in range(50):
+                        masks = env.action_masks(("forbidden", "wall", "body")) + 1e-3
+                        actions = [rng.choice(4, p=mask / mask.sum()) for mask in masks]
+                        _, _, dones, _ = recorder.step(actions)
+                        other_env.step(actions)
+                        self.assertEqual(env.snapshot(), other_env.snapshot())
+                        if sum(not done for done in dones.values()) <= 1:
+                            break
+
+    def test_invalid_seed(self):
+        env = BattlesnakeGym(map_size=(7, 7), number_of_snakes=2)
+        with GameRecordWriter(self.path) as writer:
+            recorder = GameRecorder(env, writer)
+            for seed in [-1, 2**64, 1.5]:
+                with self.assertRaises(ValueError):
+                    recorder.reset(seed=seed)
+            recorder.reset(seed=2**64 - 1)
+            recorder.step([0, 1])
+            recorder.end_game()
+            with self.assertRaises(ValueError):
+                writer.write_game((7, 7), 2, -1, [[0, 1]])
+        with GameRecords(self.path) as records:
+            self.assertEqual(len(records), 1)
+            self.assertEqual(records[0].seed, 2**64 - 1)
+            self.assertEqual(records.get_state(0), env.snapshot())
+
+    def test_keyframe_interval_size(self):
+        env = BattlesnakeGym(map_size=(11, 11), number_of_snakes=2)
+        sizes = []
+        for keyframe_interval in [0, 20, 2]:
+            self._record(env, 4, keyframe_interval=keyframe_interval)
+            sizes.append(os.path.getsize(self.path))
+        self.assertLess(sizes[0], sizes[2])
+        self.assertLessEqual(sizes[1], sizes[2])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,114 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License").
+# You may not use this file except in compliance with the License.
+# A copy of the License is located at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# or in the "license" file accompanying this file. This file is distributed
+# on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either
+# express or implied. See the License for the specific language governing
+# permissions and limitations under the License.
+
+import unittest
+
+import numpy as np
+
+from battlesnake_gym.snake_gym import BattlesnakeGym
+from battlesnake_gym.batched_gym import BatchedBattlesnakeGym
+from battlesnake_gym.rewards import Rewards, SimpleRewards
+
+class UncompiledRewards(Rewards):
+    '''
+    Same rewards as a SimpleRewards that can only be computed with get_reward
+    '''
+    def __init__(self, reward_dict):
+        self.reward_dict = reward_dict
+
+    def get_reward(self, name, snake_id, episode):
+        return self.reward_dict[name]
+
+class EpisodeRewards(Rewards):
+    '''
+    Rewards that depend on the snake and the episode
+    '''
+    def get_reward(self, name, snake_id, episode):
+        return (snake_id + 1) * (10 if name == "another_turn" else 1) + episode[snake_id]
+
+class OverriddenRewards(SimpleRewards):
+    '''
+    SimpleRewards with a get_reward that does not read reward_dict
+    '''
+    def get_reward(self, name, snake_id, episode):
+        return 100 if name == "another_turn" else 0
+
+class TestRewards(unittest.TestCase):
+    '''
+    Test that the compiled rewards are the same as the rewards of get_reward
+    '''
+
+    def _play(self, rewards, seed=0, number_of_snakes=4):
+        env = BattlesnakeGym(map_size=(7, 7), number_of_snakes=number_of_snakes, rewards=rewards,
+                             seed=seed)
+        np.random.seed(seed)
+        env.reset()
+        episode_rewards = []
+        for turn in range(60):
+            np.random.seed(seed * 100 + turn)
+            actions = np.random.randint(0, 4, size=number_of_snakes)
+            _, reward, dones, _ = env.step(actions, episodes=[3] * number_of_snakes)
+            episode_rewards.append(reward)
+            if sum(not done for done in dones.values()) <= 1:
+                break
+        return episode_rewards
+
+    def test_compile_simple_rewards(self):
+        rewards = SimpleRewards()
+        rewards.reward_dict = {name: i + 0.5 for i, name in enumerate(rewards.reward_dict)}
+        for seed in range(5):
+            for number_of_snakes in [1, 4]:
+                self.assertEqual(self._play(rewards, seed, number_of_snakes),
+                                 self._play(UncompiledRewards(rewards.reward_dict), seed, number_of_snakes))
+
+    def test_integer_rewards(self):
+        for reward in self._play(SimpleRewards()):
+            for value in reward.values():
+                self.assertIs(type(value), int)
+
+    def test_overridden_get_reward(self):
+        '''
+        Test that a subclass of SimpleRewards that overrides get_reward is not compiled
+        '''
+        rewards = OverriddenRewards()
+        self.assertIsNone(rewards.compile())
+        episode_rewards = self._play(rewards)
+        values = [value for reward in episode_rewards for value in reward.values()]
+        self.assertIn(100, values)
+        self.assertEqual(set(values), {0, 100})
+
+    def test_recompile_on_change(self):
+        rewards = SimpleRewards()
+        before = rewards.compile().copy()
+        rewards.reward_dict["ate_food"] = 42
+        self.assertFalse(np.array_equal(before, rewards.compile()))
+        rewards.reward_dict = dict(rewards.reward_dict, won=7)
+        self.assertIn(7, rewards.compile())
+
+    def test_episode_rewards(self):
+        episode_rewards = self._play(EpisodeRewards())
+        for reward in episode_rewards[:-1]:
+            for i, value in reward.items():
+                self.assertIn(value, [0, (i + 1) * 10 + 3, (i + 1) * 11 + 6, i + 4])
+
+    def test_batched_episode_rewards(self):
+        snake_location = [(1, 1), (3, 3), (5, 5)]
+        batched_env = BatchedBattlesnakeGym(1, map_size=(7, 7), number_of_snakes=3,
+                                            snake_spawn_locations=snake_location,
+                                            rewards=EpisodeRewards(), seed=0)
+        batched_env.reset()
+        _, reward, _, _ = batched_env.step(np.array([[0, 0, 0]]), episodes=[3] * 3)
+        self.assertEqual(reward.tolist(), [[13, 23, 33]])
+
+if __name__ == '__main__':
+    unittest.main()
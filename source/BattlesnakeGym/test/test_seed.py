@@ -0,0 +1,92 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License").
+# You may not use this file except in compliance with the License.
+# A copy of the License is located at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# or in the "license" file accompanying this file. This file is distributed
+# on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either
+# express or implied. See the License for the specific language governing
+# permissions and limitations under the License.
+
+import random
+import unittest
+
+import numpy as np
+
+from battlesnake_gym.snake_gym import BattlesnakeGym
+
+class TestSeed(unittest.TestCase):
+    '''
+    Test that the games of a seeded gym only depend on the seed
+    '''
+
+    def _play(self, env, number_of_games=3):
+        rng = np.random.RandomState(0)
+        games = []
+        for _ in range(number_of_games):
+            env.reset()
+            games.append((env.snakes.get_snake_colours(), env.get_json()))
+            for _ in range(100):
+                _, _, dones, _ = env.step(rng.randint(0, 4, size=env.number_of_snakes))
+                games.append(env.get_json())
+                if sum(not done for done in dones.values()) <= 1:
+                    break
+        return games
+
+    def test_same_seed_same_games(self):
+        env1 = BattlesnakeGym(map_size=(7, 7), number_of_snakes=3, seed=5)
+        env2 = BattlesnakeGym(map_size=(7, 7), number_of_snakes=3)
+        env2.seed(5)
+        np.random.seed(0)
+        random.seed(0)
+        games = self._play(env1)
+        np.random.seed(1)
+        random.seed(1)
+        self.assertEqual(games, self._play(env2))
+
+    def test_different_seeds(self):
+        games = self._play(BattlesnakeGym(map_size=(7, 7), number_of_snakes=3, seed=0))
+        self.assertNotEqual(games, self._play(BattlesnakeGym(map_size=(7, 7), number_of_snakes=3, seed=1)))
+
+    def test_global_random_state_is_not_used(self):
+        env = BattlesnakeGym(map_size=(7, 7), number_of_snakes=3, seed=0)
+        np_random_state, random_state = np.random.get_state(), random.getstate()
+        self._play(env)
+        self.assertEqual(random.getstate(), random_state)
+        for value, expected_value in zip(np.random.get_state(), np_random_state):
+            self.assertTrue(np.array_equal(value, expected_value))
+
+    def test_interleaved_gyms(self):
+        '''
+        Test that gyms stepped in the same process do not share random state
+        '''
+        games = self._play(BattlesnakeGym(map_size=(7, 7), number_of_snakes=3, seed=2), 1)
+        env1 = BattlesnakeGym(map_size=(7, 7), number_of_snakes=3, seed=2)
+        env2 = BattlesnakeGym(map_size=(7, 7), number_of_snakes=3, seed=3)
+        env1.reset()
+        env2.reset()
+        interleaved_games = [(env1.snakes.get_snake_colours(), env1.get_json())]
+        rng = np.random.RandomState(0)
+        for _ in range(len(games) - 1):
+            env2.step(np.random.randint(0, 4, size=3))
+            env1.step(rng.randint(0, 4, size=3))
+            interleaved_games.append(env1.get_json())
+        self.assertEqual(games, interleaved_games)
+
+    def test_random_state_across_map_sizes(self):
+        '''
+        Test that a gym rebuilt with another map size can continue the random streams of the
+        previous gym (e.g., curriculum learning) instead of replaying the games of its seed
+        '''
+        env = BattlesnakeGym(map_size=(7, 7), number_of_snakes=3, seed=4)
+        self._play(env, 1)
+        resized_env = BattlesnakeGym(map_size=(11, 11), number_of_snakes=3, seed=4)
+        resized_env.set_random_state(env.get_random_state())
+        games = self._play(resized_env, 2)
+        self.assertNotEqual(games, self._play(BattlesnakeGym(map_size=(11, 11), number_of_snakes=3, seed=4), 2))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License").
+# You may not use this file except in compliance with the License.
+# A copy of the License is located at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# or in the "license" file accompanying this file. This file is distributed
+# on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either
+# express or implied. See the License for the specific language governing
+# permissions and limitations under the License.
+
+
+import random
+import unittest
+
+import numpy as np
+
+from battlesnake_gym.snake_gym import BattlesnakeGym
+
+class TestSnapshot(unittest.TestCase):
+    def _play(self, env, number_of_turns):
+        trajectory = []
+        for _ in range(number_of_turns):
+            actions = np.random.randint(0, 4, env.number_of_snakes)
+            observation, reward, _, info = env.step(actions)
+            trajectory.append((observation.copy(), reward, dict(info["snake_info"]), env.snapshot()))
+        return trajectory
+
+    def test_restore_replays_the_same_game(self):
+        '''
+        Test that a restored game continues exactly like the original game
+        '''
+        for seed in range(10):
+            np.random.seed(seed)
+            random.seed(seed)
+            env = BattlesnakeGym(map_size=(7, 7), number_of_snakes=4, seed=seed)
+            env.reset()
+            self._play(env, 3)
+            snapshot = env.snapshot()
+            # Continue with the free cells of a restored game
+            env.snakes.reset_free_cells()
+            np_random_state, random_state = np.random.get_state(), random.getstate()
+            gym_random_state = env.get_random_state()
+            trajectory = self._play(env, 40)
+
+            np.random.set_state(np_random_state)
+            random.setstate(random_state)
+            env.set_random_state(gym_random_state)
+            env.restore(snapshot)
+            self.assertEqual(env.snapshot(), snapshot)
+            for (observation1, reward1, info1, snapshot1), (observation2, reward2, info2, snapshot2) in zip(
+                    trajectory, self._play(env, 40)):
+                self.assertTrue(np.array_equal(observation1, observation2))
+                self.assertEqual(reward1, reward2)
+                self.assertEqual(info1, info2)
+                self.assertEqual(snapshot1, snapshot2)
+
+    def test_restore_in_another_gym(self):
+        np.random.seed(0)
+        env = BattlesnakeGym(map_size=(9, 9), number_of_snakes=3)
+        env.reset()
+        self._play(env, 5)
+        snapshot = env.snapshot()
+        self.assertEqual(len(snapshot.get_bodies()), 3)
+        self.assertTrue(np.array_equal(snapshot.get_food_map(), env.food.get_food_map()))
+
+        other_env = BattlesnakeGym(map_size=(9, 9), number_of_snakes=3)
+        other_env.restore(snapshot)
+        self.assertEqual(other_env.snapshot(), snapshot)
+        self.assertEqual(other_env.get_json(), env.get_json())
+        self.assertTrue(np.array_equal(other_env.snakes.occupancy, env.snakes.occupancy))
+
+        with self.assertRaises(ValueError):
+            BattlesnakeGym(map_size=(7, 7), number_of_snakes=3).restore(snapshot)
+
+if __name__ == '__main__':
+    unittest.main()
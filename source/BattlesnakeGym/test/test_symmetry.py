@@ -0,0 +1,148 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License").
+# You may not use this file except in compliance with the License.
+# A copy of the License is located at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# or in the "license" file accompanying this file. This file is distributed
+# on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either
+# express or implied. See the License for the specific language governing
+# permissions and limitations under the License.
+
+import importlib.util
+import os
+import unittest
+
+import numpy as np
+
+from battlesnake_gym.snake_gym import BattlesnakeGym
+from battlesnake_gym.state import pack_food_map
+from battlesnake_gym import symmetry
+
+class TestSymmetry(unittest.TestCase):
+    '''
+    Test that playing transformed actions from transformed positions gives the transformed observations
+    '''
+
+    def _transform_coordinate(self, coordinate, transform, map_size):
+        coordinate_map = np.zeros(map_size, dtype=bool)
+        coordinate_map[coordinate] = True
+        transformed_map = symmetry.transform_observation(coordinate_map, transform, axes=(0, 1))
+        return tuple(np.argwhere(transformed_map)[0])
+
+    def _copy_transformed_food(self, env, transformed_env, transform):
+        food_map = symmetry.transform_observation(env.food.get_food_map(), transform, axes=(0, 1))
+        state = transformed_env.snapshot()
+        transformed_env.restore(state._replace(food=pack_food_map(food_map)))
+
+    def test_games_are_symmetric(self):
+        map_size = (7, 7)
+        snake_location = [(0, 1), (3, 3), (5, 2)]
+        actions = np.random.RandomState(0).randint(0, 4, size=(20, 3))
+        for transform in range(symmetry.NUMBER_OF_TRANSFORMS):
+            env = BattlesnakeGym(observation_type="bordered-51s", map_size=map_size,
+                                 number_of_snakes=3, snake_spawn_locations=snake_location)
+            transformed_location = [self._transform_coordinate(location, transform, map_size)
+                                    for location in snake_location]
+            transformed_env = BattlesnakeGym(observation_type="bordered-51s", map_size=map_size,
+                                             number_of_snakes=3,
+                                             snake_spawn_locations=transformed_location)
+            env.reset()
+            transformed_env.reset()
+            for turn_actions in actions:
+                self._copy_transformed_food(env, transformed_env, transform)
+                masks = env.action_masks()
+                transformed_masks = transformed_env.action_masks()
+                self.assertTrue(np.array_equal(symmetry.transform_action_masks(masks, transform),
+                                               transformed_masks))
+
+                observation, _, dones, info = env.step(turn_actions)
+                transformed_observation, _, _, transformed_info = transformed_env.step(
+                    symmetry.transform_actions(turn_actions, transform))
+                self.assertEqual(info["snake_info"], transformed_info["snake_info"])
+                self.assertTrue(np.array_equal(
+                    symmetry.transform_observation(observation, transform)[:, :, 1:],
+                    transformed_observation[:, :, 1:]))
+                if sum(not done for done in dones.values()) <= 1:
+                    break
+
+    def test_views_and_inverse(self):
+        observations = np.arange(2 * 5 * 5 * 3).reshape((2, 5, 5, 3))
+        for transform in range(symmetry.NUMBER_OF_TRANSFORMS):
+            transformed = symmetry.transform_observation(observations, transform)
+            self.assertTrue(np.shares_memory(transformed, observations))
+            self.assertTrue(np.array_equal(transformed[1], symmetry.transform_observation(
+                observations[1], transform)))
+
+            inverse = [inverse for inverse in range(symmetry.NUMBER_OF_TRANSFORMS)
+                       if np.array_equal(symmetry.ACTION_PERMUTATIONS[inverse][
+                           symmetry.ACTION_PERMUTATIONS[transform]], symmetry.ACTIONS)][0]
+            self.assertTrue(np.array_equal(
+                symmetry.transform_observation(transformed, inverse), observations))
+            self.assertEqual(symmetry.transform_actions(symmetry.transform_actions(
+                [0, 1, 2, 3, 4], transform), inverse).tolist(), [0, 1, 2, 3, 4])
+
+    def test_transform_sample_batch(self):
+        '''
+        Test that the masks, logits and actions of an RLlib trajectory still match after a transform
+        '''
+        path = os.path.join(os.path.dirname(__file__), "..", "..", "RLlibEnv", "training",
+                            "training_src", "utils.py")
+        spec = importlib.util.spec_from_file_location("rllib_utils", path)
+        rllib_utils = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(rllib_utils)
+
+        map_height, number_of_steps = 7, 30
+        env = BattlesnakeGym(observation_type="bordered-51s", map_size=(5, 5),
+                             number_of_snakes=2, seed=0)
+        rng = np.random.default_rng(0)
+        observation, _, _, _ = env.reset()
+        observations, masks, actions = [], [], []
+        for _ in range(number_of_steps):
+            mask = env.action_masks()
+            observations.append(np.concatenate([mask[0], observation.reshape(-1)]))
+            masks.append(mask[0])
+            turn_actions = [rng.choice(np.flatnonzero(mask[i])) if mask[i].any() else 0
+                            for i in range(2)]
+            actions.append(turn_actions[0])
+            observation, _, dones, _ = env.step(turn_actions)
+            if any(dones.values()):
+                observation, _, _, _ = env.reset()
+        masks = np.array(masks, dtype=np.float32)
+        logits = rng.normal(size=(number_of_steps, 4)) + np.where(masks == 1, 0, -1e9)
+        log_probabilities = logits - np.log(np.exp(logits).sum(axis=1, keepdims=True))
+        actions = np.array(actions)
+        observations = np.array(observations, dtype=np.float32)
+        batch = {"obs": observations,
+                 "new_obs": np.roll(observations, -1, axis=0),
+                 "actions": actions,
+                 "action_dist_inputs": logits,
+                 "action_logp": log_probabilities[np.arange(number_of_steps), actions]}
+
+        for transform in range(symmetry.NUMBER_OF_TRANSFORMS):
+            transformed = dict(batch)
+            rllib_utils.transform_sample_batch(transformed, transform, map_height)
+            transformed_masks = transformed["obs"][:, :4]
+            transformed_logits = transformed["action_dist_inputs"]
+            transformed_actions = transformed["actions"]
+            steps = np.arange(number_of_steps)
+
+            self.assertTrue(np.all(transformed_masks[steps, transformed_actions] == 1))
+            self.assertTrue(np.array_equal(transformed_masks == 0, transformed_logits < -1e8))
+            self.assertTrue(np.array_equal(transformed_logits[steps, transformed_actions],
+                                           logits[steps, actions]))
+            transformed_log_probabilities = transformed_logits - np.log(
+                np.exp(transformed_logits).sum(axis=1, keepdims=True))
+            self.assertTrue(np.allclose(transformed_log_probabilities[steps, transformed_actions],
+                                        transformed["action_logp"]))
+
+            states = transformed["obs"][:, 4:].reshape(number_of_steps, map_height, map_height, -1)
+            self.assertTrue(np.array_equal(
+                states, symmetry.transform_observation(
+                    batch["obs"][:, 4:].reshape(number_of_steps, map_height, map_height, -1),
+                    transform)))
+
+if __name__ == '__main__':
+    unittest.main()
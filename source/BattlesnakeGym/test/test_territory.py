@@ -0,0 +1,105 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License").
+# You may not use this file except in compliance with the License.
+# A copy of the License is located at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# or in the "license" file accompanying this file. This file is distributed
+# on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either
+# express or implied. See the License for the specific language governing
+# permissions and limitations under the License.
+
+import unittest
+from unittest import mock
+
+import numpy as np
+
+from battlesnake_gym.snake_gym import BattlesnakeGym
+from battlesnake_gym.snake import Snake
+from battlesnake_gym import territory
+
+class TestTerritory(unittest.TestCase):
+    '''
+    Test the breadth first search features and their observation channels
+    '''
+
+    def test_tails_open_paths(self):
+        '''
+        Test that a wall of body segments can be crossed once the segments have moved
+        '''
+        free_times = np.zeros((3, 3), dtype=np.int32)
+        free_times[:, 1] = [1, 5, 2]
+        sources = np.zeros((1, 3, 3), dtype=bool)
+        sources[0, 1, 0] = True
+        distances = territory.multi_source_bfs(sources, free_times, max_depth=10)
+        self.assertEqual(distances[0].tolist(), [[1, 2, 3],
+                                                 [0, 5, 4],
+                                                 [1, 2, 3]])
+
+        distances = territory.multi_source_bfs(sources, free_times, max_depth=2)
+        self.assertEqual(distances[0, 1, 2], territory.UNREACHABLE)
+
+    def test_free_times(self):
+        '''
+        Test that the end of a snake is free after its initial stacking
+        '''
+        env = BattlesnakeGym(map_size=(5, 5), number_of_snakes=1, snake_spawn_locations=[(2, 2)],
+                             food_spawn_locations=[(4, 4)], seed=0)
+        env.reset()
+        free_times = territory.get_free_times(env.map_size, env.snakes.snakes)
+        self.assertEqual(free_times[2, 2], 3)
+        env.step([Snake.UP])
+        env.step([Snake.UP])
+        free_times = territory.get_free_times(env.map_size, env.snakes.snakes)
+        self.assertEqual(free_times[2, 2], 1)
+        self.assertEqual(free_times[1, 2], 2)
+        self.assertEqual(free_times[0, 2], 3)
+
+    def test_feature_channels(self):
+        '''
+        Test the shape and content of the observation with every feature channel
+        '''
+        env = BattlesnakeGym(observation_type="bordered-51s+reachable+voronoi+food_distance",
+                             map_size=(7, 7), number_of_snakes=2,
+                             snake_spawn_locations=[(0, 0), (6, 6)],
+                             food_spawn_locations=[(0, 6)])
+        observation, _, _, _ = env.reset()
+        self.assertEqual(observation.shape, (9, 9, 8))
+        interior = observation[1:-1, 1:-1]
+        self.assertTrue(np.all(interior[:, :, 3:5] == 1))
+        self.assertEqual(interior[0, 6, 7], 1)
+        self.assertEqual(interior[6, 0, 7], 13)
+
+        # The diagonal is at the same distance of both snakes
+        voronoi = interior[:, :, 5:7]
+        self.assertTrue(np.all(voronoi.sum(axis=2) <= 1))
+        self.assertEqual(voronoi[:, :, 0].sum(), 21)
+        self.assertEqual(voronoi[:, :, 1].sum(), 21)
+
+        observation, _, _, _ = env.step([Snake.RIGHT, Snake.LEFT])
+        lazy_observation, _, _, _ = env.step([Snake.RIGHT, Snake.LEFT], lazy=True)
+        with mock.patch.object(env, "_get_feature_planes", wraps=env._get_feature_planes) as features:
+            planes = [lazy_observation.get_plane(index) for index in range(8)]
+        self.assertEqual(features.call_count, 1)
+        for index in range(8):
+            self.assertTrue(np.array_equal(planes[index], env._get_observation()[:, :, index]))
+
+    def test_observation_space_bounds(self):
+        '''
+        Test that the food distances far from the food are inside the observation space
+        '''
+        env = BattlesnakeGym(observation_type="flat-51s+food_distance", map_size=(15, 15),
+                             number_of_snakes=1, snake_spawn_locations=[(7, 7)],
+                             food_spawn_locations=[(0, 0)], seed=0)
+        observation, _, _, _ = env.reset()
+        self.assertEqual(observation[14, 14, 2], 29)
+        self.assertTrue(np.all(observation <= env.observation_space.high))
+
+    def test_unknown_feature(self):
+        with self.assertRaises(ValueError):
+            BattlesnakeGym(observation_type="flat-51s+territory")
+
+if __name__ == '__main__':
+    unittest.main()
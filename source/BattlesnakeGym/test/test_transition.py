@@ -0,0 +1,89 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License").
+# You may not use this file except in compliance with the License.
+# A copy of the License is located at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# or in the "license" file accompanying this file. This file is distributed
+# on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either
+# express or implied. See the License for the specific language governing
+# permissions and limitations under the License.
+
+
+import unittest
+
+import numpy as np
+
+from battlesnake_gym.snake_gym import BattlesnakeGym
+from battlesnake_gym.batched_gym import BatchedBattlesnakeGym
+from battlesnake_gym.transition import transition
+
+class TestTransition(unittest.TestCase):
+    def test_same_rules_as_step(self):
+        '''
+        Test that transition gives the same snakes and outcomes as step.
+        Food is only spawned by step so the food of step may have one more food.
+        '''
+        for seed in range(5):
+            np.random.seed(seed)
+            env = BattlesnakeGym(map_size=(7, 7), number_of_snakes=4)
+            env.reset()
+            for _ in range(60):
+                state = env.snapshot()
+                actions = np.random.randint(0, 4, 4)
+                next_state, outcomes, rng_state = transition(state, actions)
+                _, _, _, info = env.step(actions)
+                step_state = env.snapshot()
+
+                self.assertIsNone(rng_state)
+                self.assertEqual([BatchedBattlesnakeGym.OUTCOMES[code] for code in outcomes],
+                                 [info["snake_info"][i] for i in range(4)])
+                self.assertEqual(next_state._replace(food=b""), step_state._replace(food=b""))
+                extra_food = step_state.get_food_map().astype(int) - next_state.get_food_map()
+                self.assertTrue(np.all(extra_food >= 0) and np.sum(extra_food) <= 1)
+                env.restore(next_state._replace(food=step_state.food))
+
+    def test_explicit_random_state(self):
+        '''
+        Test that the food is spawned by the random state and that the gyms are not modified
+        '''
+        np.random.seed(0)
+        env = BattlesnakeGym(map_size=(7, 7), number_of_snakes=2)
+        env.reset()
+        state = env.snapshot()
+        np_random_state = np.random.get_state()
+
+        rng_state = np.random.default_rng(1).bit_generator.state
+        number_of_food = np.sum(state.get_food_map())
+        for _ in range(40):
+            next_state, _, next_rng_state = transition(state, [0, 0], rng_state)
+            self.assertEqual(transition(state, [0, 0], rng_state)[0], next_state)
+            state = next_state
+            rng_state = next_rng_state
+        self.assertTrue(np.sum(state.get_food_map()) > number_of_food)
+
+        self.assertTrue(np.array_equal(np.random.get_state()[1], np_random_state[1]))
+        self.assertEqual(env.snapshot().turn_count, 0)
+
+    def test_given_gym(self):
+        '''
+        Test that a gym given by the caller gives the same transitions as the gym of the thread
+        '''
+        env = BattlesnakeGym(map_size=(7, 7), number_of_snakes=2, seed=0)
+        env.reset()
+        state = env.snapshot()
+        rule_gym = BattlesnakeGym(map_size=(7, 7), number_of_snakes=2)
+        rng_state = np.random.default_rng(2).bit_generator.state
+        for _ in range(20):
+            next_state, outcomes, next_rng_state = transition(state, [0, 1], rng_state, env=rule_gym)
+            expected_state, expected_outcomes, expected_rng_state = transition(state, [0, 1], rng_state)
+            self.assertEqual(next_state, expected_state)
+            self.assertTrue(np.array_equal(outcomes, expected_outcomes))
+            self.assertEqual(next_rng_state, expected_rng_state)
+            state, rng_state = next_state, next_rng_state
+        self.assertEqual(env.snapshot().turn_count, 0)
+
+if __name__ == '__main__':
+    unittest.main()
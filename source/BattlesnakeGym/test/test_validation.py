@@ -0,0 +1,50 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License").
+# You may not use this file except in compliance with the License.
+# A copy of the License is located at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# or in the "license" file accompanying this file. This file is distributed
+# on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either
+# express or implied. See the License for the specific language governing
+# permissions and limitations under the License.
+
+
+import contextlib
+import io
+import unittest
+
+import numpy as np
+
+from battlesnake_gym.snake_gym import BattlesnakeGym
+from battlesnake_gym.snake import Snake
+
+class TestValidation(unittest.TestCase):
+    def test_valid_games(self):
+        np.random.seed(0)
+        env = BattlesnakeGym(map_size=(7, 7), number_of_snakes=4, validate=True)
+        env.reset()
+        for _ in range(50):
+            env.step(np.random.randint(0, 4, 4))
+
+    def test_overlapping_snakes(self):
+        '''
+        Test that the game states are printed when two snakes overlap
+        '''
+        env = BattlesnakeGym(map_size=(7, 7), number_of_snakes=2, validate=True,
+                             snake_spawn_locations=[(3, 1), (1, 2)])
+        env.reset()
+        env.snakes.snakes[0].locations = [(3, 1), (3, 2), (3, 3)]
+        env.snakes.snakes[1].locations = [(1, 2), (2, 2), (3, 2), (4, 2)]
+        env.snakes._attach_snakes()
+
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output), self.assertRaises(RuntimeError):
+            env.step([Snake.UP, Snake.DOWN])
+        self.assertIn("before moving json", output.getvalue())
+        self.assertIn("final json", output.getvalue())
+
+if __name__ == '__main__':
+    unittest.main()
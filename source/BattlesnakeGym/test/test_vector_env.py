@@ -0,0 +1,75 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License").
+# You may not use this file except in compliance with the License.
+# A copy of the License is located at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# or in the "license" file accompanying this file. This file is distributed
+# on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either
+# express or implied. See the License for the specific language governing
+# permissions and limitations under the License.
+
+import unittest
+
+import numpy as np
+
+from battlesnake_gym.snake_gym import BattlesnakeGym
+from battlesnake_gym.vector_env import BattlesnakeVectorEnv
+from battlesnake_gym.rewards import Rewards
+
+class FailingRewards(Rewards):
+    def get_reward(self, name, snake_id, episode):
+        raise ValueError("No reward for {}".format(name))
+
+class TestVectorEnv(unittest.TestCase):
+    '''
+    Test that the games stepped by the workers are the same as stepping seeded gyms
+    '''
+
+    def _check_same_as_gyms(self, observation_type, number_of_workers, start_method=None):
+        number_of_envs, number_of_snakes = 5, 3
+        gym_kwargs = dict(observation_type=observation_type, map_size=(7, 7),
+                          number_of_snakes=number_of_snakes)
+        envs = [BattlesnakeGym(seed=seed, **gym_kwargs)
+                for seed in BattlesnakeVectorEnv.get_env_seeds(0, number_of_envs)]
+        rng = np.random.RandomState(0)
+        with BattlesnakeVectorEnv(number_of_envs, number_of_workers, seed=0,
+                                  start_method=start_method, **gym_kwargs) as vector_env:
+            observation, _, done, info = vector_env.reset()
+            for env_id, env in enumerate(envs):
+                self.assertTrue(np.array_equal(observation[env_id], env.reset()[0]))
+            for _ in range(30):
+                actions = rng.randint(0, 4, size=(number_of_envs, number_of_snakes))
+                observation, reward, done, info = vector_env.step(actions)
+                for env_id, env in enumerate(envs):
+                    env_observation, env_reward, env_done, env_info = env.step(actions[env_id])
+                    self.assertTrue(np.array_equal(observation[env_id], env_observation))
+                    self.assertEqual(reward[env_id].tolist(), [env_reward[i] for i in range(number_of_snakes)])
+                    self.assertEqual(done[env_id].tolist(), [env_done[i] for i in range(number_of_snakes)])
+                    self.assertEqual(info["outcomes"][env_id].tolist(), env_info["outcomes"].tolist())
+                    self.assertEqual(info["current_turn"][env_id], env_info["current_turn"])
+
+            done_env_ids = np.flatnonzero(done.all(axis=1) | (info["current_turn"] > 20))
+            observation, _, done, info = vector_env.reset(done_env_ids)
+            for env_id in done_env_ids:
+                self.assertEqual(info["current_turn"][env_id], 0)
+                self.assertTrue(np.array_equal(observation[env_id], envs[env_id].reset()[0]))
+
+    def test_same_as_gyms(self):
+        self._check_same_as_gyms("flat-51s", 2)
+        self._check_same_as_gyms("bordered-num", 3)
+
+    def test_spawn_start_method(self):
+        self._check_same_as_gyms("max-bordered-51s", 2, start_method="spawn")
+
+    def test_worker_error(self):
+        with BattlesnakeVectorEnv(2, 2, map_size=(7, 7), number_of_snakes=2,
+                                  rewards=FailingRewards()) as vector_env:
+            vector_env.reset()
+            with self.assertRaises(RuntimeError):
+                vector_env.step(np.zeros((2, 2)))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License").
+# You may not use this file except in compliance with the License.
+# A copy of the License is located at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# or in the "license" file accompanying this file. This file is distributed
+# on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either
+# express or implied. See the License for the specific language governing
+# permissions and limitations under the License.
+
+
+import unittest
+
+import numpy as np
+
+from battlesnake_gym.snake_gym import BattlesnakeGym
+from battlesnake_gym.snake import Snake
+
+class TestZobrist(unittest.TestCase):
+    def test_incremental_hash_matches_full_hash(self):
+        '''
+        Test that the hash updated during the game matches the hash computed
+        from scratch after restoring the game in another gym
+        '''
+        other_env = BattlesnakeGym(map_size=(7, 7), number_of_snakes=3)
+        hashes = {}
+        for seed in range(10):
+            np.random.seed(seed)
+            env = BattlesnakeGym(map_size=(7, 7), number_of_snakes=3)
+            env.reset()
+            for _ in range(40):
+                env.step(np.random.randint(0, 4, 3))
+                snapshot = env.snapshot()
+                other_env.restore(snapshot)
+                self.assertEqual(other_env.state_hash, env.state_hash)
+                position = (snapshot.turn_count, snapshot.bodies, snapshot.lengths, snapshot.food,
+                            tuple(np.array(snapshot.health) * np.array(snapshot.is_alive)))
+                self.assertEqual(hashes.setdefault(env.state_hash, position), position)
+
+    def test_hash_changes(self):
+        np.random.seed(0)
+        env = BattlesnakeGym(map_size=(7, 7), number_of_snakes=2,
+                             snake_spawn_locations=[(1, 1), (5, 5)],
+                             food_spawn_locations=[(3, 3)])
+        env.reset()
+        initial_hash = env.state_hash
+
+        env.food.remove_food_from_coord((3, 3))
+        food_hash = env.state_hash
+        self.assertNotEqual(food_hash, initial_hash)
+        env.food.spawn_food(env.snakes.free_cells)
+        self.assertNotEqual(env.state_hash, food_hash)
+
+        # Snakes with the same cells but a different head
+        env = BattlesnakeGym(map_size=(7, 7), number_of_snakes=2,
+                             snake_spawn_locations=[(1, 1), (5, 5)])
+        env.reset()
+        env.snakes.snakes[0].locations = [(1, 1), (1, 2)]
+        env.snakes._attach_snakes()
+        first_hash = env.snakes.get_hash()
+        env.snakes.snakes[0].locations = [(1, 2), (1, 1)]
+        env.snakes._attach_snakes()
+        self.assertNotEqual(env.snakes.get_hash(), first_hash)
+
+        env.step([Snake.DOWN, Snake.UP])
+        snake = env.snakes.snakes[0]
+        incremental_hash = snake.get_hash()
+        snake.attach_zobrist(env.snakes.zobrist_keys.segments[0])
+        self.assertEqual(snake.get_hash(), incremental_hash)
+
+if __name__ == '__main__':
+    unittest.main()
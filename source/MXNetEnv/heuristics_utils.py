@@ -169,7 +169,8 @@ def simulate(env, net, heuristics, number_of_snakes):
     
     state, _, _, infos = env.reset()
     
-    rgb_arrays = [env.render(mode="rgb_array")]
+    # The boards are drawn at the end from snapshots of every turn
+    snapshots = [env.snapshot()]
     infos_array = [infos]
     actions_array = [[4, 4, 4, 4]]
     json_array = [env.get_json()]
@@ -212,8 +213,7 @@ def simulate(env, net, heuristics, number_of_snakes):
         
         next_state, reward, dones, infos = env.step(np.array(actions))
         
-        rgb_array = env.render(mode="rgb_array")
-        rgb_arrays.append(rgb_array.copy())
+        snapshots.append(env.snapshot())
         infos_array.append(infos)
         actions_array.append(actions)
         heuristics_log_array.append(heuristics_log)
@@ -231,4 +231,5 @@ def simulate(env, net, heuristics, number_of_snakes):
             print("Completed")
             break  
 
+    rgb_arrays = list(env.render_episode(snapshots))
     return infos_array, rgb_arrays, actions_array, heuristics_log_array, json_array
\ No newline at end of file
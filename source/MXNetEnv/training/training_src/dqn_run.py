@@ -43,7 +43,7 @@ def trainer(env, agents, number_of_snakes, name,
         state, _, dones, info = env.reset()
         info["episodes"] = i_episode
         score = [0 for _ in range(number_of_snakes)]
-        rgb_arrays = []
+        snapshots = []
         agents.reset()
         for t in range(max_t):
             
@@ -63,14 +63,14 @@ def trainer(env, agents, number_of_snakes, name,
                 
             state = next_state
             if should_render and (i_episode % render_steps == 0):
-                rgb_array = env.render(mode="rgb_array")
-                rgb_arrays.append(rgb_array)
+                snapshots.append(env.snapshot())
 
             number_of_snakes_alive = sum(list(dones.values()))
             if number_of_snakes - number_of_snakes_alive <= 1:
                 break
             
         if should_render and (i_episode % render_steps == 0):
+            rgb_arrays = list(env.render_episode(snapshots))
             write_gif(rgb_arrays, 'gifs/gif:{}-{}.gif'.format(name, i_episode),
                       fps=5)
 
@@ -9,6 +9,8 @@ from mxnet import nd, autograd, gluon
 
 from networks.qnetworks import QNetworkConcat, QNetworkAttention, QNetworkVision
 from networks.utils import sort_states_for_snake_id
+from battlesnake_gym.symmetry import (NUMBER_OF_TRANSFORMS, transform_observation,
+                                      transform_actions)
 
 ctx = mx.gpu(0) if mx.context.num_gpus() > 0 else mx.cpu()
 
@@ -31,7 +33,8 @@ class MultiAgentsCollection:
                  dS, d,
                  number_of_hidden_states,
                  kernel_size, repeat_size,
-                 activation_type):
+                 activation_type,
+                 augment_symmetries=False):
         self.one_versus_all = state_type == "one_versus_all"
         self.models_to_save = models_to_save
             
@@ -54,7 +57,8 @@ class MultiAgentsCollection:
                           sequence_length, buffer_size, update_every,
                           lr_start, lr_step, lr_factor,
                           gamma, tau, batch_size,
-                          qnetwork_local, qnetwork_target)
+                          qnetwork_local, qnetwork_target,
+                          augment_symmetries)
             agents[agent_id] = agent
         self.model_dir = model_dir
 
@@ -166,7 +170,8 @@ class Agent:
                  buffer_size, update_every,
                  lr_start, lr_step, lr_factor,
                  gamma, tau, batch_size,
-                 qnetwork_local, qnetwork_target):
+                 qnetwork_local, qnetwork_target,
+                 augment_symmetries=False):
         
         self.action_size = action_size
         self.sequence_length = sequence_length
@@ -195,7 +200,7 @@ class Agent:
                                      optimizer=adam_optimizer)
 
         self.memory = ReplayBuffer(agent_id, action_size, buffer_size,
-                                   self.batch_size, seed)
+                                   self.batch_size, seed, augment_symmetries)
 
         self.loss_function = gluon.loss.L2Loss()
         self.done = False
@@ -369,7 +374,8 @@ class Agent:
 
 class ReplayBuffer:
     ACTION_ZEROPAD = 4
-    def __init__(self, agent_id, action_size, buffer_size, batch_size, seed):
+    def __init__(self, agent_id, action_size, buffer_size, batch_size, seed,
+                 augment_symmetries=False):
         """Initialize a ReplayBuffer object.
         Params
         ======
@@ -378,6 +384,8 @@ class ReplayBuffer:
             buffer_size (int): maximum size of buffer
             batch_size (int): size of each training batch
             seed (int): random seed
+            augment_symmetries (bool): sample each sequence on a random rotation or
+                reflection of the board (the maps must be square)
         """
         self.agent_id = agent_id
         self.action_size = action_size
@@ -391,6 +399,7 @@ class ReplayBuffer:
                                                   "turn_count", "snake_health",
                                                   "episode"])
         self.seed = random.seed(seed)
+        self.augment_symmetries = augment_symmetries
     
     def add(self, state, action, reward, next_state, done, snake_id, turn_count,
             snake_health, episode):
@@ -475,6 +484,12 @@ class ReplayBuffer:
         for index in indexes:
             states_i, actions_i, rewards_i, next_states_i, dones_i, snake_id_i, turn_count_i, snake_health_i = ReplayBuffer.sample_from_index(
                 self.agent_id, sequence_length, index)
+            if self.augment_symmetries:
+                # Same transform for the whole sequence, the states are (sequence_length, C, H, W)
+                transform = random.randrange(NUMBER_OF_TRANSFORMS)
+                states_i = transform_observation(states_i, transform, axes=(-2, -1))
+                next_states_i = transform_observation(next_states_i, transform, axes=(-2, -1))
+                actions_i = transform_actions(actions_i, transform)
             states.append(states_i)
             actions.append(actions_i)
             rewards.append(rewards_i)
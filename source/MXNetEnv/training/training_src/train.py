@@ -77,7 +77,8 @@ def run(seed, args):
                     args.kernel_size, args.repeat_size,
                     args.activation_type)
     
-    agent = MultiAgentsCollection(*agent_params)
+    agent = MultiAgentsCollection(*agent_params,
+                                  augment_symmetries=args.augment_symmetries)
 
     trainer(env, agent, args.number_of_snakes,
             args.run_name, args.episodes,
@@ -164,6 +165,8 @@ if __name__ == "__main__":
                         help='Activation for qnetwork')
     parser.add_argument('--sequence_length', type=int, default=2,
                         help='Number of states to feed sequencially feed in')
+    parser.add_argument('--augment_symmetries', action='store_true',
+                        help='Sample replays on random rotations and reflections of the map')
 
     # Logging information
     parser.add_argument('--print_score_steps', type=int, default=100,
@@ -63,7 +63,8 @@ def get_action(net, state, prev_action, prev_reward):
 def simulate(env, net, heuristics, number_of_snakes, use_random_snake):    
     state, _, _, infos  = env.reset()
 
-    rgb_arrays = [env.render(mode="rgb_array")]
+    # The boards are drawn at the end from snapshots of every turn
+    snapshots = [env.snapshot()]
     infos_array = [infos]
     actions_array = [[4 for _ in range(number_of_snakes)]]
     json_array = [env.get_json()]
@@ -118,8 +119,7 @@ def simulate(env, net, heuristics, number_of_snakes, use_random_snake):
                                        "reward": reward,
                                        "action": action}
 
-        rgb_array = env.render(mode="rgb_array")
-        rgb_arrays.append(rgb_array.copy())
+        snapshots.append(env.snapshot())
         infos_array.append(infos)
         actions_array.append(actions)
         heuristics_log_array.append(heuristics_log)
@@ -147,4 +147,5 @@ def simulate(env, net, heuristics, number_of_snakes, use_random_snake):
             print("Completed")
             break  
 
+    rgb_arrays = list(env.render_episode(snapshots))
     return infos_array, rgb_arrays, actions_array, heuristics_log_array, json_array
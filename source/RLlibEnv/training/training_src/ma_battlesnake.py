@@ -27,21 +27,31 @@ try:
     from battlesnake_heuristics import MyBattlesnakeHeuristics
 except ModuleNotFoundError:
     from inference.inference_src.battlesnake_heuristics import MyBattlesnakeHeuristics
-    
+
 ## MultiAgentEnv wrapper for battlesnake_gym
 class MultiAgentBattlesnake(MultiAgentEnv):
 
     MAX_MAP_HEIGHT = 21
+    # Names of the heuristics that are computed with BattlesnakeGym.action_masks.
+    # The other heuristics are methods of MyBattlesnakeHeuristics
+    HEURISTIC_MASK_KINDS = {"banned_forbidden_moves": "forbidden",
+                            "banned_wall_hits": "wall"}
         
-    def __init__(self, num_agents, map_height, heuristics, rewards=SimpleRewards()):
+    def __init__(self, num_agents, map_height, heuristics, rewards=SimpleRewards(), profiling=False,
+                 seed=None):
         observation_type = "max-bordered-51s"
          
         self.env = BattlesnakeGym(
             observation_type=observation_type,
             number_of_snakes=num_agents, 
-            map_size=(map_height, map_height), rewards=rewards)
+            map_size=(map_height, map_height), rewards=rewards, seed=seed)
+        self.profiling = profiling
+        if self.profiling:
+            self.env.enable_profiling()
         
         self.observation_height = self.MAX_MAP_HEIGHT
+        # The gym writes every observation in this buffer
+        self.observation_buffer = np.empty(self.env.observation_space.shape, dtype=np.float32)
         self.action_space = self.env.action_space[0]
         
         gym_observation_space = gym.spaces.Box(low=-1.0, high=5.0,
@@ -56,30 +66,55 @@ class MultiAgentBattlesnake(MultiAgentEnv):
         self.observation_type = observation_type
         self.old_obs1 = {}
         self.heuristics = heuristics
-        if len(self.heuristics) > 0:
-            self.battlesnake_heuristics = MyBattlesnakeHeuristics()
-            self.heuristics_list = []
-            for heuristic_name in self.heuristics:
-                if heuristic_name == "banned_forbidden_moves":
-                    self.heuristics_list.append(self.battlesnake_heuristics.banned_forbidden_moves)
-                elif heuristic_name == "banned_wall_hits":
-                    self.heuristics_list.append(self.battlesnake_heuristics.banned_wall_hits)
+        # The heuristics can also be kinds of BattlesnakeGym.action_masks (e.g., "body")
+        self.mask_kinds = []
+        self.heuristics_list = []
+        self.battlesnake_heuristics = MyBattlesnakeHeuristics()
+        for heuristic_name in self.heuristics:
+            if heuristic_name in self.HEURISTIC_MASK_KINDS:
+                self.mask_kinds.append(self.HEURISTIC_MASK_KINDS[heuristic_name])
+            elif heuristic_name in BattlesnakeGym.ACTION_MASK_KINDS:
+                self.mask_kinds.append(heuristic_name)
+            elif hasattr(self.battlesnake_heuristics, heuristic_name):
+                self.heuristics_list.append(getattr(self.battlesnake_heuristics, heuristic_name))
         self.rewards = rewards
+        self.env_seed = seed
         
     def set_effective_map_size(self, eff_map_size):
-        self.__init__(self.num_agents, eff_map_size, self.heuristics, self.rewards)
+        # Keep the random streams of the gym, reseeding would replay the same games after every resize
+        random_state = self.env.get_random_state()
+        self.__init__(self.num_agents, eff_map_size, self.heuristics, self.rewards, self.profiling,
+                      self.env_seed)
+        self.env.set_random_state(random_state)
         self.reset()
 
+    def _get_action_masks(self):
+        '''
+        Helper function to get the action mask of every agent from the gym
+        '''
+        if len(self.mask_kinds) > 0:
+            return self.env.action_masks(kinds=self.mask_kinds).astype(np.float32)
+        return np.ones((self.num_agents, 4), dtype=np.float32)
+
+    def _apply_heuristics(self, mask, state, snake_id, turn_count, health):
+        '''
+        Helper function to combine the mask of the gym with the heuristics of MyBattlesnakeHeuristics
+        '''
+        if len(self.heuristics_list) == 0:
+            return mask
+        heuristics_mask = self.battlesnake_heuristics.get_action_masks_from_functions(
+            state, snake_id, turn_count, health, self.env, functions=self.heuristics_list)
+        return mask * np.asarray(heuristics_mask, dtype=np.float32)
+
     def reset(self):
         self.mask = {}
-        new_obs, _, _, info = self.env.reset()
+        new_obs, _, _, info = self.env.reset(out=self.observation_buffer)
 
         obs = {}
 
         # add empty map placeholders for use until we've seen 2 steps
         empty_map = np.zeros((self.observation_height, self.observation_height, 3))
-        
-        new_obs = np.array(new_obs, dtype=np.float32)
+        masks = self._get_action_masks()
 
         for i in range(self.num_agents):
             agent_id = "agent_{}".format(i)
@@ -88,13 +123,7 @@ class MultiAgentBattlesnake(MultiAgentEnv):
             
             merged_map = np.concatenate((empty_map, obs_i), axis=-1)
 
-            if len(self.heuristics) > 0:
-                health = {k: 100 for k in range(self.num_agents)}
-                mask = self.battlesnake_heuristics.get_action_masks_from_functions(
-                    obs_i, i, 0, health, self.env, 
-                    functions=self.heuristics_list)
-            else:
-                mask = np.array([1, 1, 1, 1])
+            mask = self._apply_heuristics(masks[i], obs_i, i, 0, info["snake_health"])
             obs[agent_id] = {"state": merged_map, "action_mask": mask}
             
             self.mask[agent_id] = obs[agent_id]["action_mask"]
@@ -108,32 +137,24 @@ class MultiAgentBattlesnake(MultiAgentEnv):
         for key, value in sorted(action_dict.items()):
             actions.append(value)
 
-        o, r, d, info = self.env.step(actions)
+        o, r, d, info = self.env.step(actions, out=self.observation_buffer)
         rewards = {}
         obs = {}
         infos = {}
+        masks = self._get_action_masks()
 
         for i, key in enumerate(sorted(action_dict.keys())):            
             old_obs1 = self.old_obs1[key]
             
-            obs_i = np.array(o, dtype=np.float32)
-            obs_i = sort_states_for_snake_id(obs_i, i+1)
+            obs_i = sort_states_for_snake_id(o, i+1)
             
             merged_map = np.concatenate((old_obs1, obs_i), axis=-1)
             
             infos[key] = info
             rewards[key] = r[i]
-            if len(self.heuristics) > 0 and self.env.snakes.get_snakes()[i].is_alive():
-                turn_count = info["current_turn"]+1
-                health = info["snake_health"]
-
-                mask = self.battlesnake_heuristics.get_action_masks_from_functions(
-                        obs_i, i, turn_count, health, self.env, 
-                        functions=self.heuristics_list)
-                                
-            else:
-                mask = np.array([1, 1, 1, 1])
 
+            mask = self._apply_heuristics(masks[i], obs_i, i, info["current_turn"] + 1,
+                                          info["snake_health"])
             obs[key] = {"state": merged_map, "action_mask": mask}
             self.old_obs1[key] = np.array(obs_i, dtype=np.float32)
             
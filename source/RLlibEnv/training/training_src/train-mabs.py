@@ -2,17 +2,23 @@ import json
 import os
 
 import gym
+import numpy as np
 import ray
 import ray.tune
 import json
 from ray.tune import run_experiments
 from ray.tune.registry import register_env
 from ray.rllib.models import ModelCatalog
+from ray.rllib.evaluation.postprocessing import compute_advantages
+from ray.rllib.policy.sample_batch import SampleBatch
 from cnn_tf import VisionNetwork
 from ma_battlesnake import MultiAgentBattlesnake
+from utils import transform_sample_batch
 
 from sagemaker_rl.ray_launcher import SageMakerRayLauncher
 from battlesnake_gym.rewards import SimpleRewards
+from battlesnake_gym.symmetry import NUMBER_OF_TRANSFORMS
+from battlesnake_gym.outcome import OUTCOME_STRINGS
 
 class MyLauncher(SageMakerRayLauncher):
     def __init__(self):
@@ -36,6 +42,8 @@ class MyLauncher(SageMakerRayLauncher):
                           "Starved": "Starved",
                           "Forbidden move": "Forbidden_move"
         }
+        # Custom metric of each Outcome code, so that the outcomes are counted with np.bincount
+        self.outcome_metrics = [self.converter[description] for description in OUTCOME_STRINGS]
         self.rewards = SimpleRewards()
         if "rewards" in self.hparams:
             self.rewards.reward_dict = self.hparams["rewards"]
@@ -43,40 +51,92 @@ class MyLauncher(SageMakerRayLauncher):
         self.heuristics = []
         if "heuristics" in self.hparams:
             self.heuristics = self.hparams["heuristics"]
+
+        # Time each phase of the gym and report them as custom metrics
+        self.profile_env = self.hparams.get("profile_env", False)
+
+        # Train on a random rotation or reflection of the map for each trajectory
+        self.augment_symmetries = self.hparams.get("augment_symmetries", False)
+
+        # Seed of the games. Each environment of each rollout worker gets its own seed
+        self.env_seed = self.hparams.get("seed", None)
+
+    def _get_env_seed(self, env_config):
+        if self.env_seed is None:
+            return None
+        worker_index = getattr(env_config, "worker_index", 0)
+        vector_index = getattr(env_config, "vector_index", 0)
+        seed_sequence = np.random.SeedSequence([self.env_seed, worker_index, vector_index])
+        return int(seed_sequence.generate_state(1)[0])
           
     def register_env_creator(self):
-        register_env("MultiAgentBattlesnake-v1", lambda _: MultiAgentBattlesnake(
+        register_env("MultiAgentBattlesnake-v1", lambda env_config: MultiAgentBattlesnake(
             num_agents=self.num_agents, 
             map_height=self.map_height,
             heuristics=self.heuristics, 
-            rewards=self.rewards))
+            rewards=self.rewards,
+            profiling=self.profile_env,
+            seed=self._get_env_seed(env_config)))
 
     def on_episode_start(self, info):
         for outcome in ["Snake_hit_wall", "Snake_was_eaten", "Snake_hit_body", "Killed_another_snake",
                         "Starved", "Forbidden_move"]:
             info['episode'].custom_metrics[outcome] = 0
 
+    def _count_outcomes(self, episode, outcomes):
+        counts = np.bincount(outcomes[:self.num_agents], minlength=len(self.outcome_metrics))
+        for code in np.flatnonzero(counts):
+            converted_outcome = self.outcome_metrics[code]
+            if len(converted_outcome) > 0:
+                episode.custom_metrics[converted_outcome] += int(counts[code])
+
     def on_episode_step(self, info):
         agent_info = info['episode'].last_info_for('agent_1')
-        if "snake_info" in agent_info:
-            for i in range(self.num_agents):
-                snake_info_i = agent_info["snake_info"][i]
-                converted_outcome = self.converter[snake_info_i]
-                if len(converted_outcome) > 0:
-                    info['episode'].custom_metrics[converted_outcome] += 1
+        if "outcomes" in agent_info:
+            self._count_outcomes(info['episode'], agent_info["outcomes"])
 
     def on_episode_end(self, info):
         agent_info = info['episode'].last_info_for('agent_1')
-        for i in range(self.num_agents):
-            snake_info_i = agent_info["snake_info"][i]
-            converted_outcome = self.converter[snake_info_i]
-            if len(converted_outcome) > 0:
-                info['episode'].custom_metrics[converted_outcome] += 1
+        self._count_outcomes(info['episode'], agent_info["outcomes"])
 
         for i in range(self.num_agents):
             snake_max_len = info['episode'].last_info_for('agent_1')['snake_max_len']
             info['episode'].custom_metrics['policy{}_max_len'.format(i)] = snake_max_len[i]
+
+        if self.profile_env:
+            # Only report the env of this episode, the other envs of the worker are still running
+            env = info['env'].get_unwrapped()[info['episode'].env_id]
+            for phase, profile in env.env.profile_report(reset=True).items():
+                if profile["calls"] == 0:
+                    continue
+                info['episode'].custom_metrics['env_{}_ms'.format(phase)] = profile["mean_time"] * 1000
+                info['episode'].custom_metrics['env_{}_calls'.format(phase)] = profile["calls"]
     
+    def on_postprocess_traj(self, info):
+        if self.augment_symmetries:
+            transform = np.random.randint(NUMBER_OF_TRANSFORMS)
+            batch = info['post_batch']
+            transform_sample_batch(batch, transform, MultiAgentBattlesnake.MAX_MAP_HEIGHT)
+            if SampleBatch.VF_PREDS in batch:
+                policy, _ = info['pre_batch']
+                self._recompute_advantages(policy, batch)
+
+    def _recompute_advantages(self, policy, batch):
+        '''
+        The value predictions, advantages and value targets were computed on the untransformed
+        observations, which is only valid if the value function is exactly symmetric.
+        Compute them again for the transformed observations.
+        '''
+        _, _, fetches = policy.compute_actions(batch[SampleBatch.CUR_OBS], explore=False)
+        batch[SampleBatch.VF_PREDS] = fetches[SampleBatch.VF_PREDS]
+        if batch[SampleBatch.DONES][-1]:
+            last_r = 0.0
+        else:
+            _, _, fetches = policy.compute_actions(batch[SampleBatch.NEXT_OBS][-1:], explore=False)
+            last_r = fetches[SampleBatch.VF_PREDS][0]
+        compute_advantages(batch, last_r, policy.config["gamma"], policy.config.get("lambda", 1.0),
+                           use_gae=policy.config.get("use_gae", True))
+
     def on_train_result(self, info):
         max_lens_per_policy = []
         for i in range(self.num_agents):
@@ -122,6 +182,7 @@ class MyLauncher(SageMakerRayLauncher):
                     'on_episode_start': self.on_episode_start,
                     'on_episode_step': self.on_episode_step,
                     'on_episode_end': self.on_episode_end,
+                    'on_postprocess_traj': self.on_postprocess_traj,
                     'on_train_result': self.on_train_result,
                 },
                 'num_workers': (self.num_cpus-1),
@@ -1,5 +1,8 @@
 import numpy as np
 
+from battlesnake_gym.symmetry import (transform_observation, transform_actions,
+                                      transform_action_masks)
+
 def sort_states_for_snake_id(state, snake_id):
     '''
     Given states of shape (m, n, s+1) where m and n is the dimension of the map
@@ -41,3 +44,45 @@ def sort_states_for_snake_id(state, snake_id):
         output_states[:, :, 2] = np.sum(other_states, axis=2)
 
     return output_states
+
+# Columns of the sample batches with one value per action (the inputs of the action distribution)
+PER_ACTION_COLUMNS = ["action_dist_inputs", "behaviour_logits"]
+
+def transform_sample_batch(batch, transform, map_height):
+    '''
+    Apply a rotation or reflection of battlesnake_gym.symmetry to a trajectory of
+    MultiAgentBattlesnake (e.g., in the on_postprocess_traj callback).
+    The observations of the batch are the flattened dict observations: the action mask
+    followed by the state of shape (map_height, map_height, channels).
+
+    The logits of the policy that played the trajectory are permuted like the actions, so
+    on-policy algorithms (e.g., PPO) compare the same moves in their importance ratio and KL term.
+    The log-probability of an action is the same after permuting the action and the logits,
+    so action_logp and action_prob are kept. The value predictions (vf_preds) and the
+    advantages are not transformed: they stay valid only if the value function is symmetric,
+    so they should be computed again on the transformed observations (see train-mabs.py).
+
+    Params:
+    -------
+    batch: SampleBatch
+        The obs, new_obs, actions, prev_actions and PER_ACTION_COLUMNS columns are replaced
+    transform: int
+        0 to battlesnake_gym.symmetry.NUMBER_OF_TRANSFORMS - 1
+    map_height: int
+    '''
+    number_of_actions = 4
+    for key in ["obs", "new_obs"]:
+        observations = batch[key]
+        masks = transform_action_masks(observations[:, :number_of_actions], transform)
+        states = observations[:, number_of_actions:].reshape(
+            (len(observations), map_height, map_height, -1))
+        states = transform_observation(states, transform)
+        batch[key] = np.concatenate([masks, states.reshape(len(observations), -1)], axis=1)
+
+    for key in ["actions", "prev_actions"]:
+        if key in batch:
+            batch[key] = transform_actions(batch[key], transform)
+
+    for key in PER_ACTION_COLUMNS:
+        if key in batch:
+            batch[key] = transform_action_masks(batch[key], transform)